@@ -0,0 +1,276 @@
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from itertools import count
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import math
+import time
+
+from .config import settings
+from . import metrics
+from ..processors.factory import ProcessorFactory, UnsupportedFileType
+from ..utils.sniffing import Sniffed
+
+# Assumed conversion time before any conversion of a type has finished
+DEFAULT_CONVERSION_SECONDS = 5.0
+
+# Weight of the latest conversion in the moving average of durations
+DURATION_SMOOTHING = 0.2
+
+# Tenant of requests that do not identify one
+DEFAULT_TENANT = "default"
+
+class Lane(str, Enum):
+    """Scheduling lanes; interactive work is dispatched ahead of bulk work."""
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+@dataclass(eq=False)
+class _Waiter:
+    processor_name: str
+    lane: Lane
+    tenant: str
+    start_tag: float
+    finish_tag: float
+    seq: int
+    future: asyncio.Future = field(repr=False)
+
+class AdmissionController:
+    """
+    Limits and schedules concurrent conversions in this process.
+
+    Conversions run under a global limit and a limit per processor. Work
+    beyond the limits waits in one of two lanes: interactive (single small
+    uploads) is dispatched first, bulk (batches, large and resumable
+    uploads) keeps CONVERSION_BULK_MIN_SLOTS running so backfills still
+    progress, and CONVERSION_INTERACTIVE_RESERVED slots are never given to
+    bulk work. Within a lane, tenants share slots by weighted fair queuing:
+    each conversion is charged its expected duration divided by the
+    tenant's weight, and the waiter with the smallest virtual finish time
+    runs next, so one tenant's 50k files queue behind everybody else's few.
+
+    A waiter whose processor is saturated does not hold up other waiters.
+    Bounded (request-scoped) waits are turned away with 429 when their
+    lane's queue is full and with 503 after CONVERSION_QUEUE_TIMEOUT; work
+    that was already accepted waits without either bound.
+    """
+
+    def __init__(self):
+        self.max_concurrent = settings.CONVERSION_MAX_CONCURRENT
+        self.processor_limits = settings.CONVERSION_PROCESSOR_LIMITS
+        self.queue_size = settings.CONVERSION_QUEUE_SIZE
+        self.queue_timeout = settings.CONVERSION_QUEUE_TIMEOUT
+        self.interactive_max_bytes = settings.CONVERSION_INTERACTIVE_MAX_BYTES
+        self.interactive_reserved = settings.CONVERSION_INTERACTIVE_RESERVED
+        self.bulk_min_slots = settings.CONVERSION_BULK_MIN_SLOTS
+        self.tenant_weights = settings.CONVERSION_TENANT_WEIGHTS
+        self._running = 0
+        self._running_by_processor: Dict[str, int] = defaultdict(int)
+        self._running_by_lane: Dict[Lane, int] = defaultdict(int)
+        self._waiters: List[_Waiter] = []
+        self._avg_seconds: Dict[str, float] = {}
+        # Weighted fair queuing state per lane
+        self._virtual_time: Dict[Lane, float] = defaultdict(float)
+        self._tenant_finish: Dict[Lane, Dict[str, float]] = defaultdict(dict)
+        self._seq = count()
+
+    @staticmethod
+    def processor_name(filename: Optional[str], sniffed: Optional[Sniffed] = None) -> str:
+        """
+        Name of the processor that will convert a file, for limit lookups.
+
+        Pass the sniffed content, as given to the factory, so a renamed file
+        is admitted as what it really is rather than by its extension.
+        """
+        if sniffed is not None:
+            try:
+                return ProcessorFactory.processor_class_for(filename or "", sniffed).__name__
+            except UnsupportedFileType:
+                # The factory rejects it as soon as it gets a slot
+                pass
+        return ProcessorFactory.get_processor_class(Path(filename or "").suffix).__name__
+
+    def lane_for_upload(self, size: Optional[int]) -> Lane:
+        """Lane of a single upload: interactive unless it is large."""
+        if size is not None and size > self.interactive_max_bytes:
+            return Lane.BULK
+        return Lane.INTERACTIVE
+
+    def ensure_capacity(self, lane: Lane, processor_name: Optional[str] = None) -> None:
+        """
+        Reject new work up front if the lane's wait queue is full.
+
+        Raises:
+            AdmissionRejected: With status 429 when the queue is full
+        """
+        if self._depth(lane) >= self.queue_size:
+            metrics.ADMISSION_REJECTED.labels(processor_name or "any", "queue_full").inc()
+            raise AdmissionRejected(
+                429, "Too many conversions queued", self._retry_after(lane, processor_name)
+            )
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        processor_name: str,
+        lane: Lane = Lane.INTERACTIVE,
+        tenant: Optional[str] = None,
+        bounded: bool = True
+    ) -> AsyncIterator[None]:
+        """
+        Hold a conversion slot for the duration of the block.
+
+        Args:
+            processor_name: Processor class name, see processor_name()
+            lane: Scheduling lane
+            tenant: Client or tenant key that fair queuing shares slots across
+            bounded: Apply the queue size and wait timeout; pass False for
+                work that has already been accepted
+
+        Raises:
+            AdmissionRejected: If a bounded request cannot get a slot
+        """
+        tenant = tenant or DEFAULT_TENANT
+        wait_start = time.monotonic()
+        if self._can_run(processor_name, lane):
+            # Immediate starts are charged to the tenant like queued ones
+            self._charge(lane, tenant, processor_name)
+            self._take(processor_name, lane)
+        else:
+            if bounded:
+                self.ensure_capacity(lane, processor_name)
+            await self._wait(processor_name, lane, tenant, bounded)
+        metrics.ADMISSION_WAIT_SECONDS.labels(processor_name, lane.value).observe(
+            time.monotonic() - wait_start
+        )
+
+        run_start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(processor_name, lane, time.monotonic() - run_start)
+
+    def stats(self) -> Dict[str, int]:
+        """Running and queued conversions, for health checks."""
+        return {"running": self._running, "queued": len(self._waiters)}
+
+    async def _wait(self, processor_name: str, lane: Lane, tenant: str, bounded: bool) -> None:
+        """Queue for a slot; on success the slot has been taken on our behalf."""
+        start_tag, finish_tag = self._charge(lane, tenant, processor_name)
+        waiter = _Waiter(
+            processor_name, lane, tenant, start_tag, finish_tag, next(self._seq),
+            asyncio.get_running_loop().create_future()
+        )
+        self._waiters.append(waiter)
+        self._update_depth(lane, processor_name)
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout if bounded else None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted as we gave up; hand it back
+                self._release(processor_name, lane)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._update_depth(lane, processor_name)
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.ADMISSION_REJECTED.labels(processor_name, "timeout").inc()
+                raise AdmissionRejected(
+                    503, "Timed out waiting for a conversion slot",
+                    self._retry_after(lane, processor_name)
+                )
+            raise
+
+    def _charge(self, lane: Lane, tenant: str, processor_name: str) -> Tuple[float, float]:
+        """Advance a tenant's virtual finish time by the cost of one conversion."""
+        weight = self.tenant_weights.get(tenant, 1.0) or 1.0
+        cost = self._avg_seconds.get(processor_name, DEFAULT_CONVERSION_SECONDS)
+        start_tag = max(self._virtual_time[lane], self._tenant_finish[lane].get(tenant, 0.0))
+        finish_tag = start_tag + cost / weight
+        self._tenant_finish[lane][tenant] = finish_tag
+        return start_tag, finish_tag
+
+    def _limit(self, processor_name: str) -> int:
+        return self.processor_limits.get(processor_name) or self.max_concurrent
+
+    def _can_run(self, processor_name: str, lane: Lane) -> bool:
+        if self._running >= self.max_concurrent:
+            return False
+        if self._running_by_processor[processor_name] >= self._limit(processor_name):
+            return False
+        if lane == Lane.BULK:
+            return self._running_by_lane[Lane.BULK] < self.max_concurrent - self.interactive_reserved
+        return True
+
+    def _take(self, processor_name: str, lane: Lane) -> None:
+        self._running += 1
+        self._running_by_processor[processor_name] += 1
+        self._running_by_lane[lane] += 1
+
+    def _release(self, processor_name: str, lane: Lane, seconds: Optional[float] = None) -> None:
+        self._running -= 1
+        self._running_by_processor[processor_name] -= 1
+        self._running_by_lane[lane] -= 1
+        if seconds is not None:
+            previous = self._avg_seconds.get(processor_name, seconds)
+            self._avg_seconds[processor_name] = (
+                (1 - DURATION_SMOOTHING) * previous + DURATION_SMOOTHING * seconds
+            )
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant freed slots to waiters in lane priority, then fair-queuing order."""
+        while self._running < self.max_concurrent:
+            # Bulk goes first only while it is below its guaranteed share
+            bulk_first = self._running_by_lane[Lane.BULK] < self.bulk_min_slots
+            eligible = [
+                waiter for waiter in self._waiters
+                if not waiter.future.done() and self._can_run(waiter.processor_name, waiter.lane)
+            ]
+            if not eligible:
+                break
+            waiter = min(eligible, key=lambda w: (
+                (w.lane == Lane.BULK) != bulk_first, w.finish_tag, w.seq
+            ))
+            self._waiters.remove(waiter)
+            self._take(waiter.processor_name, waiter.lane)
+            self._virtual_time[waiter.lane] = max(self._virtual_time[waiter.lane], waiter.start_tag)
+            waiter.future.set_result(None)
+            self._update_depth(waiter.lane, waiter.processor_name)
+
+        # Forget tenants that have fallen behind the virtual clock
+        for lane, finish in self._tenant_finish.items():
+            for tenant in [t for t, tag in finish.items() if tag <= self._virtual_time[lane]]:
+                del finish[tenant]
+
+    def _depth(self, lane: Lane, processor_name: Optional[str] = None) -> int:
+        return sum(
+            1 for waiter in self._waiters
+            if waiter.lane == lane
+            and (processor_name is None or waiter.processor_name == processor_name)
+        )
+
+    def _update_depth(self, lane: Lane, processor_name: str) -> None:
+        metrics.CONVERSION_QUEUE_DEPTH.labels(processor_name, lane.value).set(
+            self._depth(lane, processor_name)
+        )
+
+    def _retry_after(self, lane: Lane, processor_name: Optional[str]) -> int:
+        """Seconds until the queue ahead has likely drained."""
+        avg = self._avg_seconds.get(processor_name, DEFAULT_CONVERSION_SECONDS)
+        limit = min(self.max_concurrent, self._limit(processor_name)) if processor_name else self.max_concurrent
+        return max(1, math.ceil(avg * (self._depth(lane) + 1) / limit))
+
+class AdmissionRejected(Exception):
+    """Raised when a conversion cannot be admitted; maps to an HTTP error."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+# Create a singleton instance
+admission = AdmissionController()
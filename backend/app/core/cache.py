@@ -0,0 +1,228 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import threading
+import time
+
+import redis
+
+from .config import settings
+
+# Cached value: (stored bytes, compression encoding or None)
+CacheEntry = Tuple[bytes, Optional[str]]
+
+class LRUCache:
+    """Thread-safe in-process LRU bounded by the total size of cached bytes."""
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[CacheEntry, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            value, stored_at = item
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CacheEntry) -> None:
+        size = len(value[0])
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, time.monotonic())
+            self.size += size
+
+            # Evict least recently used entries until we fit
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        (content, _), _ = self._entries.pop(key)
+        self.size -= len(content)
+
+class ContentCache:
+    """
+    Read-through cache for stored artifacts.
+
+    Lookups go to an in-process LRU first, then to Redis. Entries are keyed
+    by object name and hold the bytes exactly as stored, so compressed
+    artifacts stay compressed in both tiers. Invalidations are published so
+    every worker drops its local copy, see start(). Redis errors are counted
+    and otherwise ignored: the cache must never fail a read.
+    """
+
+    REDIS_PREFIX = "content:"
+    INVALIDATION_CHANNEL = "content-invalidations"
+
+    def __init__(self):
+        self.enabled = settings.CONTENT_CACHE_ENABLED
+        self.max_item_bytes = settings.CONTENT_CACHE_MAX_ITEM_BYTES
+        # Local entries expire so other workers' re-conversions are picked up
+        self.local = LRUCache(
+            settings.CONTENT_CACHE_MAX_BYTES,
+            ttl=settings.CONTENT_CACHE_LOCAL_TTL
+        )
+        self.redis_ttl = settings.CONTENT_CACHE_REDIS_TTL
+        self._redis: Optional[redis.Redis] = None
+        self._counters: Dict[str, int] = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "redis_errors": 0,
+        }
+        self._counter_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    @property
+    def redis(self) -> Optional[redis.Redis]:
+        """Redis client for the shared tier, created on first use."""
+        if not settings.CONTENT_CACHE_REDIS_ENABLED:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB
+            )
+        return self._redis
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Look up an entry, promoting Redis hits into the local tier."""
+        if not self.enabled:
+            return None
+
+        value = self.local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+
+        value = self._redis_get(key)
+        if value is not None:
+            self._count("redis_hits")
+            self.local.set(key, value)
+            return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: CacheEntry) -> None:
+        """Store an entry in both tiers, skipping oversized values."""
+        if not self.enabled or len(value[0]) > self.max_item_bytes:
+            return
+
+        self.local.set(key, value)
+        self._redis_set(key, value)
+
+    def invalidate(self, key: str) -> None:
+        """Drop an entry from both tiers."""
+        if not self.enabled:
+            return
+
+        self.local.delete(key)
+        client = self.redis
+        if client is not None:
+            try:
+                client.delete(self.REDIS_PREFIX + key)
+                # Other workers' local tiers would serve the old bytes until their TTL
+                client.publish(self.INVALIDATION_CHANNEL, key)
+            except redis.RedisError:
+                self._count("redis_errors")
+
+    def start(self) -> None:
+        """Drop local entries as other workers invalidate them, in a background thread."""
+        client = self.redis
+        if not self.enabled or client is None or self._listener is not None:
+            return
+
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.INVALIDATION_CHANNEL: self._on_invalidation})
+        self._listener = pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=self._on_listener_error
+        )
+
+    def stop(self) -> None:
+        """Stop listening for invalidations."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and local tier usage."""
+        with self._counter_lock:
+            stats = dict(self._counters)
+        stats.update({
+            "local_entries": len(self.local),
+            "local_bytes": self.local.size,
+            "local_evictions": self.local.evictions,
+        })
+        return stats
+
+    def _redis_get(self, key: str) -> Optional[CacheEntry]:
+        client = self.redis
+        if client is None:
+            return None
+
+        try:
+            entry = client.hgetall(self.REDIS_PREFIX + key)
+        except redis.RedisError:
+            self._count("redis_errors")
+            return None
+
+        if not entry or b"body" not in entry:
+            return None
+
+        encoding = entry.get(b"encoding") or None
+        return entry[b"body"], encoding.decode() if encoding else None
+
+    def _redis_set(self, key: str, value: CacheEntry) -> None:
+        client = self.redis
+        if client is None:
+            return
+
+        content, encoding = value
+        redis_key = self.REDIS_PREFIX + key
+        try:
+            pipe = client.pipeline()
+            pipe.delete(redis_key)
+            pipe.hset(redis_key, mapping={"body": content, "encoding": encoding or ""})
+            pipe.expire(redis_key, self.redis_ttl)
+            pipe.execute()
+        except redis.RedisError:
+            self._count("redis_errors")
+
+    def _on_invalidation(self, message: Dict) -> None:
+        self.local.delete(message["data"].decode())
+
+    def _on_listener_error(self, error: Exception, pubsub, thread) -> None:
+        # Keep listening; the subscription is restored on the next read
+        self._count("redis_errors")
+        time.sleep(1)
+
+    def _count(self, counter: str) -> None:
+        with self._counter_lock:
+            self._counters[counter] += 1
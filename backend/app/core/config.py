@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl
 
@@ -16,6 +16,11 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     DATABASE_URI: str = None
+    ASYNC_DATABASE_URI: str = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a pooled connection
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection, 0 for pgbouncer
     
     # MinIO
     MINIO_ROOT_USER: str
@@ -23,12 +28,36 @@ class Settings(BaseSettings):
     MINIO_HOST: str = "minio"
     MINIO_PORT: int = 9000
     MINIO_BUCKET: str = "files"
+    STORAGE_MAX_WORKERS: int = 8  # Thread pool size for blocking MinIO calls
+    STORAGE_COMPRESSION: str = "gzip"  # "none", "gzip" or "zstd"
+    STORAGE_COMPRESSION_LEVEL: Optional[int] = None  # Codec default if unset
+    STORAGE_COMPRESSION_MIN_SIZE: int = 1024  # Store smaller artifacts uncompressed
+    STORAGE_SPOOL_MAX_SIZE: int = 8 * 1024 * 1024  # Rendered artifacts spill to disk past this size
+    JSON_BACKEND: str = "auto"  # "orjson", "stdlib" or "auto" (orjson when installed)
     
     # Redis
     REDIS_HOST: str
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     
+    # Content cache (in-process LRU in front of Redis in front of MinIO)
+    CONTENT_CACHE_ENABLED: bool = True
+    CONTENT_CACHE_REDIS_ENABLED: bool = True
+    CONTENT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256MB per worker
+    CONTENT_CACHE_MAX_ITEM_BYTES: int = 16 * 1024 * 1024  # 16MB
+    CONTENT_CACHE_LOCAL_TTL: int = 60  # Seconds, bounds staleness across workers
+    CONTENT_CACHE_REDIS_TTL: int = 60 * 60  # Seconds
+    
+    # Conversion result cache (Redis)
+    CONVERSION_CACHE_ENABLED: bool = True
+    CONVERSION_CACHE_TTL: int = 7 * 24 * 60 * 60  # Seconds
+    
+    # Status events (Redis pub/sub)
+    EVENTS_CHANNEL_PREFIX: str = "file-events"
+    EVENTS_QUEUE_SIZE: int = 100  # Buffered events per connected client
+    EVENTS_PROGRESS_INTERVAL: float = 0.5  # Min seconds between progress events
+    EVENTS_KEEPALIVE: int = 15  # Seconds between SSE keepalive comments
+    
     # File Processing
     UPLOAD_FOLDER: str = "uploads"
     MAX_CONTENT_LENGTH: int = 100 * 1024 * 1024  # 100MB
@@ -42,6 +71,63 @@ class Settings(BaseSettings):
         # Code files will be detected by their extension
     }
     
+    # Per-job resource limits; extraction runs in a child process, 0 disables a limit
+    JOB_LIMITS_ENABLED: bool = True
+    JOB_MAX_MEMORY_MB: int = 1024  # Peak RSS of the extraction process
+    JOB_MAX_CPU_SECONDS: int = 300
+    JOB_MAX_WALL_SECONDS: int = 600
+    JOB_MAX_PAGES: int = 5000
+    JOB_MAX_ROWS: int = 1_000_000
+    JOB_MAX_CELLS: int = 20_000_000
+    
+    # Admission control for conversions in each worker process
+    CONVERSION_MAX_CONCURRENT: int = 8
+    CONVERSION_PROCESSOR_LIMITS: Dict[str, int] = {  # By processor class name
+        "PDFProcessor": 2,
+        "XlsxProcessor": 2,
+        "DocxProcessor": 4,
+    }
+    CONVERSION_QUEUE_SIZE: int = 32  # Waiting uploads before new ones get 429
+    CONVERSION_QUEUE_TIMEOUT: int = 30  # Seconds an upload waits for a slot before 503
+    CONVERSION_INTERACTIVE_MAX_BYTES: int = 10 * 1024 * 1024  # Larger uploads use the bulk lane
+    CONVERSION_INTERACTIVE_RESERVED: int = 2  # Slots bulk work may never take
+    CONVERSION_BULK_MIN_SLOTS: int = 2  # Slots bulk work gets ahead of interactive work
+    CONVERSION_TENANT_WEIGHTS: Dict[str, float] = {}  # Fair-share weight by tenant, default 1
+    TENANT_HEADER: str = "X-Tenant-ID"  # Tenant key for fair queuing; falls back to client IP
+    
+    # Job leases; workers renew leases on their files so others can recover them
+    WORKER_ID: Optional[str] = None  # Lease owner name, unique per process by default
+    LEASE_TTL: int = 60  # Seconds a lease lasts without a heartbeat
+    LEASE_HEARTBEAT_INTERVAL: int = 15
+    LEASE_REAPER_INTERVAL: int = 30
+    LEASE_REAPER_BATCH: int = 100  # Lapsed leases recovered per reaper round
+    JOB_MAX_RETRIES: int = 2  # Times a file is re-converted after its worker died
+    UPLOAD_TEMP_MAX_AGE: int = 60 * 60  # Seconds before an untouched temp file is removed
+    
+    # Previews: large interactive uploads first convert a few pages/rows,
+    # return, and finish the full conversion in the background
+    PREVIEW_ENABLED: bool = True
+    PREVIEW_MIN_BYTES: int = 2 * 1024 * 1024  # Smaller uploads are converted in full directly
+    PREVIEW_PAGES: int = 5
+    PREVIEW_ROWS: int = 200
+    PREVIEW_PARAGRAPHS: int = 50
+    PREVIEW_TIMEOUT: float = 3.0  # Latency budget; the preview is skipped if it runs over
+    
+    # Uploads sending this value in X-Profile-Token are profiled; unset disables profiling
+    PROFILING_TOKEN: Optional[str] = None
+    
+    # Resumable uploads; parts go straight to a MinIO multipart upload
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024  # Suggested part size, at least 5MB
+    UPLOAD_MAX_PART_SIZE: int = 64 * 1024 * 1024
+    UPLOAD_SESSION_TTL: int = 24 * 60 * 60  # Seconds an idle upload can be resumed
+    
+    # Batch uploads
+    BATCH_MAX_FILES: int = 10_000  # Files per batch, counting archive members
+    BATCH_CONCURRENCY: int = 4  # Conversions running at once per batch
+    
+    # Extensions whose processors are imported at startup instead of on first use
+    PRELOAD_PROCESSORS: List[str] = []
+    
     # Chunking Configuration
     DEFAULT_CHUNK_SIZE: int = 1000
     DEFAULT_CHUNK_OVERLAP: int = 200
@@ -55,5 +141,9 @@ class Settings(BaseSettings):
             f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
             f"@{self.POSTGRES_HOST}/{self.POSTGRES_DB}"
         )
+        self.ASYNC_DATABASE_URI = (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}/{self.POSTGRES_DB}"
+        )
 
 settings = Settings()
@@ -0,0 +1,168 @@
+from typing import Dict, Any, Optional, Type
+import hashlib
+import json
+
+import redis.asyncio as aioredis
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .config import settings
+from ..models.file_model import File, FileStatus
+from ..processors.base_processor import BaseProcessor
+
+# Row attributes reused when a conversion is served from the cache
+ARTIFACT_FIELDS = (
+    "markdown_path",
+    "json_path",
+    "metadata_path",
+    "intermediate_path",
+    "metadata",
+    "page_count",
+    "word_count",
+    "chunk_count",
+)
+
+class ConversionCache:
+    """
+    Memoizes conversions by input content, processor and options.
+
+    Keys combine the content hash, processor class, processor VERSION and
+    the conversion options, so bumping one processor's VERSION only misses
+    for that format. Values reference the stored artifacts of an earlier
+    conversion. Entries expire after CONVERSION_CACHE_TTL; configure Redis
+    with an LRU maxmemory-policy to bound memory.
+    """
+
+    PREFIX = "conversion:"
+
+    def __init__(self):
+        self.enabled = settings.CONVERSION_CACHE_ENABLED
+        self.ttl = settings.CONVERSION_CACHE_TTL
+        self._redis: Optional[aioredis.Redis] = None
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        """Redis client, created on first use."""
+        if self._redis is None:
+            self._redis = aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB
+            )
+        return self._redis
+
+    @staticmethod
+    def make_key(
+        content_hash: str,
+        processor_class: Type[BaseProcessor],
+        options: Dict[str, Any]
+    ) -> str:
+        """
+        Build the cache key for a conversion.
+
+        Args:
+            content_hash: SHA-256 hex digest of the input file
+            processor_class: Processor used for the conversion
+            options: Conversion options, e.g. chunk size and overlap
+
+        Returns:
+            The cache key
+        """
+        options_hash = hashlib.sha256(
+            json.dumps(options, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        return (
+            f"{content_hash}:{processor_class.__name__}:"
+            f"{processor_class.VERSION}:{options_hash}"
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up the artifact references for a conversion key."""
+        if not self.enabled:
+            return None
+        try:
+            value = await self.redis.get(self.PREFIX + key)
+        except aioredis.RedisError as e:
+            print(f"Error reading conversion cache: {e}")
+            return None
+        return json.loads(value) if value else None
+
+    async def set(self, key: str, file_record: File) -> None:
+        """Remember the artifacts of a completed conversion."""
+        if not self.enabled:
+            return
+        value = {field: getattr(file_record, field) for field in ARTIFACT_FIELDS}
+        value["file_id"] = str(file_record.id)
+        try:
+            await self.redis.set(self.PREFIX + key, json.dumps(value, default=str), ex=self.ttl)
+        except aioredis.RedisError as e:
+            print(f"Error writing conversion cache: {e}")
+
+    async def invalidate(self, key: str) -> None:
+        """Drop a conversion key, e.g. when its artifacts are gone."""
+        try:
+            await self.redis.delete(self.PREFIX + key)
+        except aioredis.RedisError as e:
+            print(f"Error invalidating conversion cache: {e}")
+
+    async def release(self, db: AsyncSession, file_record: File) -> None:
+        """
+        Stop the cache from referencing a file that is being deleted.
+
+        Entries that reference another file with the same content are left
+        alone; an entry referencing this file moves to a completed
+        duplicate's artifacts if there is one, and is dropped otherwise.
+
+        Args:
+            db: Database session
+            file_record: The file being deleted
+        """
+        key = file_record.conversion_key
+        cached = await self.get(key) if key else None
+        if cached is None or cached.get("file_id") != str(file_record.id):
+            return
+
+        duplicate = (await db.exec(
+            select(File).where(
+                File.conversion_key == key,
+                File.status == FileStatus.COMPLETED,
+                File.id != file_record.id
+            ).limit(1)
+        )).first()
+        if duplicate is not None:
+            await self.set(key, duplicate)
+        else:
+            await self.invalidate(key)
+
+    async def warm(self, db: AsyncSession, batch_size: int = 1000) -> int:
+        """
+        Populate the cache from completed files rows.
+
+        Args:
+            db: Database session
+            batch_size: Rows fetched per query
+
+        Returns:
+            Number of entries written
+        """
+        written = 0
+        last_id = None
+        while True:
+            statement = select(File).where(
+                File.status == FileStatus.COMPLETED,
+                File.conversion_key.is_not(None)
+            )
+            if last_id is not None:
+                statement = statement.where(File.id > last_id)
+            statement = statement.order_by(File.id).limit(batch_size)
+            rows = (await db.exec(statement)).all()
+            if not rows:
+                return written
+
+            for file_record in rows:
+                await self.set(file_record.conversion_key, file_record)
+                written += 1
+            last_id = rows[-1].id
+
+# Create a singleton instance
+conversion_cache = ConversionCache()
@@ -1,13 +1,33 @@
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import contextmanager, asynccontextmanager
+from typing import Generator, AsyncGenerator
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlmodel import Session, create_engine, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .config import settings
 
+# Synchronous engine, used for schema creation and maintenance scripts
 engine = create_engine(
     settings.DATABASE_URI,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT
+)
+
+# Async engine, used by request handlers and services
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URI,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+)
+
+async_session_factory = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
 )
 
 @contextmanager
@@ -22,11 +42,23 @@ def get_session() -> Generator[Session, None, None]:
     finally:
         session.close()
 
+@asynccontextmanager
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    session = async_session_factory()
+    try:
+        yield session
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        raise e
+    finally:
+        await session.close()
+
 def init_db() -> None:
     """Initialize the database, creating all tables."""
     SQLModel.metadata.create_all(engine)
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for FastAPI endpoints that need a database session."""
-    with get_session() as session:
+    async with get_async_session() as session:
         yield session
@@ -0,0 +1,211 @@
+from typing import Dict, Any, AsyncIterator, Optional, Set
+import asyncio
+
+import redis.asyncio as aioredis
+
+from .config import settings
+from ..utils import jsoncodec
+
+# How long opening a subscription waits for the Redis listener to be subscribed
+LISTENER_READY_TIMEOUT = 5
+
+# File statuses after which no further events are sent
+TERMINAL_STATUSES = ("completed", "failed")
+
+class Subscription:
+    """
+    A registered interest in one file's events, or every file's.
+
+    Events are queued from the moment the subscription is opened, so state
+    read after opening it cannot miss a transition published in between.
+    """
+
+    def __init__(self, bus: "EventBus", file_id: Optional[str], queue: asyncio.Queue):
+        self.bus = bus
+        self.file_id = file_id
+        self.queue = queue
+
+    async def events(self, keepalive: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield queued and future events until the subscription is closed.
+
+        Args:
+            keepalive: If set, yield None after this many idle seconds
+
+        Yields:
+            Event payloads as dicts, or None on keepalive
+        """
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(self.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self.close()
+
+    async def follow(
+        self,
+        initial: Optional[Dict[str, Any]] = None,
+        keepalive: Optional[float] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield a file's current status, then its events until it finishes.
+
+        A transition published between opening the subscription and reading
+        the initial status is queued as well, so status events that repeat
+        the last status yielded are dropped.
+
+        Args:
+            initial: Status event read after opening the subscription, if any
+            keepalive: If set, yield None after this many idle seconds
+
+        Yields:
+            Event payloads as dicts, or None on keepalive
+        """
+        watching_file = self.file_id is not None
+        last_status = None
+        try:
+            if initial is not None:
+                yield initial
+                if watching_file and initial["status"] in TERMINAL_STATUSES:
+                    return
+                last_status = (initial["status"], initial.get("error_message"))
+
+            async for event in self.events(keepalive):
+                if event is not None and watching_file and event["type"] == "status":
+                    status = (event["status"], event.get("error_message"))
+                    if status == last_status:
+                        continue
+                    last_status = status
+
+                yield event
+                if watching_file and event is not None and event["type"] == "status" \
+                        and event["status"] in TERMINAL_STATUSES:
+                    break
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop queueing events; safe to call more than once."""
+        subscribers = self.bus._subscribers.get(self.file_id)
+        if subscribers is not None:
+            subscribers.discard(self.queue)
+            if not subscribers:
+                del self.bus._subscribers[self.file_id]
+
+class EventBus:
+    """
+    Publishes file status and progress events over Redis pub/sub.
+
+    Each process holds a single pattern subscription and fans events out to
+    in-memory queues, so any number of watching clients costs one Redis
+    connection per worker and no database queries.
+    """
+
+    def __init__(self):
+        self.prefix = settings.EVENTS_CHANNEL_PREFIX
+        self._redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+        # Set while the listener holds its Redis subscription
+        self._ready = asyncio.Event()
+        # file_id -> subscriber queues; None collects subscribers to all files
+        self._subscribers: Dict[Optional[str], Set[asyncio.Queue]] = {}
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        """Redis client, created on first use."""
+        if self._redis is None:
+            self._redis = aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB
+            )
+        return self._redis
+
+    async def publish(self, file_id: str, event: Dict[str, Any]) -> None:
+        """
+        Publish an event for a file.
+
+        Publishing is best effort: a Redis outage must not fail a conversion.
+
+        Args:
+            file_id: ID of the file the event is about
+            event: Event payload, e.g. {"type": "status", "status": "completed"}
+        """
+        payload = jsoncodec.dumps({"file_id": file_id, **event})
+        try:
+            await self.redis.publish(f"{self.prefix}:{file_id}", payload)
+        except aioredis.RedisError as e:
+            print(f"Error publishing event for {file_id}: {e}")
+
+    async def open(self, file_id: Optional[str] = None) -> Subscription:
+        """
+        Start queueing events for one file, or for every file if file_id is None.
+
+        Returns once the listener is subscribed in Redis, or after a short
+        timeout if Redis is unavailable, so events published after this call
+        are not lost. The caller must close the subscription, or exhaust
+        its events().
+
+        Args:
+            file_id: ID of the file to watch, None for all files
+
+        Returns:
+            The open subscription
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self._subscribers.setdefault(file_id, set()).add(queue)
+        subscription = Subscription(self, file_id, queue)
+        self._ensure_listener()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=LISTENER_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Best effort, as with publishing: events arrive once Redis is back
+            pass
+        except BaseException:
+            subscription.close()
+            raise
+        return subscription
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Receive events from Redis and dispatch them to local subscribers."""
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.prefix}:*")
+                self._ready.set()
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    try:
+                        event = jsoncodec.loads(message["data"])
+                    except ValueError as e:
+                        # A malformed message must not stop delivery to every client
+                        print(f"Skipping malformed event: {e}")
+                        continue
+                    if isinstance(event, dict):
+                        self._dispatch(event)
+            except aioredis.RedisError as e:
+                print(f"Event listener error, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                self._ready.clear()
+                await pubsub.reset()
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        for key in (event.get("file_id"), None):
+            for queue in list(self._subscribers.get(key, ())):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Slow consumer: drop the oldest event rather than block
+                    queue.get_nowait()
+                    queue.put_nowait(event)
+
+# Create a singleton instance
+events = EventBus()
@@ -1,138 +1,1034 @@
-from typing import Dict, Any, Tuple, Optional
-from pathlib import Path
+from typing import BinaryIO, Coroutine, Dict, Any, List, NamedTuple, Set, Tuple, Optional
+from pathlib import Path, PurePosixPath
+import asyncio
+import hashlib
+import mimetypes
 import os
+import time
 import uuid
 from datetime import datetime
 
-from sqlmodel import Session
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import UploadFile
 
-from ..models.file_model import File, FileStatus
+from ..models.file_model import File, FileStatus, ContentStage
 from ..processors.factory import ProcessorFactory, UnsupportedFileType
+from ..processors.base_processor import BaseProcessor, ProcessingError, ResourceLimitExceeded
+from ..utils.intermediate import pack_document, unpack_document, IntermediateFormatError
+from ..utils.writers import RenderedDocument
+from ..utils.metadata import summarize_metadata
+from ..utils.profiling import start_profiler, dump_profile, merge_profiles
+from ..utils.archive import is_archive, list_members, iter_members, ArchiveError
+from ..utils.sniffing import Sniffed, sniff
 from .storage import storage, StorageError
-from .database import get_session
+from .events import events
+from .conversion_cache import conversion_cache
+from .limits import job_limiter, Usage
+from .admission import admission, Lane
+from .leases import job_leases
+from . import metrics
+from .config import settings
+from .database import get_async_session
+
+# Bytes copied at a time when staging uploads and archive members
+COPY_CHUNK_SIZE = 1024 * 1024
+
+class StagedUpload(NamedTuple):
+    """An upload copied into the upload folder, with the rows it expands to."""
+    path: Path
+    records: List[File]
+    archive: bool
 
 class FileService:
     """Service for handling file processing and storage operations."""
     
+    # Artifacts copied when a conversion is served from the cache
+    CACHED_ARTIFACTS = ("markdown", "json", "metadata", "intermediate")
+    
     def __init__(self, upload_folder: str = "uploads"):
         self.upload_folder = Path(upload_folder)
         self.upload_folder.mkdir(exist_ok=True)
+        # Conversions finishing after a preview was returned
+        self._background: Set[asyncio.Task] = set()
 
-    async def process_file(self, file: UploadFile, db: Session) -> File:
+    async def process_file(
+        self,
+        file: UploadFile,
+        db: AsyncSession,
+        profile: bool = False,
+        tenant: Optional[str] = None
+    ) -> File:
         """
         Process an uploaded file, converting it to markdown and JSON.
         
+        Identical inputs converted earlier with the same processor version
+        and options are served from the conversion cache without extraction.
+        
+        Large files whose processor supports it get a preview of the first
+        pages or rows first; the record is then returned still PROCESSING,
+        with content_stage "preview", and the full conversion replaces the
+        preview in the background.
+        
         Args:
             file: The uploaded file
             db: Database session
+            profile: Profile extraction and rendering, storing a pstats
+                artifact; always converts, bypassing the conversion cache
+            tenant: Client or tenant key for fair scheduling
             
         Returns:
             File model instance with processing results
-        """
-        try:
-            # Create temporary file path
-            temp_path = self.upload_folder / f"{uuid.uuid4()}_{file.filename}"
-            
-            # Save uploaded file
-            with open(temp_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            
-            # Create file record
-            file_record = File(
-                filename=file.filename,
-                original_type=file.content_type or "",
-                file_size=os.path.getsize(temp_path),
-                status=FileStatus.PROCESSING
-            )
-            db.add(file_record)
-            db.commit()
             
+        Raises:
+            AdmissionRejected: If no conversion slot became available
+            FileProcessingError: If the file could not be processed
+        """
+        # Sniffed once, so admission and the factory agree on the processor
+        sniffed = sniff(file.file)
+        
+        # Waits for a conversion slot, or raises AdmissionRejected
+        async with admission.slot(
+            admission.processor_name(file.filename, sniffed),
+            lane=admission.lane_for_upload(file.size),
+            tenant=tenant
+        ):
             try:
-                # Get processor for file type
-                processor = ProcessorFactory.create_processor(temp_path, file_record)
+                # Create temporary file path
+                temp_path = self._temp_path(file.filename)
                 
-                # Process file
-                markdown, json_content, metadata = await processor.process()
+                # Save uploaded file
+                upload_start = time.perf_counter()
+                with open(temp_path, "wb") as f:
+                    content = await file.read()
+                    f.write(content)
+                upload_seconds = time.perf_counter() - upload_start
                 
-                # Save results to storage
-                file_id = str(file_record.id)
+                # Create file record
+                file_record = File(
+                    filename=file.filename,
+                    original_type=file.content_type or "",
+                    file_size=os.path.getsize(temp_path),
+                    content_hash=hashlib.sha256(content).hexdigest(),
+                    status=FileStatus.PROCESSING
+                )
+                job_leases.claim(file_record)
+                db.add(file_record)
+                await db.commit()
+                await self._publish_status(file_record)
                 
-                # Save original file
-                orig_path = f"{file_id}/original/{file.filename}"
-                storage.save_file(temp_path, orig_path, file.content_type)
+                if not profile and await self._store_preview(file_record, temp_path, db, sniffed):
+                    self._spawn(self._convert_after_preview(
+                        file_record.id, temp_path, file.content_type, upload_seconds,
+                        admission.lane_for_upload(file.size), tenant, sniffed
+                    ))
+                    return file_record
                 
-                # Save markdown
-                md_path = f"{file_id}/markdown/{Path(file.filename).stem}.md"
-                storage.save_content(markdown, md_path, "text/markdown")
+                await self._run_conversion(
+                    file_record, temp_path, file.content_type, db, profile, upload_seconds,
+                    sniffed=sniffed
+                )
                 
-                # Save JSON
-                json_path = f"{file_id}/json/{Path(file.filename).stem}.json"
-                storage.save_json(json_content, json_path)
+                return file_record
                 
-                # Update file record
-                file_record.status = FileStatus.COMPLETED
-                file_record.metadata = metadata
-                file_record.markdown_path = md_path
-                file_record.json_path = json_path
-                file_record.page_count = metadata.get("page_count")
-                file_record.word_count = len(markdown.split())
-                file_record.chunk_count = len(metadata.get("positions", []))
+            except Exception as e:
+                raise FileProcessingError(f"Error processing file: {str(e)}")
+
+    async def _store_preview(
+        self,
+        file_record: File,
+        temp_path: Path,
+        db: AsyncSession,
+        sniffed: Optional[Sniffed] = None
+    ) -> bool:
+        """
+        Convert and store the first pages/rows of a large upload.
+        
+        Returns:
+            Whether a preview was stored; False if the file is small, its
+            processor cannot preview, a full conversion is cached, or the
+            preview ran over PREVIEW_TIMEOUT or failed
+        """
+        if not settings.PREVIEW_ENABLED or file_record.file_size < settings.PREVIEW_MIN_BYTES:
+            return False
+        try:
+            processor = ProcessorFactory.create_processor(temp_path, file_record, sniffed)
+        except UnsupportedFileType:
+            return False
+        if not processor.SUPPORTS_PREVIEW:
+            return False
+        
+        name = type(processor).__name__
+        key = conversion_cache.make_key(
+            file_record.content_hash, type(processor), self._conversion_options()
+        )
+        if await conversion_cache.get(key):
+            return False
+        
+        processor.preview_limits = {
+            "pages": settings.PREVIEW_PAGES,
+            "rows": settings.PREVIEW_ROWS,
+            "paragraphs": settings.PREVIEW_PARAGRAPHS,
+        }
+        start = time.perf_counter()
+        paths = self._artifact_paths(file_record)
+        try:
+            document, _, _ = await asyncio.wait_for(
+                job_limiter.extract(processor), settings.PREVIEW_TIMEOUT
+            )
+            with processor.render(document) as rendered:
+                await storage.save_all(
+                    storage.save_content_async(
+                        rendered.markdown, paths["preview_markdown"], "text/markdown"
+                    ),
+                    storage.save_content_async(
+                        rendered.json, paths["preview_json"], "application/json"
+                    )
+                )
+        except (asyncio.TimeoutError, ProcessingError, StorageError, IntermediateFormatError) as e:
+            # The full conversion reports any real problem with the file
+            print(f"Skipping preview of {file_record.id}: {e!r}")
+            metrics.PREVIEW_SECONDS.labels(name, "skipped").observe(time.perf_counter() - start)
+            return False
+        
+        metrics.PREVIEW_SECONDS.labels(name, "stored").observe(time.perf_counter() - start)
+        file_record.preview_markdown_path = paths["preview_markdown"]
+        file_record.preview_json_path = paths["preview_json"]
+        file_record.content_stage = ContentStage.PREVIEW
+        await db.commit()
+        await self._publish_status(file_record)
+        return True
+
+    async def _convert_after_preview(
+        self,
+        file_id: uuid.UUID,
+        temp_path: Path,
+        content_type: Optional[str],
+        upload_seconds: float,
+        lane: Lane,
+        tenant: Optional[str],
+        sniffed: Optional[Sniffed] = None
+    ) -> None:
+        """Run the full conversion of a previewed upload in its own session."""
+        async with get_async_session() as db:
+            file_record = await db.get(File, file_id)
+            if file_record is None:
+                # Deleted while the preview was being looked at
+                temp_path.unlink(missing_ok=True)
+                return
+            try:
+                async with admission.slot(
+                    admission.processor_name(file_record.filename, sniffed),
+                    lane=lane, tenant=tenant, bounded=False
+                ):
+                    await self._run_conversion(
+                        file_record, temp_path, content_type, db,
+                        upload_seconds=upload_seconds, sniffed=sniffed
+                    )
+            except Exception as e:
+                print(f"Error converting previewed file {file_id}: {e}")
+
+    def _spawn(self, coroutine: Coroutine) -> None:
+        """Run a coroutine in the background, keeping a reference until it ends."""
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def create_batch(
+        self,
+        files: List[UploadFile],
+        db: AsyncSession
+    ) -> Tuple[uuid.UUID, List[StagedUpload]]:
+        """
+        Register a batch of uploads, expanding zip and tar archives.
+        
+        Each upload is copied once into the upload folder; archive members
+        are only listed here and extracted later by process_batch. The File
+        rows for every file in the batch are created in a single insert.
+        
+        Args:
+            files: Uploaded files and/or archives
+            db: Database session
+            
+        Returns:
+            Tuple of (batch ID, staged uploads to pass to process_batch)
+        """
+        batch_id = uuid.uuid4()
+        loop = asyncio.get_running_loop()
+        staged: List[StagedUpload] = []
+        records: List[File] = []
+        try:
+            for upload in files:
+                filename = Path(upload.filename or "upload").name
+                path = self._temp_path(filename)
+                size, content_hash = await loop.run_in_executor(
+                    None, self._stage_stream, upload.file, path, None
+                )
                 
-            except (UnsupportedFileType, StorageError) as e:
-                file_record.status = FileStatus.FAILED
-                file_record.error_message = str(e)
-                raise
+                if is_archive(filename):
+                    staged.append(StagedUpload(path, [], True))
+                    members = await loop.run_in_executor(
+                        None, list_members, path, settings.BATCH_MAX_FILES - len(records)
+                    )
+                    for member in members:
+                        name = PurePosixPath(member.name).name
+                        staged[-1].records.append(File(
+                            filename=name,
+                            original_type=mimetypes.guess_type(name)[0] or "",
+                            file_size=member.size,
+                            batch_id=batch_id
+                        ))
+                else:
+                    staged.append(StagedUpload(path, [File(
+                        filename=filename,
+                        original_type=upload.content_type or "",
+                        file_size=size,
+                        content_hash=content_hash,
+                        batch_id=batch_id
+                    )], False))
                 
+                records.extend(staged[-1].records)
+                if len(records) > settings.BATCH_MAX_FILES:
+                    raise ArchiveError(
+                        f"Batch has more than {settings.BATCH_MAX_FILES} files"
+                    )
+        except (ArchiveError, OSError) as e:
+            for upload in staged:
+                upload.path.unlink(missing_ok=True)
+            raise FileProcessingError(f"Error staging batch: {str(e)}")
+        
+        for record in records:
+            job_leases.claim(record)
+        db.add_all(records)
+        await db.commit()
+        return batch_id, staged
+
+    async def process_batch(
+        self,
+        batch_id: uuid.UUID,
+        staged: List[StagedUpload],
+        tenant: Optional[str] = None
+    ) -> None:
+        """
+        Convert every file of a batch, BATCH_CONCURRENCY at a time.
+        
+        Archives are read sequentially and each member is extracted only
+        when a worker is ready for it, so at most a handful of members are
+        on disk at once.
+        
+        Args:
+            batch_id: ID returned by create_batch
+            staged: Staged uploads returned by create_batch
+            tenant: Client or tenant key for fair scheduling
+        """
+        loop = asyncio.get_running_loop()
+        # Jobs are (record, staged path, size, content hash, error)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.BATCH_CONCURRENCY)
+        
+        def extract_archive(upload: StagedUpload) -> None:
+            """Stream an archive's members into the queue; runs in a thread."""
+            def put(job) -> None:
+                asyncio.run_coroutine_threadsafe(queue.put(job), loop).result()
+            
+            done = 0
+            try:
+                for record, (member, fileobj) in zip(upload.records, iter_members(upload.path)):
+                    temp_path = self._temp_path(record.filename)
+                    try:
+                        size, content_hash = self._stage_stream(
+                            fileobj, temp_path, settings.MAX_CONTENT_LENGTH
+                        )
+                        put((record, temp_path, size, content_hash, None))
+                    except (ArchiveError, OSError) as e:
+                        temp_path.unlink(missing_ok=True)
+                        put((record, None, None, None, str(e)))
+                    done += 1
+            except ArchiveError as e:
+                for record in upload.records[done:]:
+                    put((record, None, None, None, str(e)))
             finally:
-                # Clean up temporary file
-                if temp_path.exists():
-                    temp_path.unlink()
-                
-                db.commit()
+                upload.path.unlink(missing_ok=True)
+        
+        async def work() -> None:
+            while (job := await queue.get()) is not None:
+                try:
+                    await self._convert_batch_item(*job, tenant=tenant)
+                except Exception as e:
+                    # Keep the worker alive for the rest of the batch
+                    print(f"Error converting {job[0].filename} in batch {batch_id}: {e}")
+                    if job[1] is not None:
+                        job[1].unlink(missing_ok=True)
+        
+        workers = [asyncio.create_task(work()) for _ in range(settings.BATCH_CONCURRENCY)]
+        try:
+            for upload in staged:
+                if upload.archive:
+                    await loop.run_in_executor(None, extract_archive, upload)
+                else:
+                    record = upload.records[0]
+                    await queue.put((record, upload.path, record.file_size, record.content_hash, None))
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+    async def _convert_batch_item(
+        self,
+        record: File,
+        temp_path: Optional[Path],
+        size: Optional[int],
+        content_hash: Optional[str],
+        error: Optional[str],
+        tenant: Optional[str] = None
+    ) -> None:
+        """Convert one staged file of a batch in its own session."""
+        async with get_async_session() as db:
+            file_record = await db.get(File, record.id)
+            if error is not None:
+                file_record.status = FileStatus.FAILED
+                file_record.error_message = error
+                job_leases.release(file_record)
+                await db.commit()
+                await self._publish_status(file_record)
+                return
             
-            return file_record
+            file_record.file_size = size
+            file_record.content_hash = content_hash
+            file_record.status = FileStatus.PROCESSING
+            job_leases.claim(file_record)
+            await db.commit()
+            await self._publish_status(file_record)
+            
+            # Already accepted, so wait for a slot however long it takes
+            sniffed = sniff(temp_path)
+            async with admission.slot(
+                admission.processor_name(file_record.filename, sniffed),
+                lane=Lane.BULK, tenant=tenant, bounded=False
+            ):
+                await self._run_conversion(
+                    file_record, temp_path, file_record.original_type or None, db,
+                    sniffed=sniffed
+                )
+
+    async def process_stored_upload(self, file_id: uuid.UUID, tenant: Optional[str] = None) -> None:
+        """
+        Convert a PROCESSING record whose original is already in storage.
+        
+        Used once a resumable upload has been assembled, and for files
+        recovered from a worker that died; the original is fetched into the
+        upload folder only for the duration of extraction.
+        
+        Args:
+            file_id: ID of the file record
+            tenant: Client or tenant key for fair scheduling
+        """
+        async with get_async_session() as db:
+            file_record = await db.get(File, file_id)
+            job_leases.claim(file_record)
+            temp_path = self._temp_path(file_record.filename)
+            loop = asyncio.get_running_loop()
+            try:
+                size, content_hash = await loop.run_in_executor(
+                    None, self._stage_object, file_record.original_path, temp_path
+                )
+            except (StorageError, OSError) as e:
+                temp_path.unlink(missing_ok=True)
+                file_record.status = FileStatus.FAILED
+                file_record.error_message = str(e)
+                job_leases.release(file_record)
+                await db.commit()
+                await self._publish_status(file_record)
+                return
+            
+            file_record.file_size = size
+            file_record.content_hash = content_hash
+            try:
+                sniffed = sniff(temp_path)
+                async with admission.slot(
+                    admission.processor_name(file_record.filename, sniffed),
+                    lane=Lane.BULK, tenant=tenant, bounded=False
+                ):
+                    await self._run_conversion(
+                        file_record, temp_path, file_record.original_type or None, db,
+                        store_original=False, sniffed=sniffed
+                    )
+            except Exception as e:
+                print(f"Error converting uploaded file {file_id}: {e}")
+
+    def _stage_object(self, object_name: str, path: Path) -> Tuple[int, str]:
+        """Download a stored object to a file, returning its size and SHA-256."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "wb") as f:
+            for chunk in storage.stream_file(object_name, chunk_size=COPY_CHUNK_SIZE):
+                size += len(chunk)
+                digest.update(chunk)
+                f.write(chunk)
+        return size, digest.hexdigest()
+
+    def _stage_stream(
+        self,
+        source: BinaryIO,
+        path: Path,
+        max_size: Optional[int]
+    ) -> Tuple[int, str]:
+        """
+        Copy a stream to a file, hashing it on the way.
+        
+        Returns:
+            Tuple of (size in bytes, SHA-256 hex digest)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "wb") as f:
+            while chunk := source.read(COPY_CHUNK_SIZE):
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise ArchiveError(f"File is larger than {max_size} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+        return size, digest.hexdigest()
+
+    async def get_batch_status(self, batch_id: uuid.UUID) -> Dict[str, Any]:
+        """
+        Count the files of a batch by status.
+        
+        Args:
+            batch_id: ID of the batch
+            
+        Returns:
+            Dict with batch_id, total and a count per status
+        """
+        async with get_async_session() as db:
+            statement = select(File.status, func.count()).where(
+                File.batch_id == batch_id
+            ).group_by(File.status)
+            rows = (await db.exec(statement)).all()
+        
+        if not rows:
+            raise FileNotFoundError(f"Batch not found: {batch_id}")
+        
+        counts = {status.value: 0 for status in FileStatus}
+        for status, count in rows:
+            counts[FileStatus(status).value] = count
+        return {"batch_id": batch_id, "total": sum(counts.values()), **counts}
+
+    async def _run_conversion(
+        self,
+        file_record: File,
+        temp_path: Path,
+        content_type: Optional[str],
+        db: AsyncSession,
+        profile: bool = False,
+        upload_seconds: Optional[float] = None,
+        store_original: bool = True,
+        sniffed: Optional[Sniffed] = None
+    ) -> None:
+        """
+        Convert a staged file for a PROCESSING record and store the results.
+        
+        The staged file is removed and the record committed whatever the
+        outcome; failures mark the record FAILED and are re-raised. Pass
+        store_original=False when the original is already in storage, and
+        the sniffed content the slot was admitted with, if any.
+        """
+        processor_name = "unknown"
+        convert_start = time.perf_counter()
+        try:
+            # Get processor for file type
+            processor = ProcessorFactory.create_processor(temp_path, file_record, sniffed)
+            processor_name = type(processor).__name__
+            if upload_seconds is not None:
+                metrics.STAGE_SECONDS.labels("upload_copy", processor_name).observe(upload_seconds)
+            metrics.CONVERSIONS_IN_PROGRESS.labels(processor_name).inc()
+            file_record.conversion_key = conversion_cache.make_key(
+                file_record.content_hash,
+                type(processor),
+                self._conversion_options()
+            )
+            
+            cached = None if profile else await conversion_cache.get(file_record.conversion_key)
+            if cached and await self._reuse_conversion(
+                file_record, cached, temp_path, content_type, store_original
+            ):
+                metrics.CONVERSION_CACHE_HITS.labels(processor_name).inc()
+            else:
+                self._attach_progress(processor, str(file_record.id))
+                await self._convert(
+                    file_record, processor, temp_path, content_type, profile, store_original
+                )
+                metrics.record_throughput(
+                    processor_name,
+                    time.perf_counter() - convert_start,
+                    file_record.file_size,
+                    pages=file_record.page_count,
+                    rows=(file_record.metadata or {}).get("row_count")
+                        or (file_record.metadata or {}).get("total_rows")
+                )
             
+            file_record.status = FileStatus.COMPLETED
+            file_record.content_stage = ContentStage.FULL
+            await conversion_cache.set(file_record.conversion_key, file_record)
+        
+        except (UnsupportedFileType, ProcessingError, StorageError, IntermediateFormatError) as e:
+            file_record.status = FileStatus.FAILED
+            file_record.error_message = str(e)
+            if isinstance(e, ResourceLimitExceeded):
+                self._set_resource_usage(file_record, processor_name, e.usage)
+                metrics.RESOURCE_LIMIT_EXCEEDED.labels(processor_name, e.resource).inc()
+            raise
+        
+        finally:
+            # Clean up temporary file
+            if temp_path.exists():
+                temp_path.unlink()
+            
+            if file_record.status in (FileStatus.COMPLETED, FileStatus.FAILED):
+                job_leases.release(file_record)
+                await self._discard_preview(file_record)
+            else:
+                # Interrupted, e.g. cancelled; let the reaper decide its fate
+                job_leases.abandon(file_record)
+            await db.commit()
+            await self._publish_status(file_record)
+            
+            if processor_name != "unknown":
+                metrics.CONVERSIONS_IN_PROGRESS.labels(processor_name).dec()
+            metrics.CONVERSION_SECONDS.labels(
+                processor_name, file_record.status.value
+            ).observe(time.perf_counter() - convert_start)
+
+    async def _convert(
+        self,
+        file_record: File,
+        processor: BaseProcessor,
+        temp_path: Path,
+        content_type: Optional[str],
+        profile: bool = False,
+        store_original: bool = True
+    ) -> None:
+        """Run a processor and store all artifacts of the conversion."""
+        name = type(processor).__name__
+        
+        # Extract in a resource-limited child process, then render here
+        processor.document, usage, extract_profile = await job_limiter.extract(processor, profile)
+        self._set_resource_usage(file_record, name, usage)
+        profiler = start_profiler(profile)
+        try:
+            rendered = processor.render(processor.document)
         except Exception as e:
-            raise FileProcessingError(f"Error processing file: {str(e)}")
+            raise ProcessingError(f"Error processing file: {str(e)}")
+        finally:
+            render_profile = dump_profile(profiler)
+        
+        # Upload original, markdown, JSON, metadata and intermediate document concurrently
+        paths = self._artifact_paths(file_record)
+        with rendered:
+            with metrics.track_stage("pack_document", name):
+                packed_document = pack_document(processor.document)
+            uploads = []
+            if store_original:
+                uploads.append(metrics.timed(
+                    storage.save_file_async(temp_path, paths["original"], content_type),
+                    "upload_original", name
+                ))
+            uploads += [
+                metrics.timed(
+                    storage.save_content_async(rendered.markdown, paths["markdown"], "text/markdown"),
+                    "upload_markdown", name
+                ),
+                metrics.timed(
+                    storage.save_content_async(rendered.json, paths["json"], "application/json"),
+                    "upload_json", name
+                ),
+                metrics.timed(
+                    storage.save_content_async(
+                        rendered.metadata_json, paths["metadata"], "application/json"
+                    ),
+                    "upload_metadata", name
+                ),
+                metrics.timed(
+                    storage.save_content_async(packed_document, paths["intermediate"], "application/msgpack"),
+                    "upload_intermediate", name
+                ),
+            ]
+            if profile:
+                uploads.append(storage.save_content_async(
+                    merge_profiles(extract_profile, render_profile),
+                    paths["profile"],
+                    "application/octet-stream"
+                ))
+            await storage.save_all(*uploads)
+        
+        # Update file record
+        self._set_artifact_paths(file_record, paths)
+        if profile:
+            file_record.profile_path = paths["profile"]
+        self._apply_render(file_record, rendered)
+
+    async def _reuse_conversion(
+        self,
+        file_record: File,
+        cached: Dict[str, Any],
+        temp_path: Path,
+        content_type: Optional[str],
+        store_original: bool = True
+    ) -> bool:
+        """
+        Copy the artifacts of an identical earlier conversion.
+        
+        Returns:
+            False if the cached artifacts are no longer available
+        """
+        if not all(cached.get(f"{kind}_path") for kind in self.CACHED_ARTIFACTS):
+            return False
+        
+        paths = self._artifact_paths(file_record)
+        uploads = [
+            storage.copy_file_async(cached[f"{kind}_path"], paths[kind])
+            for kind in self.CACHED_ARTIFACTS
+        ]
+        if store_original:
+            uploads.append(storage.save_file_async(temp_path, paths["original"], content_type))
+        try:
+            await storage.save_all(*uploads)
+        except StorageError as e:
+            print(f"Cached conversion unavailable, converting again: {e}")
+            await conversion_cache.invalidate(file_record.conversion_key)
+            return False
+        
+        self._set_artifact_paths(file_record, paths)
+        file_record.metadata = cached["metadata"]
+        file_record.page_count = cached["page_count"]
+        file_record.word_count = cached["word_count"]
+        file_record.chunk_count = cached["chunk_count"]
+        return True
+
+    @staticmethod
+    def original_path(file_id: uuid.UUID, filename: str) -> str:
+        """Storage object name of a file's original upload."""
+        return f"{file_id}/original/{filename}"
+
+    async def _discard_preview(self, file_record: File) -> None:
+        """Delete a preview once the full conversion has replaced it."""
+        paths = [file_record.preview_markdown_path, file_record.preview_json_path]
+        if not any(paths):
+            return
+        file_record.preview_markdown_path = None
+        file_record.preview_json_path = None
+        if file_record.content_stage == ContentStage.PREVIEW:
+            file_record.content_stage = None
+        try:
+            await asyncio.gather(*(storage.delete_file_async(path) for path in paths if path))
+        except StorageError as e:
+            print(f"Error deleting preview of {file_record.id}: {e}")
+
+    def _temp_path(self, filename: str) -> Path:
+        """Unique path in the upload folder, kept safe from the temp file reaper."""
+        return job_leases.track_path(self.upload_folder / f"{uuid.uuid4()}_{filename}")
+
+    def _artifact_paths(self, file_record: File) -> Dict[str, str]:
+        """Storage object names for each artifact of a file."""
+        file_id = str(file_record.id)
+        stem = Path(file_record.filename).stem
+        return {
+            "original": self.original_path(file_record.id, file_record.filename),
+            "markdown": f"{file_id}/markdown/{stem}.md",
+            "json": f"{file_id}/json/{stem}.json",
+            "metadata": f"{file_id}/metadata/{stem}.json",
+            "intermediate": f"{file_id}/intermediate/{stem}.msgpack",
+            "profile": f"{file_id}/profile/{stem}.pstats",
+            "preview_markdown": f"{file_id}/preview/{stem}.md",
+            "preview_json": f"{file_id}/preview/{stem}.json",
+        }
+
+    def _set_resource_usage(self, file_record: File, processor_name: str, usage: Usage) -> None:
+        """Record the peak memory, CPU and wall time of an extraction job."""
+        file_record.peak_memory_mb = usage.get("peak_memory_mb")
+        file_record.cpu_seconds = usage.get("cpu_seconds")
+        file_record.wall_seconds = usage.get("wall_seconds")
+        if file_record.peak_memory_mb is not None:
+            metrics.JOB_PEAK_MEMORY_MB.labels(processor_name).observe(file_record.peak_memory_mb)
+
+    def _set_artifact_paths(self, file_record: File, paths: Dict[str, str]) -> None:
+        file_record.original_path = paths["original"]
+        file_record.markdown_path = paths["markdown"]
+        file_record.json_path = paths["json"]
+        file_record.metadata_path = paths["metadata"]
+        file_record.intermediate_path = paths["intermediate"]
+
+    def _conversion_options(
+        self,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Options that affect conversion output, part of the cache key."""
+        return {
+            "chunk_size": chunk_size or settings.DEFAULT_CHUNK_SIZE,
+            "chunk_overlap": chunk_overlap if chunk_overlap is not None else settings.DEFAULT_CHUNK_OVERLAP,
+        }
+
+    async def rerender_file(
+        self,
+        file_id: uuid.UUID,
+        db: AsyncSession,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None
+    ) -> File:
+        """
+        Regenerate markdown, JSON and chunks from the stored intermediate
+        document, without re-running extraction.
+        
+        Args:
+            file_id: ID of the file to re-render
+            db: Database session
+            chunk_size: Maximum chunk size, defaults to settings
+            chunk_overlap: Chunk overlap, defaults to settings
+            
+        Returns:
+            The updated file record
+        """
+        file_record = await db.get(File, file_id)
+        if not file_record:
+            raise FileNotFoundError(f"File not found: {file_id}")
+        
+        if file_record.status != FileStatus.COMPLETED or not file_record.intermediate_path:
+            raise FileNotReadyError(
+                f"File has no intermediate document. Status: {file_record.status}"
+            )
+        
+        try:
+            document = unpack_document(
+                await storage.get_file_async(file_record.intermediate_path)
+            )
+            processor_class = ProcessorFactory.get_processor_class_by_name(
+                document["processor"]
+            )
+            rendered = processor_class.render(document, chunk_size, chunk_overlap)
+            
+            # Rows converted before metadata was split out get their artifact now
+            if not file_record.metadata_path:
+                file_record.metadata_path = self._artifact_paths(file_record)["metadata"]
+            
+            with rendered:
+                await storage.save_all(
+                    storage.save_content_async(
+                        rendered.markdown, file_record.markdown_path, "text/markdown"
+                    ),
+                    storage.save_content_async(
+                        rendered.json, file_record.json_path, "application/json"
+                    ),
+                    storage.save_content_async(
+                        rendered.metadata_json, file_record.metadata_path, "application/json"
+                    ),
+                    cleanup=False
+                )
+            
+        except (UnsupportedFileType, StorageError, IntermediateFormatError) as e:
+            raise FileProcessingError(f"Error re-rendering file: {str(e)}")
+        
+        self._apply_render(file_record, rendered)
+        file_record.updated_at = datetime.utcnow()
+        if file_record.conversion_key:
+            # The old key may point at this file's now re-rendered artifacts
+            await conversion_cache.invalidate(file_record.conversion_key)
+        if file_record.content_hash:
+            file_record.conversion_key = conversion_cache.make_key(
+                file_record.content_hash,
+                processor_class,
+                self._conversion_options(chunk_size, chunk_overlap)
+            )
+        db.add(file_record)
+        await db.commit()
+        
+        if file_record.conversion_key:
+            await conversion_cache.set(file_record.conversion_key, file_record)
+        
+        return file_record
+
+    def _attach_progress(self, processor: BaseProcessor, file_id: str) -> None:
+        """Publish throttled per-stage progress events for a processor."""
+        last_sent = 0.0
+        
+        async def on_progress(stage: str, done: int, total: Optional[int]) -> None:
+            nonlocal last_sent
+            now = time.monotonic()
+            if done != total and now - last_sent < settings.EVENTS_PROGRESS_INTERVAL:
+                return
+            last_sent = now
+            await events.publish(file_id, {
+                "type": "progress",
+                "stage": stage,
+                "done": done,
+                "total": total,
+            })
+        
+        processor.progress_callback = on_progress
+
+    async def _publish_status(self, file_record: File) -> None:
+        """Publish the current status of a file record."""
+        await events.publish(str(file_record.id), {
+            "type": "status",
+            "status": file_record.status,
+            "error_message": file_record.error_message,
+            "batch_id": file_record.batch_id,
+            "content_stage": file_record.content_stage,
+        })
+
+    def _apply_render(self, file_record: File, rendered: RenderedDocument) -> None:
+        """Copy rendered statistics and the metadata summary onto the file record."""
+        file_record.metadata = summarize_metadata(rendered.metadata)
+        file_record.page_count = rendered.metadata.get("page_count")
+        file_record.word_count = rendered.word_count
+        file_record.chunk_count = rendered.chunk_count
 
     async def get_file_content(
         self,
         file_id: uuid.UUID,
         content_type: str = "markdown"
-    ) -> Tuple[str, Dict[str, Any]]:
+    ) -> Tuple[str | bytes, Dict[str, Any], Optional[ContentStage]]:
         """
-        Retrieve processed file content.
+        Retrieve processed file content, or its preview while converting.
+        
+        JSON content is returned as the stored, encoded bytes so it can be
+        sent on without being decoded and encoded again.
         
         Args:
             file_id: ID of the file to retrieve
             content_type: Type of content to retrieve ('markdown' or 'json')
             
         Returns:
-            Tuple of (content, metadata)
+            Tuple of (content, metadata, content stage)
         """
-        with get_session() as db:
-            file_record = db.get(File, file_id)
-            if not file_record:
-                raise FileNotFoundError(f"File not found: {file_id}")
-            
-            if file_record.status != FileStatus.COMPLETED:
-                raise FileNotReadyError(
-                    f"File not ready. Status: {file_record.status}"
-                )
+        async with get_async_session() as db:
+            file_record = await self._get_completed_record(db, file_id, allow_preview=True)
             
+            preview = file_record.status != FileStatus.COMPLETED
             try:
                 if content_type == "markdown":
-                    content = storage.get_file(file_record.markdown_path).decode()
+                    path = file_record.preview_markdown_path if preview else file_record.markdown_path
+                    content = (await storage.get_file_async(path)).decode()
                 else:  # json
-                    content = storage.get_json(file_record.json_path)
+                    path = file_record.preview_json_path if preview else file_record.json_path
+                    content = await storage.get_file_async(path)
                 
-                return content, file_record.metadata
+                return content, file_record.metadata, file_record.content_stage
                 
             except StorageError as e:
                 raise FileProcessingError(f"Error retrieving file: {str(e)}")
 
+    async def get_file_status(self, file_id: uuid.UUID) -> File:
+        """
+        Load a file record in a short-lived session.
+        
+        Used by long-lived connections that must not hold a pooled
+        connection open while they wait.
+        
+        Args:
+            file_id: ID of the file
+            
+        Returns:
+            The file record
+        """
+        async with get_async_session() as db:
+            file_record = await db.get(File, file_id)
+        if not file_record:
+            raise FileNotFoundError(f"File not found: {file_id}")
+        return file_record
+
+    async def get_file_metadata(self, file_id: uuid.UUID) -> Dict[str, Any]:
+        """
+        Retrieve the full metadata of a processed file.
+        
+        The file row only holds a summary; positions, page sizes and other
+        bulky details are loaded from the metadata artifact.
+        
+        Args:
+            file_id: ID of the file
+            
+        Returns:
+            The full metadata
+        """
+        async with get_async_session() as db:
+            file_record = await self._get_completed_record(db, file_id)
+        
+        if not file_record.metadata_path:
+            # Converted before metadata was split out; the row holds it all
+            return file_record.metadata or {}
+        
+        try:
+            return await storage.get_json_async(file_record.metadata_path)
+        except StorageError as e:
+            raise FileProcessingError(f"Error retrieving metadata: {str(e)}")
+
+    async def get_artifact(
+        self,
+        file_id: uuid.UUID,
+        artifact: str
+    ) -> Tuple[str, Dict[str, Any], str]:
+        """
+        Locate a stored artifact for direct download.
+        
+        Args:
+            file_id: ID of the file
+            artifact: 'original', 'markdown', 'json', 'metadata' or 'profile'
+            
+        Returns:
+            Tuple of (object name, storage stat, media type)
+        """
+        async with get_async_session() as db:
+            file_record = await self._get_completed_record(db, file_id)
+        
+        if artifact == "original":
+            object_name = file_record.original_path
+            media_type = file_record.original_type or "application/octet-stream"
+        elif artifact == "markdown":
+            object_name, media_type = file_record.markdown_path, "text/markdown"
+        elif artifact == "json":
+            object_name, media_type = file_record.json_path, "application/json"
+        elif artifact == "metadata":
+            object_name, media_type = file_record.metadata_path, "application/json"
+        elif artifact == "profile":
+            object_name, media_type = file_record.profile_path, "application/octet-stream"
+        else:
+            raise ValueError(f"Unknown artifact: {artifact}")
+        
+        if not object_name:
+            raise FileNotFoundError(f"Artifact not found: {artifact}")
+        
+        try:
+            stat = await storage.stat_file_async(object_name)
+            return object_name, stat, media_type
+            
+        except StorageError as e:
+            raise FileProcessingError(f"Error retrieving file: {str(e)}")
+
+    async def _get_completed_record(
+        self,
+        db: AsyncSession,
+        file_id: uuid.UUID,
+        allow_preview: bool = False
+    ) -> File:
+        """
+        Load a file record, ensuring it exists and has finished processing.
+        
+        With allow_preview, a file still converting is accepted if it has
+        a preview.
+        """
+        file_record = await db.get(File, file_id)
+        if not file_record:
+            raise FileNotFoundError(f"File not found: {file_id}")
+        
+        if allow_preview and file_record.content_stage == ContentStage.PREVIEW:
+            return file_record
+        if file_record.status != FileStatus.COMPLETED:
+            raise FileNotReadyError(
+                f"File not ready. Status: {file_record.status}"
+            )
+        
+        return file_record
+
 class FileProcessingError(Exception):
     """Raised when there's an error processing a file."""
     pass
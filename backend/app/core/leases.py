@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from ..models.file_model import File, FileStatus
+from .config import settings
+from .database import get_async_session
+from . import metrics
+
+# Statuses of files that some worker still has to finish
+ACTIVE_STATUSES = (FileStatus.PENDING, FileStatus.PROCESSING)
+
+class JobLeases:
+    """
+    Time-limited leases on conversion jobs, renewed by heartbeats.
+
+    A worker leases every file it stages or converts and renews all of its
+    leases with one UPDATE every LEASE_HEARTBEAT_INTERVAL seconds. When a
+    worker dies its leases lapse, and the reaper on any node claims the
+    file with SELECT ... FOR UPDATE SKIP LOCKED, so exactly one node
+    recovers it. Files whose original is already in storage are converted
+    again, up to JOB_MAX_RETRIES times; the rest are marked FAILED, since
+    their staged upload died with the worker.
+
+    Heartbeats also refresh the mtime of the temp files this worker is
+    using, and the reaper deletes temp files in the upload folder that no
+    live worker has touched for UPLOAD_TEMP_MAX_AGE seconds.
+    """
+
+    def __init__(self):
+        self.ttl = settings.LEASE_TTL
+        self.heartbeat_interval = settings.LEASE_HEARTBEAT_INTERVAL
+        self.reaper_interval = settings.LEASE_REAPER_INTERVAL
+        self.max_retries = settings.JOB_MAX_RETRIES
+        self.temp_max_age = settings.UPLOAD_TEMP_MAX_AGE
+        self._worker_id: Optional[str] = settings.WORKER_ID
+        # Tracked temp files and when they were registered
+        self._paths: Dict[Path, float] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._requeued: Set[asyncio.Task] = set()
+        self._requeue: Optional[Callable[[uuid.UUID], Awaitable[None]]] = None
+        self._upload_folder: Optional[Path] = None
+
+    @property
+    def worker_id(self) -> str:
+        """Lease owner name, unique per process even when PIDs are reused."""
+        if self._worker_id is None:
+            self._worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        return self._worker_id
+
+    def claim(self, file_record: File) -> None:
+        """Lease a file to this worker; the caller commits the record."""
+        file_record.lease_owner = self.worker_id
+        file_record.lease_expires_at = datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    def release(self, file_record: File) -> None:
+        """Drop the lease on a finished file; the caller commits the record."""
+        file_record.lease_owner = None
+        file_record.lease_expires_at = None
+
+    def abandon(self, file_record: File) -> None:
+        """Expire the lease on an unfinished file so the reaper recovers it."""
+        file_record.lease_owner = None
+        file_record.lease_expires_at = datetime.utcnow()
+
+    def track_path(self, path: Path) -> Path:
+        """Keep a temp file from being reaped for as long as it exists."""
+        self._paths[path] = time.monotonic()
+        return path
+
+    def start(
+        self,
+        requeue: Callable[[uuid.UUID], Awaitable[None]],
+        upload_folder: Path
+    ) -> None:
+        """
+        Start the heartbeat and reaper loops.
+
+        Args:
+            requeue: Coroutine function converting a recovered file whose
+                original is in storage
+            upload_folder: Folder whose stale temp files are removed
+        """
+        self._requeue = requeue
+        self._upload_folder = Path(upload_folder)
+        self._tasks = [
+            asyncio.create_task(self._every(self.heartbeat_interval, self.heartbeat)),
+            asyncio.create_task(self._every(self.reaper_interval, self.reap)),
+        ]
+
+    async def stop(self) -> None:
+        """Stop the background loops."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def heartbeat(self) -> None:
+        """Extend this worker's leases and refresh its temp files."""
+        async with get_async_session() as db:
+            await db.execute(
+                update(File)
+                .where(File.lease_owner == self.worker_id)
+                .where(File.status.in_(ACTIVE_STATUSES))
+                .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.ttl))
+            )
+        await asyncio.get_running_loop().run_in_executor(None, self._touch_paths)
+
+    async def reap(self) -> None:
+        """Recover files with lapsed leases and remove stale temp files."""
+        await self._recover_jobs()
+        if self._upload_folder is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._remove_stale_temp_files)
+
+    async def _recover_jobs(self) -> None:
+        requeue: List[uuid.UUID] = []
+        async with get_async_session() as db:
+            statement = (
+                select(File)
+                .where(File.status.in_(ACTIVE_STATUSES))
+                .where(File.lease_expires_at < datetime.utcnow())
+                .order_by(File.lease_expires_at)
+                .limit(settings.LEASE_REAPER_BATCH)
+                .with_for_update(skip_locked=True)
+            )
+            for file_record in (await db.exec(statement)).all():
+                if file_record.original_path and file_record.retries < self.max_retries:
+                    file_record.retries += 1
+                    file_record.status = FileStatus.PROCESSING
+                    self.claim(file_record)
+                    requeue.append(file_record.id)
+                    metrics.JOBS_RECOVERED.labels("requeued").inc()
+                else:
+                    file_record.status = FileStatus.FAILED
+                    file_record.error_message = (
+                        "Conversion interrupted: the worker processing this file stopped"
+                        if file_record.retries < self.max_retries
+                        else f"Conversion interrupted {file_record.retries + 1} times, giving up"
+                    )
+                    self.release(file_record)
+                    metrics.JOBS_RECOVERED.labels("failed").inc()
+            await db.commit()
+
+        for file_id in requeue:
+            task = asyncio.create_task(self._requeue(file_id))
+            self._requeued.add(task)
+            task.add_done_callback(self._requeued.discard)
+
+    def _touch_paths(self) -> None:
+        for path, registered in list(self._paths.items()):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Paths may be registered just before the file is written
+                if time.monotonic() - registered > self.heartbeat_interval:
+                    self._paths.pop(path, None)
+
+    def _remove_stale_temp_files(self) -> None:
+        cutoff = time.time() - self.temp_max_age
+        for path in self._upload_folder.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    metrics.TEMP_FILES_REAPED.inc()
+            except FileNotFoundError:
+                continue
+
+    @staticmethod
+    async def _every(interval: float, job: Callable[[], Awaitable[None]]) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception as e:
+                # Keep the loop alive; the next round retries
+                print(f"Error in {job.__name__}: {e}")
+
+# Create a singleton instance
+job_leases = JobLeases()
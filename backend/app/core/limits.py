@@ -0,0 +1,293 @@
+from typing import Dict, Any, List, Optional, Tuple, Type
+from multiprocessing.connection import Connection
+import asyncio
+import multiprocessing
+import os
+import resource
+import signal
+import time
+
+from .config import settings
+from . import metrics
+from ..models.file_model import File
+from ..processors.base_processor import BaseProcessor, ProcessingError, ResourceLimitExceeded
+from ..processors.factory import ProcessorFactory
+from ..utils.intermediate import pack_document, unpack_document
+from ..utils.profiling import start_profiler, dump_profile
+
+# Resource usage of a job: peak_memory_mb, cpu_seconds and wall_seconds
+Usage = Dict[str, Optional[float]]
+
+# Extra CPU seconds after SIGXCPU before the kernel sends SIGKILL
+CPU_GRACE_SECONDS = 5
+
+class JobLimiter:
+    """
+    Runs document extraction in a child process under per-job limits.
+
+    A file that exhausts memory or CPU only takes down its own child; the
+    worker marks the file as failed and keeps serving other conversions.
+    Children fork from a forkserver with the processor modules preloaded,
+    so a job does not pay for re-importing parsing libraries.
+    """
+
+    # Seconds between checks of the child's memory, CPU and elapsed time
+    POLL_INTERVAL = 0.1
+
+    def __init__(self):
+        self.enabled = settings.JOB_LIMITS_ENABLED
+        self.max_memory_mb = settings.JOB_MAX_MEMORY_MB
+        self.max_cpu_seconds = settings.JOB_MAX_CPU_SECONDS
+        self.max_wall_seconds = settings.JOB_MAX_WALL_SECONDS
+        self.unit_limits = {
+            "pages": settings.JOB_MAX_PAGES,
+            "rows": settings.JOB_MAX_ROWS,
+            "cells": settings.JOB_MAX_CELLS,
+        }
+        self._context = None
+
+    @property
+    def context(self):
+        """Forkserver context, started on first use."""
+        if self._context is None:
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(ProcessorFactory.module_names())
+        return self._context
+
+    async def extract(
+        self,
+        processor: BaseProcessor,
+        profile: bool = False
+    ) -> Tuple[Dict[str, Any], Usage, Optional[bytes]]:
+        """
+        Extract a processor's intermediate document under the configured limits.
+
+        Args:
+            processor: Processor for the file; its progress callback receives
+                the child's progress reports
+            profile: Run extraction under cProfile
+
+        Returns:
+            Tuple of (intermediate document, resource usage, serialized
+            pstats profile or None)
+
+        Raises:
+            ResourceLimitExceeded: If the job went over a limit
+            ProcessingError: If extraction failed
+        """
+        processor.unit_limits = self.unit_limits
+        if not self.enabled:
+            return await self._extract_inline(processor, profile)
+
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=_extract_in_child,
+            args=(
+                child_conn,
+                type(processor),
+                str(processor.file_path),
+                processor.file_info.model_dump(),
+                self.unit_limits,
+                processor.preview_limits,
+                self.max_memory_mb,
+                self.max_cpu_seconds,
+                profile,
+            ),
+            daemon=True
+        )
+        start = time.monotonic()
+        # Starting the first child also starts the forkserver, which blocks
+        await loop.run_in_executor(None, process.start)
+        child_conn.close()
+
+        readable = asyncio.Event()
+        loop.add_reader(parent_conn.fileno(), readable.set)
+        usage: Usage = {"peak_memory_mb": None, "cpu_seconds": None, "wall_seconds": None}
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(readable.wait(), self.POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                readable.clear()
+                usage["wall_seconds"] = round(time.monotonic() - start, 3)
+
+                # Handle everything the child has sent so far
+                while parent_conn.poll():
+                    try:
+                        # A packed document can be large; read it off the event loop
+                        message = await loop.run_in_executor(None, parent_conn.recv)
+                    except EOFError:
+                        raise await self._exit_error(process, usage)
+                    kind = message[0]
+                    if kind == "progress":
+                        await processor.report_progress(*message[1:])
+                        continue
+
+                    # Results end with the child's stage timings and resource usage
+                    metrics.observe_stages(message[-2])
+                    self._merge_usage(usage, message[-1])
+                    if kind == "done":
+                        return unpack_document(message[1]), usage, message[2]
+                    if kind == "limit":
+                        raise ResourceLimitExceeded(message[1], message[2], usage)
+                    raise ProcessingError(f"Error processing file: {message[1]}")
+
+                # Enforce the limits the child cannot enforce on itself; its
+                # data size is capped too, but RSS includes mapped files
+                sample = _sample_process(process.pid)
+                if sample is not None:
+                    self._merge_usage(usage, sample)
+                    if self.max_memory_mb and sample["peak_memory_mb"] > self.max_memory_mb:
+                        raise ResourceLimitExceeded(
+                            "memory", f"used more than {self.max_memory_mb} MB", usage
+                        )
+                if self.max_wall_seconds and usage["wall_seconds"] > self.max_wall_seconds:
+                    raise ResourceLimitExceeded(
+                        "time", f"ran longer than {self.max_wall_seconds} seconds", usage
+                    )
+        finally:
+            loop.remove_reader(parent_conn.fileno())
+            parent_conn.close()
+            if process.is_alive():
+                process.kill()
+            # Reap the child without blocking the event loop
+            await loop.run_in_executor(None, process.join, 1)
+
+    async def _extract_inline(
+        self,
+        processor: BaseProcessor,
+        profile: bool
+    ) -> Tuple[Dict[str, Any], Usage, Optional[bytes]]:
+        """
+        Extract in this process, with only the page/row/cell limits enforced.
+
+        A profile taken here also samples whatever else the event loop runs
+        in the meantime.
+        """
+        start_wall = time.monotonic()
+        start_cpu = time.process_time()
+        profiler = start_profiler(profile)
+        try:
+            document = await processor.extract_document()
+        except ResourceLimitExceeded:
+            raise
+        except Exception as e:
+            raise ProcessingError(f"Error processing file: {str(e)}")
+        finally:
+            profile_bytes = dump_profile(profiler)
+
+        # Memory is shared with every other job here, so it is not attributed
+        return document, {
+            "peak_memory_mb": None,
+            "cpu_seconds": round(time.process_time() - start_cpu, 3),
+            "wall_seconds": round(time.monotonic() - start_wall, 3),
+        }, profile_bytes
+
+    async def _exit_error(self, process, usage: Usage) -> ProcessingError:
+        """Explain a child that exited without reporting a result."""
+        await asyncio.get_running_loop().run_in_executor(None, process.join, 1)
+        exitcode = process.exitcode
+        cpu_seconds = usage.get("cpu_seconds") or 0
+        if self.max_cpu_seconds and cpu_seconds >= self.max_cpu_seconds - 1:
+            return ResourceLimitExceeded(
+                "cpu", f"used more than {self.max_cpu_seconds} CPU seconds", usage
+            )
+        if exitcode == -signal.SIGKILL:
+            # Killed without hitting our limits: the kernel's OOM killer
+            return ResourceLimitExceeded("memory", "killed by the out-of-memory killer", usage)
+        return ProcessingError(f"Error processing file: extraction exited with code {exitcode}")
+
+    @staticmethod
+    def _merge_usage(usage: Usage, sample: Usage) -> None:
+        for key, value in sample.items():
+            if value is None:
+                continue
+            if key == "peak_memory_mb":
+                usage[key] = max(usage[key] or 0, value)
+            elif key == "cpu_seconds":
+                usage[key] = value
+
+def _sample_process(pid: int) -> Optional[Usage]:
+    """Current RSS and CPU time of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesised command name; utime and stime are 14 and 15
+            fields = f.read().rpartition(")")[2].split()
+            ticks = int(fields[11]) + int(fields[12])
+    except (OSError, ValueError, IndexError):
+        return None
+    return {
+        "peak_memory_mb": round(rss_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1),
+        "cpu_seconds": round(ticks / os.sysconf("SC_CLK_TCK"), 3),
+    }
+
+def _own_usage() -> Usage:
+    """Peak RSS and CPU time of the current process."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "peak_memory_mb": round(usage.ru_maxrss / 1024, 1),
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+    }
+
+def _extract_in_child(
+    conn: Connection,
+    processor_class: Type[BaseProcessor],
+    file_path: str,
+    file_info: Dict[str, Any],
+    unit_limits: Dict[str, int],
+    preview_limits: Dict[str, int],
+    max_memory_mb: int,
+    max_cpu_seconds: int,
+    profile: bool
+) -> None:
+    """Child process entry point: extract a document and send it back packed."""
+    if max_memory_mb:
+        # Allocations past the limit fail at once with MemoryError, rather
+        # than a decompression bomb growing until the next poll
+        _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+        limit = max_memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, hard))
+
+    if max_cpu_seconds:
+        # SIGXCPU at the soft limit lets us report cleanly; SIGKILL follows
+        resource.setrlimit(
+            resource.RLIMIT_CPU,
+            (max_cpu_seconds, max_cpu_seconds + CPU_GRACE_SECONDS)
+        )
+
+        def on_cpu_limit(signum, frame):
+            raise ResourceLimitExceeded("cpu", f"used more than {max_cpu_seconds} CPU seconds")
+
+        signal.signal(signal.SIGXCPU, on_cpu_limit)
+
+    timings: List[metrics.StageTiming] = []
+    try:
+        processor = processor_class(file_path, File.model_validate(file_info))
+        processor.unit_limits = unit_limits
+        processor.preview_limits = preview_limits
+
+        async def forward_progress(stage: str, done: int, total: Optional[int]) -> None:
+            conn.send(("progress", stage, done, total))
+
+        processor.progress_callback = forward_progress
+        profiler = start_profiler(profile)
+        with metrics.collect_stages() as timings:
+            document = asyncio.run(processor.extract_document())
+        conn.send(("done", pack_document(document), dump_profile(profiler), timings, _own_usage()))
+    except ResourceLimitExceeded as e:
+        conn.send(("limit", e.resource, e.detail, timings, _own_usage()))
+    except MemoryError:
+        conn.send(("limit", "memory", f"used more than {max_memory_mb} MB", timings, _own_usage()))
+    except Exception as e:
+        conn.send(("error", str(e), timings, _own_usage()))
+    finally:
+        conn.close()
+
+# Create a singleton instance
+job_limiter = JobLimiter()
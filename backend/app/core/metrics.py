@@ -0,0 +1,188 @@
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple, TypeVar
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+# (stage, processor, seconds) timings of a conversion stage
+StageTiming = Tuple[str, str, float]
+
+# Buckets spanning sub-millisecond stages up to multi-minute conversions
+STAGE_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+
+STAGE_SECONDS = Histogram(
+    "filestomd_stage_seconds",
+    "Time spent in each conversion stage",
+    ["stage", "processor"],
+    buckets=STAGE_BUCKETS,
+)
+
+CONVERSION_SECONDS = Histogram(
+    "filestomd_conversion_seconds",
+    "End-to-end time to process an uploaded file",
+    ["processor", "status"],
+    buckets=STAGE_BUCKETS,
+)
+
+BYTES_PER_SECOND = Histogram(
+    "filestomd_conversion_bytes_per_second",
+    "Input bytes converted per second of processing",
+    ["processor"],
+    buckets=(1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8),
+)
+
+UNITS_PER_SECOND = Histogram(
+    "filestomd_conversion_units_per_second",
+    "Pages or rows converted per second of processing",
+    ["processor", "unit"],
+    buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000),
+)
+
+CONVERSIONS_IN_PROGRESS = Gauge(
+    "filestomd_conversions_in_progress",
+    "Conversions currently running in this process",
+    ["processor"],
+)
+
+CONVERSION_CACHE_HITS = Counter(
+    "filestomd_conversion_cache_hits_total",
+    "Uploads served from the conversion cache",
+    ["processor"],
+)
+
+PREVIEW_SECONDS = Histogram(
+    "filestomd_preview_seconds",
+    "Time to produce a preview, by whether it was stored or skipped",
+    ["processor", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+
+RESOURCE_LIMIT_EXCEEDED = Counter(
+    "filestomd_resource_limit_exceeded_total",
+    "Conversions failed for going over a per-job resource limit",
+    ["processor", "resource"],
+)
+
+JOB_PEAK_MEMORY_MB = Histogram(
+    "filestomd_job_peak_memory_mb",
+    "Peak RSS of extraction jobs in megabytes",
+    ["processor"],
+    buckets=(32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+
+CONVERSION_QUEUE_DEPTH = Gauge(
+    "filestomd_conversion_queue_depth",
+    "Conversions waiting for an admission slot",
+    ["processor", "lane"],
+)
+
+ADMISSION_WAIT_SECONDS = Histogram(
+    "filestomd_admission_wait_seconds",
+    "Time conversions waited for an admission slot",
+    ["processor", "lane"],
+    buckets=STAGE_BUCKETS,
+)
+
+ADMISSION_REJECTED = Counter(
+    "filestomd_admission_rejected_total",
+    "Uploads turned away by admission control",
+    ["processor", "reason"],
+)
+
+JOBS_RECOVERED = Counter(
+    "filestomd_jobs_recovered_total",
+    "Files whose worker lease lapsed, by whether they were re-queued or failed",
+    ["outcome"],
+)
+
+TEMP_FILES_REAPED = Counter(
+    "filestomd_temp_files_reaped_total",
+    "Stale temp files removed from the upload folder",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "filestomd_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+)
+
+DB_POOL_SIZE = Gauge(
+    "filestomd_db_pool_size",
+    "Database connections currently held by the pool",
+)
+
+STORAGE_QUEUE_DEPTH = Gauge(
+    "filestomd_storage_queue_depth",
+    "Storage calls waiting for a thread in the storage pool",
+)
+
+# Timings gathered by collect_stages instead of being observed here
+_collected_stages: Optional[List[StageTiming]] = None
+
+@contextmanager
+def track_stage(stage: str, processor: str) -> Iterator[None]:
+    """Time a block of code as a conversion stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if _collected_stages is not None:
+            _collected_stages.append((stage, processor, seconds))
+        else:
+            STAGE_SECONDS.labels(stage, processor).observe(seconds)
+
+@contextmanager
+def collect_stages() -> Iterator[List[StageTiming]]:
+    """
+    Collect stage timings instead of observing them.
+    
+    Used in extraction child processes, whose metrics /metrics never sees;
+    the parent records the collected timings with observe_stages.
+    """
+    global _collected_stages
+    _collected_stages = []
+    try:
+        yield _collected_stages
+    finally:
+        _collected_stages = None
+
+def observe_stages(timings: List[StageTiming]) -> None:
+    """Record stage timings collected in another process."""
+    for stage, processor, seconds in timings:
+        STAGE_SECONDS.labels(stage, processor).observe(seconds)
+
+async def timed(awaitable: Awaitable[T], stage: str, processor: str) -> T:
+    """Await an awaitable, timing it as a conversion stage."""
+    with track_stage(stage, processor):
+        return await awaitable
+
+def record_throughput(
+    processor: str,
+    seconds: float,
+    size_bytes: int,
+    pages: int | None = None,
+    rows: int | None = None
+) -> None:
+    """Record bytes and pages/rows per second for a finished conversion."""
+    if seconds <= 0:
+        return
+    BYTES_PER_SECOND.labels(processor).observe(size_bytes / seconds)
+    if pages:
+        UNITS_PER_SECOND.labels(processor, "pages").observe(pages / seconds)
+    if rows:
+        UNITS_PER_SECOND.labels(processor, "rows").observe(rows / seconds)
+
+def register_gauge_callbacks(
+    pool_checked_out: Callable[[], float],
+    pool_size: Callable[[], float],
+    storage_queue_depth: Callable[[], float]
+) -> None:
+    """Have pool and queue gauges read their value at scrape time."""
+    DB_POOL_CHECKED_OUT.set_function(pool_checked_out)
+    DB_POOL_SIZE.set_function(pool_size)
+    STORAGE_QUEUE_DEPTH.set_function(storage_queue_depth)
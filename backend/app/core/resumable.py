@@ -0,0 +1,203 @@
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+import json
+import mimetypes
+import uuid
+
+import redis.asyncio as aioredis
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .config import settings
+from .storage import storage
+from .file_service import file_service
+from .leases import job_leases
+from ..models.file_model import File, FileStatus
+
+# S3 requires every part but the last to be at least this large
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+class ResumableUploads:
+    """
+    Resumable uploads on top of MinIO multipart uploads.
+
+    A client creates an upload session, PUTs numbered parts in any order
+    and as often as needed, asks which parts have arrived after a dropped
+    connection, and finally completes the upload to start conversion.
+    Parts are streamed to MinIO from memory and never touch the upload
+    folder. Session state lives in Redis; MinIO's part list is the source
+    of truth for what has been received.
+    """
+
+    PREFIX = "upload-session:"
+
+    def __init__(self):
+        self.ttl = settings.UPLOAD_SESSION_TTL
+        self._redis: Optional[aioredis.Redis] = None
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        """Redis client, created on first use."""
+        if self._redis is None:
+            self._redis = aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB
+            )
+        return self._redis
+
+    async def create(
+        self,
+        filename: str,
+        size: int,
+        content_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Start a resumable upload.
+
+        Args:
+            filename: Name of the file being uploaded
+            size: Total size of the file in bytes
+            content_type: Optional MIME type of the file
+
+        Returns:
+            The upload status, see status()
+        """
+        if size <= 0 or size > settings.MAX_CONTENT_LENGTH:
+            raise UploadError(f"File size must be between 1 and {settings.MAX_CONTENT_LENGTH} bytes")
+
+        filename = Path(filename).name
+        upload_id = uuid.uuid4()
+        object_name = file_service.original_path(upload_id, filename)
+        session = {
+            "upload_id": str(upload_id),
+            "filename": filename,
+            "content_type": content_type or mimetypes.guess_type(filename)[0] or "",
+            "size": size,
+            "object_name": object_name,
+            "multipart_id": await storage.create_multipart_upload_async(object_name, content_type),
+        }
+        await self._save(session)
+        return self._status(session, [])
+
+    async def upload_part(self, upload_id: str, part_number: int, data: bytes) -> Dict[str, Any]:
+        """
+        Store one part of an upload. Re-sending a part replaces it.
+
+        Args:
+            upload_id: ID returned by create()
+            part_number: 1-based part number
+            data: Part contents
+
+        Returns:
+            Dict with part_number, etag and size
+        """
+        session = await self._load(upload_id)
+        if not 1 <= part_number <= 10000:
+            raise UploadError("Part number must be between 1 and 10000")
+        if not data or len(data) > settings.UPLOAD_MAX_PART_SIZE:
+            raise UploadError(f"Part size must be between 1 and {settings.UPLOAD_MAX_PART_SIZE} bytes")
+
+        etag = await storage.upload_part_async(
+            session["object_name"], session["multipart_id"], part_number, data
+        )
+        # Keep the session alive while the client is making progress
+        await self.redis.expire(self.PREFIX + upload_id, self.ttl)
+        return {"part_number": part_number, "etag": etag, "size": len(data)}
+
+    async def status(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Report which parts have been received.
+
+        Returns:
+            Dict with the session details, received parts and offset, the
+            number of contiguous bytes received from the start of the file
+        """
+        session = await self._load(upload_id)
+        parts = await storage.list_parts_async(session["object_name"], session["multipart_id"])
+        return self._status(session, parts)
+
+    async def complete(self, upload_id: str, db: AsyncSession) -> File:
+        """
+        Assemble the parts and create the file record.
+
+        The caller schedules file_service.process_stored_upload to convert it.
+
+        Args:
+            upload_id: ID returned by create()
+            db: Database session
+
+        Returns:
+            The new file record, in PROCESSING state
+        """
+        session = await self._load(upload_id)
+        parts = await storage.list_parts_async(session["object_name"], session["multipart_id"])
+
+        numbers = [part["part_number"] for part in parts]
+        if numbers != list(range(1, len(parts) + 1)):
+            raise UploadError("Parts must be numbered 1..n without gaps")
+        if any(part["size"] < MIN_PART_SIZE for part in parts[:-1]):
+            raise UploadError(f"Every part but the last must be at least {MIN_PART_SIZE} bytes")
+        received = sum(part["size"] for part in parts)
+        if received != session["size"]:
+            raise UploadError(f"Received {received} of {session['size']} bytes")
+
+        await storage.complete_multipart_upload_async(
+            session["object_name"], session["multipart_id"], parts
+        )
+        await self.redis.delete(self.PREFIX + upload_id)
+
+        file_record = File(
+            id=uuid.UUID(upload_id),
+            filename=session["filename"],
+            original_type=session["content_type"],
+            file_size=received,
+            original_path=session["object_name"],
+            status=FileStatus.PROCESSING
+        )
+        job_leases.claim(file_record)
+        db.add(file_record)
+        await db.commit()
+        return file_record
+
+    async def abort(self, upload_id: str) -> None:
+        """Cancel an upload and discard its parts."""
+        session = await self._load(upload_id)
+        try:
+            await storage.abort_multipart_upload_async(session["object_name"], session["multipart_id"])
+        finally:
+            await self.redis.delete(self.PREFIX + upload_id)
+
+    async def _save(self, session: Dict[str, Any]) -> None:
+        await self.redis.set(self.PREFIX + session["upload_id"], json.dumps(session), ex=self.ttl)
+
+    async def _load(self, upload_id: str) -> Dict[str, Any]:
+        value = await self.redis.get(self.PREFIX + upload_id)
+        if not value:
+            raise UploadNotFoundError(f"Upload not found or expired: {upload_id}")
+        return json.loads(value)
+
+    def _status(self, session: Dict[str, Any], parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        offset = 0
+        for expected, part in enumerate(parts, start=1):
+            if part["part_number"] != expected:
+                break
+            offset += part["size"]
+        return {
+            "upload_id": session["upload_id"],
+            "filename": session["filename"],
+            "size": session["size"],
+            "part_size": settings.UPLOAD_PART_SIZE,
+            "offset": offset,
+            "parts": parts,
+        }
+
+class UploadError(Exception):
+    """Raised when a resumable upload request is invalid."""
+    pass
+
+class UploadNotFoundError(Exception):
+    """Raised when an upload session does not exist or has expired."""
+    pass
+
+# Create a singleton instance
+resumable_uploads = ResumableUploads()
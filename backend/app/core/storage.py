@@ -1,22 +1,54 @@
 from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import Part
 from minio.error import S3Error
-from typing import Optional, BinaryIO
+from typing import Optional, BinaryIO, Awaitable, Callable, Dict, Any, Iterator, List, Tuple, TypeVar
 from pathlib import Path
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+import asyncio
 from .config import settings
+from .cache import ContentCache
+from ..utils import jsoncodec
+from ..utils.compression import compress, compress_stream, decompress, CompressionError
+
+T = TypeVar("T")
+
+# User metadata key recording how an object body is compressed
+COMPRESSION_META_KEY = "x-amz-meta-compression"
 
 class StorageService:
     """Service for handling file storage operations using MinIO."""
     
     def __init__(self):
-        self.client = Minio(
-            f"{settings.MINIO_HOST}:{settings.MINIO_PORT}",
-            access_key=settings.MINIO_ROOT_USER,
-            secret_key=settings.MINIO_ROOT_PASSWORD,
-            secure=False  # Set to True if using HTTPS
-        )
+        # The MinIO client is created on first use; see warmup()
+        self._client: Optional[Minio] = None
         self.bucket_name = settings.MINIO_BUCKET
+        # Bounded pool for running blocking MinIO calls off the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_MAX_WORKERS,
+            thread_name_prefix="storage"
+        )
+        self.cache = ContentCache()
+
+    @property
+    def client(self) -> Minio:
+        """MinIO client, created on first use."""
+        if self._client is None:
+            self._client = Minio(
+                f"{settings.MINIO_HOST}:{settings.MINIO_PORT}",
+                access_key=settings.MINIO_ROOT_USER,
+                secret_key=settings.MINIO_ROOT_PASSWORD,
+                secure=False  # Set to True if using HTTPS
+            )
+        return self._client
+
+    def warmup(self) -> None:
+        """Create the client, make sure the bucket exists and follow cache invalidations."""
         self._ensure_bucket_exists()
+        self.cache.start()
 
     def _ensure_bucket_exists(self):
         """Ensure the storage bucket exists, create if it doesn't."""
@@ -50,6 +82,7 @@ class StorageService:
                 str(file_path),
                 content_type=content_type
             )
+            self.cache.invalidate(object_name)
             return object_name
         except S3Error as e:
             raise StorageError(f"Failed to save file: {str(e)}")
@@ -63,6 +96,12 @@ class StorageService:
         """
         Save content directly to storage.
         
+        Content is compressed according to STORAGE_COMPRESSION; the codec
+        is recorded in the object metadata so get_file can decompress it
+        transparently. File-like content, such as rendered artifacts, is
+        compressed and uploaded as a stream, so large outputs are never
+        held in memory as a whole.
+        
         Args:
             content: The content to save
             object_name: Name to save the content as in storage
@@ -71,69 +110,113 @@ class StorageService:
         Returns:
             The object name/path in storage
         """
+        body = None
         try:
             # Convert string content to bytes if needed
             if isinstance(content, str):
                 content = content.encode('utf-8')
             
-            # Convert bytes to file-like object if needed
+            # Compress and wrap bytes, or compress a file into a spool
             if isinstance(content, bytes):
-                from io import BytesIO
-                content = BytesIO(content)
+                compressed, metadata = self._compress(content)
+                body = BytesIO(compressed)
+            else:
+                body, metadata = self._compress_file(content)
             
             # Get content length
-            content.seek(0, 2)  # Seek to end
-            content_length = content.tell()
-            content.seek(0)  # Reset to beginning
+            body.seek(0, 2)  # Seek to end
+            content_length = body.tell()
+            body.seek(0)  # Reset to beginning
             
             self.client.put_object(
                 self.bucket_name,
                 object_name,
-                content,
+                body,
                 content_length,
-                content_type=content_type
+                content_type=content_type,
+                metadata=metadata
             )
+            self.cache.invalidate(object_name)
             return object_name
-        except S3Error as e:
+        except (S3Error, CompressionError) as e:
             raise StorageError(f"Failed to save content: {str(e)}")
+        finally:
+            # Close spools and buffers we made, never the caller's file
+            if body is not None and body is not content:
+                body.close()
 
-    def save_json(self, data: dict, object_name: str) -> str:
+    def _compress(self, content: bytes) -> Tuple[bytes, Optional[dict]]:
+        """Compress content per settings, returning bytes and object metadata."""
+        encoding = settings.STORAGE_COMPRESSION
+        if encoding == "none" or len(content) < settings.STORAGE_COMPRESSION_MIN_SIZE:
+            return content, None
+        
+        compressed = compress(content, encoding, settings.STORAGE_COMPRESSION_LEVEL)
+        return compressed, {
+            COMPRESSION_META_KEY: encoding,
+            "x-amz-meta-uncompressed-size": str(len(content)),
+        }
+
+    def _compress_file(self, content: BinaryIO) -> Tuple[BinaryIO, Optional[dict]]:
+        """Compress a file per settings into a spool, returning it and object metadata."""
+        content.seek(0, 2)
+        size = content.tell()
+        content.seek(0)
+        encoding = settings.STORAGE_COMPRESSION
+        if encoding == "none" or size < settings.STORAGE_COMPRESSION_MIN_SIZE:
+            return content, None
+        
+        spool = SpooledTemporaryFile(max_size=settings.STORAGE_SPOOL_MAX_SIZE)
+        try:
+            compress_stream(content, spool, size, encoding, settings.STORAGE_COMPRESSION_LEVEL)
+        except Exception:
+            spool.close()
+            raise
+        return spool, {
+            COMPRESSION_META_KEY: encoding,
+            "x-amz-meta-uncompressed-size": str(size),
+        }
+
+    def get_file(self, object_name: str) -> bytes:
         """
-        Save JSON data to storage.
+        Retrieve a file from storage, decompressing it if needed.
         
         Args:
-            data: The JSON data to save
-            object_name: Name to save the JSON as in storage
+            object_name: Name of the file in storage
             
         Returns:
-            The object name/path in storage
+            The file contents as bytes
         """
+        content, encoding = self.get_file_raw(object_name)
         try:
-            json_str = json.dumps(data, ensure_ascii=False, indent=2)
-            return self.save_content(
-                json_str,
-                object_name,
-                content_type="application/json"
-            )
-        except Exception as e:
-            raise StorageError(f"Failed to save JSON: {str(e)}")
+            return decompress(content, encoding)
+        except (CompressionError, OSError, EOFError) as e:
+            raise StorageError(f"Failed to decompress file: {str(e)}")
 
-    def get_file(self, object_name: str) -> bytes:
+    def get_file_raw(self, object_name: str) -> Tuple[bytes, Optional[str]]:
         """
-        Retrieve a file from storage.
+        Retrieve a file from storage exactly as stored.
+        
+        Reads go through the content cache before hitting MinIO.
         
         Args:
             object_name: Name of the file in storage
             
         Returns:
-            The file contents as bytes
+            Tuple of (stored bytes, compression encoding or None)
         """
+        cached = self.cache.get(object_name)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.get_object(
                 self.bucket_name,
                 object_name
             )
-            return response.read()
+            entry = (response.read(), response.headers.get(COMPRESSION_META_KEY))
+            self.cache.set(object_name, entry)
+            return entry
         except S3Error as e:
             raise StorageError(f"Failed to retrieve file: {str(e)}")
         finally:
@@ -141,6 +224,87 @@ class StorageService:
                 response.close()
                 response.release_conn()
 
+    def copy_file(self, source_name: str, object_name: str) -> str:
+        """
+        Copy an object server-side, keeping its metadata.
+        
+        Args:
+            source_name: Name of the object to copy
+            object_name: Name of the new object
+            
+        Returns:
+            The new object name/path in storage
+        """
+        try:
+            self.client.copy_object(
+                self.bucket_name,
+                object_name,
+                CopySource(self.bucket_name, source_name)
+            )
+            self.cache.invalidate(object_name)
+            return object_name
+        except S3Error as e:
+            raise StorageError(f"Failed to copy file: {str(e)}")
+
+    def stat_file(self, object_name: str) -> Dict[str, Any]:
+        """
+        Retrieve object information without reading its body.
+        
+        Args:
+            object_name: Name of the file in storage
+            
+        Returns:
+            Dict with size, etag, content_type and compression encoding
+        """
+        try:
+            stat = self.client.stat_object(self.bucket_name, object_name)
+            return {
+                "size": stat.size,
+                "etag": stat.etag,
+                "content_type": stat.content_type,
+                "encoding": stat.metadata.get(COMPRESSION_META_KEY),
+            }
+        except S3Error as e:
+            raise StorageError(f"Failed to stat file: {str(e)}")
+
+    def stream_file(
+        self,
+        object_name: str,
+        offset: int = 0,
+        length: int = 0,
+        chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        """
+        Stream a file, or a byte range of it, from storage as stored.
+        
+        Bypasses the content cache so large artifacts are never held in
+        memory as a whole.
+        
+        Args:
+            object_name: Name of the file in storage
+            offset: Start of the byte range
+            length: Length of the byte range, 0 for the rest of the object
+            chunk_size: Size of the chunks yielded
+            
+        Yields:
+            Chunks of the stored bytes
+        """
+        try:
+            response = self.client.get_object(
+                self.bucket_name,
+                object_name,
+                offset=offset,
+                length=length
+            )
+        except S3Error as e:
+            raise StorageError(f"Failed to retrieve file: {str(e)}")
+        
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
     def get_json(self, object_name: str) -> dict:
         """
         Retrieve JSON data from storage.
@@ -152,8 +316,7 @@ class StorageService:
             The parsed JSON data
         """
         try:
-            content = self.get_file(object_name)
-            return json.loads(content)
+            return jsoncodec.loads(self.get_file(object_name))
         except Exception as e:
             raise StorageError(f"Failed to retrieve JSON: {str(e)}")
 
@@ -166,9 +329,241 @@ class StorageService:
         """
         try:
             self.client.remove_object(self.bucket_name, object_name)
+            self.cache.invalidate(object_name)
         except S3Error as e:
             raise StorageError(f"Failed to delete file: {str(e)}")
 
+    # The multipart methods below use the minio client's private multipart
+    # calls, which the public API does not expose; minio is pinned to an
+    # exact version in requirements.txt so they cannot change underneath us
+    def create_multipart_upload(
+        self,
+        object_name: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Start a multipart upload whose parts are sent with upload_part.
+        
+        Configure an AbortIncompleteMultipartUpload lifecycle rule on the
+        bucket so parts of abandoned uploads are eventually reclaimed.
+        
+        Args:
+            object_name: Name of the object being assembled
+            content_type: Optional MIME type of the object
+            
+        Returns:
+            The multipart upload ID
+        """
+        try:
+            return self.client._create_multipart_upload(
+                self.bucket_name,
+                object_name,
+                {"Content-Type": content_type or "application/octet-stream"}
+            )
+        except S3Error as e:
+            raise StorageError(f"Failed to start multipart upload: {str(e)}")
+
+    def upload_part(
+        self,
+        object_name: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes
+    ) -> str:
+        """
+        Upload one part of a multipart upload, replacing any earlier upload of it.
+        
+        Returns:
+            The ETag of the part
+        """
+        try:
+            return self.client._upload_part(
+                self.bucket_name, object_name, data, None, upload_id, part_number
+            )
+        except S3Error as e:
+            raise StorageError(f"Failed to upload part {part_number}: {str(e)}")
+
+    def list_parts(self, object_name: str, upload_id: str) -> List[Dict[str, Any]]:
+        """
+        List the parts received so far for a multipart upload.
+        
+        Returns:
+            Dicts with part_number, etag and size, in part order
+        """
+        parts = []
+        marker = None
+        try:
+            while True:
+                result = self.client._list_parts(
+                    self.bucket_name, object_name, upload_id, part_number_marker=marker
+                )
+                parts.extend(
+                    {"part_number": part.part_number, "etag": part.etag, "size": part.size}
+                    for part in result.parts
+                )
+                if not result.is_truncated:
+                    return parts
+                marker = result.next_part_number_marker
+        except S3Error as e:
+            raise StorageError(f"Failed to list parts: {str(e)}")
+
+    def complete_multipart_upload(
+        self,
+        object_name: str,
+        upload_id: str,
+        parts: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Assemble the uploaded parts into the final object.
+        
+        Args:
+            object_name: Name of the object being assembled
+            upload_id: The multipart upload ID
+            parts: Parts as returned by list_parts
+            
+        Returns:
+            The object name/path in storage
+        """
+        try:
+            self.client._complete_multipart_upload(
+                self.bucket_name,
+                object_name,
+                upload_id,
+                [Part(part["part_number"], part["etag"]) for part in parts]
+            )
+            self.cache.invalidate(object_name)
+            return object_name
+        except S3Error as e:
+            raise StorageError(f"Failed to complete multipart upload: {str(e)}")
+
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> None:
+        """Discard a multipart upload and the parts received for it."""
+        try:
+            self.client._abort_multipart_upload(self.bucket_name, object_name, upload_id)
+        except S3Error as e:
+            raise StorageError(f"Failed to abort multipart upload: {str(e)}")
+
+    def queue_depth(self) -> int:
+        """Number of storage calls waiting for a pool thread."""
+        return self._executor._work_queue.qsize()
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking storage call in the storage thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            partial(func, *args, **kwargs)
+        )
+
+    async def save_file_async(
+        self,
+        file_path: str | Path,
+        object_name: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """Async variant of save_file."""
+        return await self._run(self.save_file, file_path, object_name, content_type)
+
+    async def save_content_async(
+        self,
+        content: str | bytes | BinaryIO,
+        object_name: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """Async variant of save_content."""
+        return await self._run(self.save_content, content, object_name, content_type)
+
+    async def copy_file_async(self, source_name: str, object_name: str) -> str:
+        """Async variant of copy_file."""
+        return await self._run(self.copy_file, source_name, object_name)
+
+    async def get_file_async(self, object_name: str) -> bytes:
+        """Async variant of get_file."""
+        return await self._run(self.get_file, object_name)
+
+    async def stat_file_async(self, object_name: str) -> Dict[str, Any]:
+        """Async variant of stat_file."""
+        return await self._run(self.stat_file, object_name)
+
+    async def get_json_async(self, object_name: str) -> dict:
+        """Async variant of get_json."""
+        return await self._run(self.get_json, object_name)
+
+    async def delete_file_async(self, object_name: str) -> None:
+        """Async variant of delete_file."""
+        return await self._run(self.delete_file, object_name)
+
+    async def create_multipart_upload_async(
+        self,
+        object_name: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """Async variant of create_multipart_upload."""
+        return await self._run(self.create_multipart_upload, object_name, content_type)
+
+    async def upload_part_async(
+        self,
+        object_name: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes
+    ) -> str:
+        """Async variant of upload_part."""
+        return await self._run(self.upload_part, object_name, upload_id, part_number, data)
+
+    async def list_parts_async(self, object_name: str, upload_id: str) -> List[Dict[str, Any]]:
+        """Async variant of list_parts."""
+        return await self._run(self.list_parts, object_name, upload_id)
+
+    async def complete_multipart_upload_async(
+        self,
+        object_name: str,
+        upload_id: str,
+        parts: List[Dict[str, Any]]
+    ) -> str:
+        """Async variant of complete_multipart_upload."""
+        return await self._run(self.complete_multipart_upload, object_name, upload_id, parts)
+
+    async def abort_multipart_upload_async(self, object_name: str, upload_id: str) -> None:
+        """Async variant of abort_multipart_upload."""
+        return await self._run(self.abort_multipart_upload, object_name, upload_id)
+
+    async def save_all(
+        self,
+        *uploads: Awaitable[str],
+        cleanup: bool = True
+    ) -> List[str]:
+        """
+        Run several uploads concurrently.
+        
+        All uploads are awaited before returning. If any of them fails, the
+        first error is raised and, with cleanup enabled, the objects that were
+        written are removed again so no partial artifacts are left behind.
+        
+        Args:
+            uploads: Awaitables returning the saved object names
+            cleanup: Whether to remove written objects when an upload fails
+            
+        Returns:
+            The saved object names, in the order given
+        """
+        results = await asyncio.gather(*uploads, return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if not errors:
+            return results
+        
+        if cleanup:
+            for object_name in results:
+                if isinstance(object_name, str):
+                    try:
+                        await self.delete_file_async(object_name)
+                    except StorageError as e:
+                        print(f"Error removing partial upload {object_name}: {e}")
+        
+        if isinstance(errors[0], StorageError):
+            raise errors[0]
+        raise StorageError(f"Failed to save artifacts: {str(errors[0])}")
+
 class StorageError(Exception):
     """Custom exception for storage operations."""
     pass
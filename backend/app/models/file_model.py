@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from uuid import UUID, uuid4
 
@@ -10,25 +11,55 @@ class FileStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class ContentStage(str, Enum):
+    """Which conversion the stored content comes from."""
+    PREVIEW = "preview"
+    FULL = "full"
+
 class FileBase(SQLModel):
     filename: str
     original_type: str
     file_size: int
     status: FileStatus = Field(default=FileStatus.PENDING)
+    content_hash: Optional[str] = Field(default=None, index=True)
+    batch_id: Optional[UUID] = Field(default=None, index=True)
+    conversion_key: Optional[str] = None
     error_message: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = Field(default=None, sa_column=Field(JSON))
+    original_path: Optional[str] = None
     markdown_path: Optional[str] = None
     json_path: Optional[str] = None
+    metadata_path: Optional[str] = None
+    intermediate_path: Optional[str] = None
+    profile_path: Optional[str] = None
+    # Preview of the first pages, served until the full conversion finishes
+    content_stage: Optional[ContentStage] = None
+    preview_markdown_path: Optional[str] = None
+    preview_json_path: Optional[str] = None
     page_count: Optional[int] = None
     word_count: Optional[int] = None
     chunk_count: Optional[int] = None
+    # Peak resource usage of the extraction job
+    peak_memory_mb: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    wall_seconds: Optional[float] = None
 
 class File(FileBase, table=True):
     __tablename__ = "files"
+    # Keyset pagination indexes, optionally narrowed by status or type
+    __table_args__ = (
+        Index("idx_files_created_at_id", "created_at", "id"),
+        Index("idx_files_status_created_at_id", "status", "created_at", "id"),
+        Index("idx_files_type_created_at_id", "original_type", "created_at", "id"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Worker lease on unfinished files, see core/leases.py
+    lease_owner: Optional[str] = Field(default=None, index=True)
+    lease_expires_at: Optional[datetime] = None
+    retries: int = 0
 
 class ChunkBase(SQLModel):
     file_id: UUID = Field(foreign_key="files.id")
@@ -62,6 +93,54 @@ class FileResponse(FileBase):
     created_at: datetime
     updated_at: datetime
 
+class FileSummary(SQLModel):
+    """Lightweight projection of a file row that never loads metadata."""
+    id: UUID
+    filename: str
+    original_type: str
+    file_size: int
+    status: FileStatus
+    content_stage: Optional[ContentStage] = None
+    error_message: Optional[str] = None
+    page_count: Optional[int] = None
+    word_count: Optional[int] = None
+    chunk_count: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+class FileListResponse(SQLModel):
+    items: List[FileSummary]
+    next_cursor: Optional[str] = None
+
+class UploadCreate(SQLModel):
+    """Request to start a resumable upload."""
+    filename: str
+    size: int
+    content_type: Optional[str] = None
+
+class UploadPart(SQLModel):
+    part_number: int
+    etag: str
+    size: int
+
+class UploadStatus(SQLModel):
+    """State of a resumable upload; offset counts contiguous bytes received."""
+    upload_id: UUID
+    filename: str
+    size: int
+    part_size: int
+    offset: int
+    parts: List[UploadPart]
+
+class BatchResponse(SQLModel):
+    """Aggregate progress of a batch upload."""
+    batch_id: UUID
+    total: int
+    pending: int = 0
+    processing: int = 0
+    completed: int = 0
+    failed: int = 0
+
 class ChunkResponse(ChunkBase):
     id: UUID
     created_at: datetime
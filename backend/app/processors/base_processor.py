@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Tuple, List
+from typing import AsyncIterator, Dict, Any, Optional, Callable, Awaitable
 from pathlib import Path
 from ..models.file_model import File
+from ..core.config import settings
+from ..core.metrics import track_stage
+from ..utils.blocks import Block
+from ..utils.chunker import DocumentChunker
+from ..utils.intermediate import new_document
+from ..utils.sinks import MarkdownSink, render_blocks
+from ..utils.writers import JsonSink, RenderedDocument, TextWriter, new_spool
 
 class BaseProcessor(ABC):
     """
@@ -9,74 +16,171 @@ class BaseProcessor(ABC):
     All specific file type processors must inherit from this class.
     """
     
+    # Bump when a processor's output changes, to invalidate cached conversions
+    VERSION = "1"
+    
+    # Whether extraction honours preview_limits and stops early
+    SUPPORTS_PREVIEW = False
+    
     def __init__(self, file_path: str, file_info: File):
         self.file_path = Path(file_path)
         self.file_info = file_info
+        # Optional async hook receiving (stage, done, total) progress updates
+        self.progress_callback: Optional[
+            Callable[[str, int, Optional[int]], Awaitable[None]]
+        ] = None
+        # Caps on pages, rows or cells, e.g. {"pages": 5000}; see enforce_limit
+        self.unit_limits: Dict[str, int] = {}
+        # Only extract this many pages, rows or paragraphs, for a preview
+        self.preview_limits: Dict[str, int] = {}
         if not self.file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-    @abstractmethod
-    async def extract_text(self) -> str:
-        """Extract raw text content from the file."""
-        pass
+    async def report_progress(
+        self,
+        stage: str,
+        done: int,
+        total: Optional[int] = None
+    ) -> None:
+        """Report progress of a processing stage, e.g. pages or rows done."""
+        if self.progress_callback is not None:
+            await self.progress_callback(stage, done, total)
 
-    @abstractmethod
-    async def extract_metadata(self) -> Dict[str, Any]:
-        """Extract metadata from the file."""
-        pass
+    def enforce_limit(self, unit: str, count: int) -> None:
+        """
+        Fail the job if the file has more pages, rows or cells than allowed.
+        
+        Processors call this as soon as they know a count, before doing
+        the work, so oversized files fail fast.
+        
+        Args:
+            unit: 'pages', 'rows' or 'cells'
+            count: Number of units in the file, or processed so far
+        """
+        limit = self.unit_limits.get(unit)
+        if limit and count > limit:
+            raise ResourceLimitExceeded(unit, f"{count} {unit} exceeds the limit of {limit}")
+
+    def preview_limit(self, unit: str) -> Optional[int]:
+        """Number of pages, rows or paragraphs to stop after, or None for all."""
+        return self.preview_limits.get(unit) or None
 
     @abstractmethod
-    async def get_positions(self) -> List[Dict[str, Any]]:
-        """Get positions of text elements in the document."""
+    async def iter_blocks(self) -> AsyncIterator[Block]:
+        """
+        Yield the file's blocks in reading order, reading the file once.
+        
+        Metadata found along the way, such as document properties and
+        counts, goes into ``self.metadata``, which is complete once the
+        stream ends.
+        """
         pass
 
-    async def process(self) -> Tuple[str, str, Dict[str, Any]]:
+    async def extract_document(self) -> Dict[str, Any]:
         """
-        Process the file and return markdown, JSON, and metadata.
+        Run the extraction stage and return the intermediate document.
+
+        The result holds everything needed to render markdown, JSON and
+        chunks, so it can be persisted and re-rendered without re-extraction.
+        """
+        name = type(self).__name__
+        self.metadata: Dict[str, Any] = {}
+        
+        blocks = []
+        with track_stage("extract_blocks", name):
+            async for block in self.iter_blocks():
+                blocks.append(block)
+        
+        return new_document(blocks, self.metadata, name)
+
+    async def process(self) -> RenderedDocument:
+        """
+        Process the file and return its rendered markdown, JSON and metadata.
+        
+        The extracted intermediate document is kept on ``self.document``.
         
         Returns:
-            Tuple containing:
-            - Markdown content (str)
-            - JSON content (str)
-            - Metadata (Dict[str, Any])
+            The rendered document; the caller closes it
         """
         try:
-            # Extract text and metadata
-            text = await self.extract_text()
-            metadata = await self.extract_metadata()
-            positions = await self.get_positions()
-            
-            # Add positions to metadata
-            metadata["positions"] = positions
-            
-            # Generate markdown
-            markdown = self.text_to_markdown(text, metadata)
-            
-            # Generate JSON
-            json_content = {
-                "content": text,
-                "metadata": metadata
-            }
-            
-            return markdown, json_content, metadata
+            self.document = await self.extract_document()
+            return self.render(self.document)
             
+        except ResourceLimitExceeded:
+            raise
         except Exception as e:
             raise ProcessingError(f"Error processing file: {str(e)}")
 
-    def text_to_markdown(self, text: str, metadata: Dict[str, Any]) -> str:
-        """Convert text content to markdown format with metadata."""
-        # Add metadata as YAML front matter
-        markdown = "---\n"
-        for key, value in metadata.items():
-            if key != "positions":  # Skip positions in front matter
-                markdown += f"{key}: {value}\n"
-        markdown += "---\n\n"
+    @classmethod
+    def render(
+        cls,
+        document: Dict[str, Any],
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None
+    ) -> RenderedDocument:
+        """
+        Render markdown, JSON and chunks from an intermediate document.
         
-        # Add content
-        markdown += text
+        Every output is written as the blocks are read, into spooled temp
+        files that stay in memory up to STORAGE_SPOOL_MAX_SIZE.
         
-        return markdown
+        Args:
+            document: Intermediate document produced by extract_document
+            chunk_size: Maximum chunk size, defaults to settings
+            chunk_overlap: Chunk overlap, defaults to settings
+            
+        Returns:
+            The rendered document; the caller closes it
+        """
+        metadata = dict(document["metadata"])
+        chunker = DocumentChunker(
+            max_chunk_size=chunk_size or settings.DEFAULT_CHUNK_SIZE,
+            overlap=chunk_overlap if chunk_overlap is not None else settings.DEFAULT_CHUNK_OVERLAP
+        )
+        
+        spool_size = settings.STORAGE_SPOOL_MAX_SIZE
+        files = [new_spool(spool_size) for _ in range(3)]
+        markdown_file, json_file, metadata_file = files
+        markdown = TextWriter(markdown_file)
+        json_sink = JsonSink(json_file, metadata, chunker, spool_size, metadata_file)
+        
+        # One pass over the blocks feeds every output format
+        try:
+            with track_stage("render", cls.__name__):
+                render_blocks(
+                    document["blocks"],
+                    [MarkdownSink(metadata, markdown.write), json_sink]
+                )
+        except Exception:
+            for file in files:
+                file.close()
+            raise
+        
+        for file in files:
+            file.seek(0)
+        return RenderedDocument(
+            markdown=markdown_file,
+            json=json_file,
+            metadata_json=metadata_file,
+            metadata=metadata,
+            word_count=markdown.word_count,
+            chunk_count=json_sink.chunk_count
+        )
 
 class ProcessingError(Exception):
     """Custom exception for processing errors."""
     pass
+
+class ResourceLimitExceeded(ProcessingError):
+    """Raised when a job goes over a memory, CPU, time or size limit."""
+    
+    def __init__(
+        self,
+        resource: str,
+        detail: str,
+        usage: Optional[Dict[str, Optional[float]]] = None
+    ):
+        super().__init__(f"Resource limit exceeded ({resource}): {detail}")
+        self.resource = resource
+        self.detail = detail
+        self.usage = usage or {}
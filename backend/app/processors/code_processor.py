@@ -1,14 +1,13 @@
-from typing import Dict, Any, BinaryIO
+from typing import AsyncIterator, Dict, Any, Iterator
 import re
-from pygments import highlight
-from pygments.lexers import get_lexer_for_filename, TextLexer
-from pygments.formatters import MarkdownFormatter
 from .base_processor import BaseProcessor
-from ..utils.chunker import DocumentChunker
+from ..utils.blocks import Block, code_block
 
 class CodeProcessor(BaseProcessor):
-    """Processor for source code files with syntax highlighting."""
-
+    """Processor for source code files, split into definitions where the language allows."""
+    
+    VERSION = "2"
+    
     # Map of file extensions to language names
     LANGUAGE_MAP = {
         # Common programming languages
@@ -56,53 +55,45 @@ class CodeProcessor(BaseProcessor):
         # Database
         'sql': 'sql',
     }
+    
+    # Top-level definitions, for languages that are chunked by definition
+    DEFINITION_PATTERNS = {
+        'python': r'^(?:def|class)\s+\w+[^\n]*(?:\n(?:[ \t].*|$))*',
+        'javascript': r'^(?:function|class|const\s+\w+\s*=\s*(?:async\s*)?\()[^\n]*(?:\n(?:[ \t].*|$))*',
+        'typescript': r'^(?:function|class|const\s+\w+\s*=\s*(?:async\s*)?\()[^\n]*(?:\n(?:[ \t].*|$))*',
+        'java': r'^(?:public|private|protected|class)\s+[^\n]*(?:\n(?:[ \t].*|$))*',
+    }
 
-    def __init__(self):
-        super().__init__()
-        self.chunker = DocumentChunker(max_chunk_size=2000)  # Larger chunks for code
-
-    def process(self, file: BinaryIO) -> Dict[str, Any]:
-        """Process a code file and extract its content with metadata."""
-        # Read code content
+    async def iter_blocks(self) -> AsyncIterator[Block]:
+        # Source files are small, so the file is decoded once and scanned in memory
+        raw = self.file_path.read_bytes()
         try:
-            code_content = file.read().decode('utf-8')
+            content = raw.decode('utf-8')
+            encoding = 'utf-8'
         except UnicodeDecodeError:
             # Fallback to latin-1 if utf-8 fails
-            file.seek(0)
-            code_content = file.read().decode('latin-1')
+            content = raw.decode('latin-1')
+            encoding = 'latin-1'
         
         # Clean and normalize line endings
-        code_content = self._normalize_line_endings(code_content)
+        content = self._normalize_line_endings(content)
+        language = self.LANGUAGE_MAP.get(self.file_path.suffix.lower().lstrip('.'), 'text')
         
-        # Extract metadata
-        metadata = self._extract_metadata(code_content)
+        self.metadata.update(self._extract_metadata(content, language))
+        self.metadata['encoding'] = encoding
         
-        # Generate chunks (by logical blocks)
-        chunks = self._chunk_code(code_content, metadata)
-        
-        # Convert to markdown with syntax highlighting
-        markdown_content = self._convert_to_markdown(code_content, metadata['language'])
-        
-        return {
-            'content': code_content,
-            'markdown': markdown_content,
-            'metadata': metadata,
-            'chunks': chunks
-        }
+        for block in self._split_by_definitions(content, language):
+            yield block
 
     def _normalize_line_endings(self, text: str) -> str:
         """Normalize line endings to Unix style."""
         return text.replace('\r\n', '\n').replace('\r', '\n')
 
-    def _extract_metadata(self, content: str) -> Dict[str, Any]:
+    def _extract_metadata(self, content: str, language: str) -> Dict[str, Any]:
         """Extract metadata from code content."""
         lines = content.split('\n')
         non_empty_lines = [line for line in lines if line.strip()]
         
-        # Detect language from file extension
-        file_ext = self._get_file_extension()
-        language = self.LANGUAGE_MAP.get(file_ext.lower(), 'text')
-        
         # Calculate code metrics
         return {
             'language': language,
@@ -112,7 +103,6 @@ class CodeProcessor(BaseProcessor):
             'char_count': len(content),
             'average_line_length': sum(len(line) for line in non_empty_lines) / (len(non_empty_lines) or 1),
             'has_shebang': content.startswith('#!'),
-            'encoding': 'utf-8',
             'functions': self._count_functions(content, language),
             'classes': self._count_classes(content, language),
             'comments': self._count_comments(content, language)
@@ -171,97 +161,38 @@ class CodeProcessor(BaseProcessor):
             'multi_line': len(re.findall(multi_pattern, content))
         }
 
-    def _chunk_code(self, content: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Chunk code into logical blocks (e.g., functions, classes, or sections).
-        Falls back to chunker for languages without specific chunking rules.
+    def _split_by_definitions(self, content: str, language: str) -> Iterator[Block]:
         """
-        language = metadata['language']
+        Split code into spans at function/class definitions.
         
-        # For supported languages, try to chunk by logical blocks
-        if language in ['python', 'javascript', 'typescript', 'java']:
-            chunks = self._chunk_by_definitions(content, language)
-            if chunks:
-                return chunks
-        
-        # Fallback to regular chunking
-        return self.chunker.chunk_text(content, metadata)
-
-    def _chunk_by_definitions(self, content: str, language: str) -> List[Dict[str, Any]]:
-        """Attempt to chunk code by function/class definitions."""
-        chunks = []
-        
-        # Pattern to match function/class definitions
-        if language == 'python':
-            pattern = r'^(?:def|class)\s+\w+[^\n]*(?:\n(?:[ \t].*|$))*'
-        elif language in ['javascript', 'typescript']:
-            pattern = r'^(?:function|class|const\s+\w+\s*=\s*(?:async\s*)?\()[^\n]*(?:\n(?:[ \t].*|$))*'
-        elif language == 'java':
-            pattern = r'^(?:public|private|protected|class)\s+[^\n]*(?:\n(?:[ \t].*|$))*'
-        else:
-            return []
+        The spans are exact slices of the content, so together they are the
+        whole file. Languages without a definition pattern are one span.
+        """
+        pattern = self.DEFINITION_PATTERNS.get(language)
+        if pattern is None:
+            if content:
+                yield code_block(content, language)
+            return
         
-        matches = re.finditer(pattern, content, re.MULTILINE)
+        # Line numbers are counted incrementally, from the previous span
         last_end = 0
-        
-        for match in matches:
-            # Add any content before this match as a chunk
+        line = 1
+        for match in re.finditer(pattern, content, re.MULTILINE):
+            # Any content before this definition is its own span
             if match.start() > last_end:
-                preceding = content[last_end:match.start()].strip()
-                if preceding:
-                    chunks.append({
-                        'content': preceding,
-                        'metadata': {
-                            'type': 'code_block',
-                            'start_line': content.count('\n', 0, last_end) + 1,
-                            'end_line': content.count('\n', 0, match.start()) + 1
-                        }
-                    })
+                yield code_block(content[last_end:match.start()], language, start_line=line)
+                line += content.count('\n', last_end, match.start())
             
-            # Add the matched definition as a chunk
             definition = match.group(0)
-            chunks.append({
-                'content': definition.strip(),
-                'metadata': {
-                    'type': 'definition',
-                    'name': re.match(r'^(?:def|class|function|const)?\s*(\w+)', definition).group(1),
-                    'start_line': content.count('\n', 0, match.start()) + 1,
-                    'end_line': content.count('\n', 0, match.end()) + 1
-                }
-            })
-            
+            yield code_block(
+                definition, language,
+                start_line=line,
+                name=re.match(r'^(?:def|class|function|const)?\s*(\w+)', definition).group(1),
+                kind='definition'
+            )
+            line += definition.count('\n')
             last_end = match.end()
         
         # Add any remaining content
         if last_end < len(content):
-            remaining = content[last_end:].strip()
-            if remaining:
-                chunks.append({
-                    'content': remaining,
-                    'metadata': {
-                        'type': 'code_block',
-                        'start_line': content.count('\n', 0, last_end) + 1,
-                        'end_line': content.count('\n') + 1
-                    }
-                })
-        
-        return chunks
-
-    def _convert_to_markdown(self, content: str, language: str) -> str:
-        """Convert code to markdown with syntax highlighting."""
-        try:
-            lexer = get_lexer_for_filename(f'file.{language}')
-        except:
-            lexer = TextLexer()
-        
-        formatter = MarkdownFormatter(style='monokai')
-        highlighted = highlight(content, lexer, formatter)
-        
-        # Ensure proper markdown code block formatting
-        return f'```{language}\n{content}\n```'
-
-    def _get_file_extension(self) -> str:
-        """Get the file extension from the current file."""
-        # This would typically come from the file path
-        # For now, return a default
-        return 'txt'  # This should be overridden in actual implementation
+            yield code_block(content[last_end:], language, start_line=line)
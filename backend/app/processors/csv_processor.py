@@ -1,162 +1,119 @@
-from typing import Dict, Any, BinaryIO
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, Type
 import csv
-import io
 from .base_processor import BaseProcessor
-from ..utils.chunker import DocumentChunker
+from ..utils.blocks import Block, table_row
+from ..utils.sniffing import sniff_dialect
+
+# Bytes read to detect the delimiter and quoting
+SNIFF_BYTES = 64 * 1024
+
+# Report progress every this many rows
+PROGRESS_INTERVAL = 10000
 
 class CsvProcessor(BaseProcessor):
-    def __init__(self):
-        super().__init__()
-        self.chunker = DocumentChunker(max_chunk_size=500)  # Smaller chunks for tabular data
+    """Processor for CSV files, streamed row by row into a single table."""
+    
+    VERSION = "2"
+    
+    SUPPORTS_PREVIEW = True
 
-    def process(self, file: BinaryIO) -> Dict[str, Any]:
-        """Process a CSV file and extract its content with metadata."""
-        # Read CSV content
-        text_content = file.read().decode('utf-8')
-        file.seek(0)  # Reset file pointer
-        
-        # Parse CSV
-        csv_reader = csv.reader(io.StringIO(text_content))
-        headers = next(csv_reader, [])  # Get headers
-        rows = list(csv_reader)
-        
-        # Extract metadata
-        metadata = self._extract_metadata(headers, rows)
-        
-        # Convert to markdown table
-        markdown_content = self._convert_to_markdown(headers, rows)
+    async def iter_blocks(self) -> AsyncIterator[Block]:
+        limit = self.preview_limit("rows")
         
-        # Generate chunks (chunk by groups of rows)
-        chunks = self._create_chunks(headers, rows, metadata)
-        
-        return {
-            'content': text_content,
-            'markdown': markdown_content,
-            'metadata': metadata,
-            'chunks': chunks
-        }
-
-    def _extract_metadata(self, headers: list, rows: list) -> Dict[str, Any]:
-        """Extract metadata from the CSV content."""
-        column_types = self._infer_column_types(headers, rows)
+        with open(self.file_path, 'rb') as file:
+            dialect = self._sniff(file.read(SNIFF_BYTES))
+            file.seek(0)
+            reader = csv.reader(self._decode_lines(file), dialect)
+            
+            headers = next(reader, [])
+            if headers and headers[0].startswith('\ufeff'):
+                headers[0] = headers[0][1:]
+            if headers:
+                yield table_row(headers, header=True)
+            
+            # Per-column counts for type inference, gathered as rows stream by
+            stats = [{'numeric': 0, 'date': 0, 'empty': 0, 'total': 0} for _ in headers]
+            row_count = 0
+            # Rows wider than the header widen the table rather than losing cells
+            width = len(headers)
+            total_cells = 0
+            for row in reader:
+                row_count += 1
+                width = max(width, len(row))
+                total_cells += width
+                self.enforce_limit("rows", row_count)
+                self.enforce_limit("cells", total_cells)
+                
+                for value, column in zip(row, stats):
+                    self._count_value(value, column)
+                yield table_row(row)
+                
+                if limit and row_count >= limit:
+                    self.metadata['preview_rows'] = row_count
+                    break
+                if row_count % PROGRESS_INTERVAL == 0:
+                    await self.report_progress("extract_blocks", row_count, None)
         
-        return {
-            'column_count': len(headers),
-            'row_count': len(rows),
+        self.metadata.update({
+            'column_count': width,
+            'row_count': row_count,
             'headers': headers,
-            'column_types': column_types,
+            'column_types': {
+                header: self._detect_type(column) for header, column in zip(headers, stats)
+            },
             'has_headers': bool(headers),
-            'total_cells': len(headers) * len(rows) if headers else 0
-        }
+            'total_cells': total_cells,
+            'delimiter': dialect.delimiter
+        })
 
-    def _infer_column_types(self, headers: list, rows: list) -> Dict[str, str]:
-        """Infer data types for each column."""
-        if not rows:
-            return {header: 'unknown' for header in headers}
+    @staticmethod
+    def _sniff(sample: bytes) -> Type[csv.Dialect]:
+        """Detect the dialect from the start of the file, defaulting to Excel's."""
+        return sniff_dialect(sample) or csv.excel
 
-        types = {}
-        for idx, header in enumerate(headers):
-            column_values = [row[idx] for row in rows if len(row) > idx]
-            types[header] = self._detect_type(column_values)
-        
-        return types
+    @staticmethod
+    def _decode_lines(file: BinaryIO) -> Iterator[str]:
+        """Decode lines as UTF-8, falling back to latin-1 per line."""
+        for raw in file:
+            try:
+                yield raw.decode('utf-8')
+            except UnicodeDecodeError:
+                yield raw.decode('latin-1')
 
-    def _detect_type(self, values: list) -> str:
-        """Detect the data type of a column based on its values."""
-        numeric_count = 0
-        date_count = 0
-        empty_count = 0
-        total_count = len(values)
+    @staticmethod
+    def _count_value(value: str, column: Dict[str, int]) -> None:
+        """Add one value to a column's type counts."""
+        column['total'] += 1
+        if not value.strip():
+            column['empty'] += 1
+            return
         
-        if not total_count:
-            return 'unknown'
-
-        for value in values:
-            if not value.strip():
-                empty_count += 1
-                continue
-
-            # Try numeric
-            try:
-                float(value)
-                numeric_count += 1
-                continue
-            except ValueError:
-                pass
-            
-            # Try date (basic check)
-            if any(c in value for c in ['/', '-']) and sum(c.isdigit() for c in value) > 5:
-                date_count += 1
+        # Try numeric
+        try:
+            float(value)
+            column['numeric'] += 1
+            return
+        except ValueError:
+            pass
+        
+        # Try date (basic check)
+        if any(c in value for c in ['/', '-']) and sum(c.isdigit() for c in value) > 5:
+            column['date'] += 1
 
+    @staticmethod
+    def _detect_type(column: Dict[str, int]) -> str:
+        """Detect the data type of a column from its value counts."""
+        if not column['total']:
+            return 'unknown'
+        
         # Account for empty values in determination
-        non_empty_count = total_count - empty_count
+        non_empty_count = column['total'] - column['empty']
         if non_empty_count == 0:
             return 'empty'
-            
+        
         # Determine type based on majority
-        if numeric_count / non_empty_count > 0.8:
+        if column['numeric'] / non_empty_count > 0.8:
             return 'numeric'
-        elif date_count / non_empty_count > 0.8:
+        elif column['date'] / non_empty_count > 0.8:
             return 'date'
         return 'text'
-
-    def _convert_to_markdown(self, headers: list, rows: list) -> str:
-        """Convert CSV content to Markdown table format."""
-        if not headers and not rows:
-            return ""
-
-        markdown_lines = []
-        
-        # Add headers
-        markdown_lines.append('| ' + ' | '.join(headers) + ' |')
-        
-        # Add separator with alignment
-        separators = []
-        for _ in headers:
-            separators.append('---')  # Default center alignment
-        markdown_lines.append('| ' + ' | '.join(separators) + ' |')
-        
-        # Add rows
-        for row in rows:
-            # Ensure row has same number of columns as headers
-            padded_row = row + [''] * (len(headers) - len(row))
-            # Escape pipe characters and format cells
-            escaped_row = [
-                str(cell).replace('|', '\\|')
-                    .replace('\n', '<br>')  # Handle newlines
-                    .replace('\r', '')
-                for cell in padded_row[:len(headers)]
-            ]
-            markdown_lines.append('| ' + ' | '.join(escaped_row) + ' |')
-
-        return '\n'.join(markdown_lines)
-
-    def _create_chunks(self, headers: list, rows: list, metadata: Dict[str, Any]) -> list:
-        """Create chunks from CSV data, grouping rows together."""
-        ROWS_PER_CHUNK = 25  # Smaller chunks for better readability
-        chunks = []
-        
-        for i in range(0, len(rows), ROWS_PER_CHUNK):
-            chunk_rows = rows[i:i + ROWS_PER_CHUNK]
-            
-            # Convert chunk to markdown table
-            chunk_content = self._convert_to_markdown(headers, chunk_rows)
-            
-            # Create chunk metadata
-            chunk_metadata = {
-                **metadata,  # Include all base metadata
-                'row_range': {
-                    'start': i + 1,  # 1-based indexing for display
-                    'end': min(i + ROWS_PER_CHUNK, len(rows))
-                },
-                'row_count': len(chunk_rows),
-                'is_first_chunk': i == 0,
-                'is_last_chunk': i + ROWS_PER_CHUNK >= len(rows)
-            }
-            
-            chunks.append({
-                'content': chunk_content,
-                'metadata': chunk_metadata
-            })
-        
-        return chunks
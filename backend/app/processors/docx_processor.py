@@ -1,79 +1,113 @@
-from typing import Dict, Any, BinaryIO
+from typing import AsyncIterator, Optional
 import docx
+from docx.table import Table
+from docx.text.hyperlink import Hyperlink
+from docx.text.paragraph import Paragraph
 from .base_processor import BaseProcessor
-from ..utils.chunker import DocumentChunker
+from ..utils.blocks import Block, heading, paragraph, table_row
+
+# Report progress every this many paragraphs
+PROGRESS_INTERVAL = 100
 
 class DocxProcessor(BaseProcessor):
-    def __init__(self):
-        super().__init__()
-        self.chunker = DocumentChunker()
+    """Processor for Word documents: paragraphs, headings and tables in body order."""
+    
+    VERSION = "2"
+    
+    SUPPORTS_PREVIEW = True
 
-    def process(self, file: BinaryIO) -> Dict[str, Any]:
-        """Process a DOCX file and extract its content with metadata."""
-        doc = docx.Document(file)
-        
-        # Extract text content
-        content = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                content.append(paragraph.text)
-        
-        full_text = '\n'.join(content)
-        
-        # Extract metadata
-        metadata = self._extract_metadata(doc)
+    async def iter_blocks(self) -> AsyncIterator[Block]:
+        doc = docx.Document(str(self.file_path))
+        limit = self.preview_limit("paragraphs")
         
-        # Generate chunks
-        chunks = self.chunker.chunk_text(full_text, metadata)
+        paragraph_count = 0
+        table_count = 0
+        word_count = 0
+        # Paragraphs and table rows emitted; both count toward a preview limit,
+        # so documents made mostly of tables still get a bounded preview
+        emitted = 0
+        for item in doc.iter_inner_content():
+            if limit and emitted >= limit:
+                break
+            
+            if isinstance(item, Table):
+                table_count += 1
+                for row_index, row in enumerate(item.rows):
+                    if limit and emitted >= limit:
+                        break
+                    cells = [cell.text for cell in row.cells]
+                    word_count += sum(len(cell.split()) for cell in cells)
+                    emitted += 1
+                    yield table_row(cells, header=row_index == 0, table=f"Table {table_count}")
+                continue
+            
+            paragraph_count += 1
+            text = item.text
+            if not text.strip():
+                continue
+            word_count += len(text.split())
+            emitted += 1
+            
+            level = self._heading_level(item)
+            if level:
+                yield heading(text, level)
+            else:
+                yield paragraph(text, self._to_markdown(item))
+            
+            if paragraph_count % PROGRESS_INTERVAL == 0:
+                await self.report_progress("extract_blocks", paragraph_count, None)
         
-        # Create markdown content
-        markdown_content = self._convert_to_markdown(doc)
+        if limit and emitted >= limit:
+            self.metadata["preview_paragraphs"] = emitted
         
-        return {
-            'content': full_text,
-            'markdown': markdown_content,
-            'metadata': metadata,
-            'chunks': chunks
-        }
-
-    def _extract_metadata(self, doc) -> Dict[str, Any]:
-        """Extract metadata from the DOCX document."""
         core_properties = doc.core_properties
-        
-        return {
+        self.metadata.update({
             'title': core_properties.title or '',
             'author': core_properties.author or '',
             'created': core_properties.created.isoformat() if core_properties.created else None,
             'modified': core_properties.modified.isoformat() if core_properties.modified else None,
-            'word_count': len(''.join(paragraph.text for paragraph in doc.paragraphs).split()),
-            'paragraph_count': len(doc.paragraphs),
+            'word_count': word_count,
+            'paragraph_count': paragraph_count,
+            'table_count': table_count,
             'section_count': len(doc.sections)
-        }
+        })
 
-    def _convert_to_markdown(self, doc) -> str:
-        """Convert DOCX content to Markdown format."""
-        markdown_lines = []
-        
-        for paragraph in doc.paragraphs:
-            if not paragraph.text.strip():
+    @staticmethod
+    def _heading_level(item: Paragraph) -> Optional[int]:
+        """Heading level from the paragraph style, e.g. 2 for 'Heading 2'."""
+        name = item.style.name if item.style is not None else ''
+        if name == 'Title':
+            return 1
+        if name.startswith('Heading'):
+            level = name.rpartition(' ')[2]
+            return int(level) if level.isdigit() else 1
+        return None
+
+    @staticmethod
+    def _to_markdown(item: Paragraph) -> Optional[str]:
+        """Markdown for a paragraph with inline formatting or links, else None."""
+        parts = []
+        formatted = False
+        for content in item.iter_inner_content():
+            if isinstance(content, Hyperlink):
+                if content.url:
+                    parts.append(f"[{content.text}]({content.url})")
+                    formatted = True
+                else:
+                    parts.append(content.text)
                 continue
-                
-            # Handle different styles
-            if paragraph.style.name.startswith('Heading'):
-                level = paragraph.style.name[-1]  # Get heading level from style name
-                markdown_lines.append(f"{'#' * int(level)} {paragraph.text}")
-            else:
-                # Process inline formatting
-                text = paragraph.text
-                for run in paragraph.runs:
-                    if run.bold:
-                        text = text.replace(run.text, f"**{run.text}**")
-                    if run.italic:
-                        text = text.replace(run.text, f"*{run.text}*")
-                
-                markdown_lines.append(text)
             
-            # Add blank line after each paragraph
-            markdown_lines.append('')
+            text = content.text
+            if text.strip() and (content.bold or content.italic):
+                # Keep surrounding spaces outside the markers
+                core = text.strip()
+                marker = ('**' if content.bold else '') + ('*' if content.italic else '')
+                text = text.replace(core, f"{marker}{core}{marker[::-1]}", 1)
+                formatted = True
+            parts.append(text)
         
-        return '\n'.join(markdown_lines)
+        markdown = ''.join(parts)
+        style = item.style.name if item.style is not None else ''
+        if style.startswith('List'):
+            return f"- {markdown}"
+        return markdown if formatted else None
@@ -1,74 +1,109 @@
-from typing import Type
+from typing import Dict, Iterable, List, Optional, Type
 from pathlib import Path
+import importlib
+import importlib.util
 from .base_processor import BaseProcessor
-from .pdf_processor import PDFProcessor
-from .docx_processor import DocxProcessor
-from .csv_processor import CsvProcessor
-from .txt_processor import TextProcessor
-from .code_processor import CodeProcessor
-from .xlsx_processor import XlsxProcessor
 from ..models.file_model import File
+from ..utils import sniffing
+
+# Processors are registered as "module:Class" paths and imported on first
+# use, so a worker only pays for the parsing libraries it actually needs.
+# Relative module paths are resolved against this package.
+PDF_PROCESSOR = ".pdf_processor:PDFProcessor"
+DOCX_PROCESSOR = ".docx_processor:DocxProcessor"
+CSV_PROCESSOR = ".csv_processor:CsvProcessor"
+TEXT_PROCESSOR = ".txt_processor:TextProcessor"
+CODE_PROCESSOR = ".code_processor:CodeProcessor"
+XLSX_PROCESSOR = ".xlsx_processor:XlsxProcessor"
+
+# Sniffed container formats, routed by content whatever the file is called
+SNIFFED_PROCESSORS = {
+    sniffing.PDF: PDF_PROCESSOR,
+    sniffing.DOCX: DOCX_PROCESSOR,
+    sniffing.XLSX: XLSX_PROCESSOR,
+}
+
+# Built-in processors that decode the file as text
+TEXT_PROCESSORS = {TEXT_PROCESSOR, CSV_PROCESSOR, CODE_PROCESSOR}
 
 class ProcessorFactory:
     """Factory for creating file processors based on file type."""
     
     _processors = {
         # Document types
-        "pdf": PDFProcessor,
-        "csv": CsvProcessor,
-        "docx": DocxProcessor,
-        "txt": TextProcessor,
+        "pdf": PDF_PROCESSOR,
+        "csv": CSV_PROCESSOR,
+        "docx": DOCX_PROCESSOR,
+        "txt": TEXT_PROCESSOR,
         
         # Spreadsheet types
-        "xlsx": XlsxProcessor,
-        "xls": XlsxProcessor,  # Note: older Excel format support
+        "xlsx": XLSX_PROCESSOR,
+        "xls": XLSX_PROCESSOR,  # Note: older Excel format support
         
         # Code file types
-        "py": CodeProcessor,
-        "js": CodeProcessor,
-        "jsx": CodeProcessor,
-        "ts": CodeProcessor,
-        "tsx": CodeProcessor,
-        "java": CodeProcessor,
-        "cpp": CodeProcessor,
-        "c": CodeProcessor,
-        "cs": CodeProcessor,
-        "go": CodeProcessor,
-        "rb": CodeProcessor,
-        "php": CodeProcessor,
-        "rs": CodeProcessor,
-        "swift": CodeProcessor,
-        "kt": CodeProcessor,
+        "py": CODE_PROCESSOR,
+        "js": CODE_PROCESSOR,
+        "jsx": CODE_PROCESSOR,
+        "ts": CODE_PROCESSOR,
+        "tsx": CODE_PROCESSOR,
+        "java": CODE_PROCESSOR,
+        "cpp": CODE_PROCESSOR,
+        "c": CODE_PROCESSOR,
+        "cs": CODE_PROCESSOR,
+        "go": CODE_PROCESSOR,
+        "rb": CODE_PROCESSOR,
+        "php": CODE_PROCESSOR,
+        "rs": CODE_PROCESSOR,
+        "swift": CODE_PROCESSOR,
+        "kt": CODE_PROCESSOR,
         
         # Web technologies
-        "html": CodeProcessor,
-        "css": CodeProcessor,
-        "scss": CodeProcessor,
-        "less": CodeProcessor,
-        "json": CodeProcessor,
-        "xml": CodeProcessor,
-        "yaml": CodeProcessor,
-        "yml": CodeProcessor,
+        "html": CODE_PROCESSOR,
+        "css": CODE_PROCESSOR,
+        "scss": CODE_PROCESSOR,
+        "less": CODE_PROCESSOR,
+        "json": CODE_PROCESSOR,
+        "xml": CODE_PROCESSOR,
+        "yaml": CODE_PROCESSOR,
+        "yml": CODE_PROCESSOR,
         
         # Shell scripts
-        "sh": CodeProcessor,
-        "bash": CodeProcessor,
-        "zsh": CodeProcessor,
-        "fish": CodeProcessor,
-        "ps1": CodeProcessor,
-        "bat": CodeProcessor,
-        "cmd": CodeProcessor,
+        "sh": CODE_PROCESSOR,
+        "bash": CODE_PROCESSOR,
+        "zsh": CODE_PROCESSOR,
+        "fish": CODE_PROCESSOR,
+        "ps1": CODE_PROCESSOR,
+        "bat": CODE_PROCESSOR,
+        "cmd": CODE_PROCESSOR,
         
         # Configuration files
-        "ini": CodeProcessor,
-        "conf": CodeProcessor,
-        "cfg": CodeProcessor,
-        "toml": CodeProcessor,
+        "ini": CODE_PROCESSOR,
+        "conf": CODE_PROCESSOR,
+        "cfg": CODE_PROCESSOR,
+        "toml": CODE_PROCESSOR,
         
         # Database
-        "sql": CodeProcessor,
+        "sql": CODE_PROCESSOR,
     }
 
+    # Resolved classes, keyed by "module:Class" path
+    _resolved: Dict[str, Type[BaseProcessor]] = {}
+
+    @classmethod
+    def _resolve(cls, processor: str | Type[BaseProcessor]) -> Type[BaseProcessor]:
+        """Import a processor class from its "module:Class" path, once."""
+        if not isinstance(processor, str):
+            return processor
+        
+        processor_class = cls._resolved.get(processor)
+        if processor_class is None:
+            module_name, _, class_name = processor.partition(":")
+            module = importlib.import_module(module_name, __package__)
+            processor_class = getattr(module, class_name)
+            cls._resolved[processor] = processor_class
+        
+        return processor_class
+
     @classmethod
     def get_processor_class(cls, file_extension: str) -> Type[BaseProcessor]:
         """Get the appropriate processor class for a file type."""
@@ -77,38 +112,128 @@ class ProcessorFactory:
         ext = file_extension.lower().lstrip(".")
         
         # Check if we have a processor for this file type
-        processor_class = cls._processors.get(ext)
-        if not processor_class:
+        processor = cls._processors.get(ext)
+        if not processor:
             # Default to text processor for unknown types
-            return TextProcessor
+            processor = TEXT_PROCESSOR
         
-        return processor_class
+        return cls._resolve(processor)
+
+    @classmethod
+    def get_processor_class_by_name(cls, name: str) -> Type[BaseProcessor]:
+        """Get a registered processor class by its class name."""
+        for processor in set(cls._processors.values()) | {TEXT_PROCESSOR}:
+            if isinstance(processor, str):
+                matches = processor.rpartition(":")[2] == name
+            else:
+                matches = processor.__name__ == name
+            if matches:
+                return cls._resolve(processor)
+        
+        raise UnsupportedFileType(f"Unknown processor: {name}")
+
+    @classmethod
+    def module_names(cls) -> List[str]:
+        """Absolute names of the modules providing the registered processors."""
+        names = set()
+        for processor in set(cls._processors.values()) | {TEXT_PROCESSOR}:
+            if isinstance(processor, str):
+                module_name = processor.partition(":")[0]
+                names.add(importlib.util.resolve_name(module_name, __package__))
+            else:
+                names.add(processor.__module__)
+        return sorted(names)
 
     @classmethod
-    def create_processor(cls, file_path: str | Path, file_info: File) -> BaseProcessor:
-        """Create a processor instance for a file."""
+    def preload(cls, extensions: Iterable[str]) -> None:
+        """Import the processors for the given extensions ahead of first use."""
+        for ext in extensions:
+            cls.get_processor_class(ext)
+
+    @classmethod
+    def create_processor(
+        cls,
+        file_path: str | Path,
+        file_info: File,
+        sniffed: Optional[sniffing.Sniffed] = None
+    ) -> BaseProcessor:
+        """
+        Create a processor instance for a file.
+        
+        The file's first few KB are sniffed, so a mislabeled PDF or Office
+        document still reaches its processor, and binary data is rejected
+        here rather than decoded as text. Pass ``sniffed`` when the file
+        was already sniffed, e.g. for admission.
+        
+        Raises:
+            UnsupportedFileType: If no processor can read the file's content
+        """
         
         # Convert to Path object if string
         path = Path(file_path)
         
-        # Get file extension
-        if not path.suffix:
-            raise ValueError(f"File has no extension: {file_path}")
-        
         # Get processor class
-        processor_class = cls.get_processor_class(path.suffix[1:])
+        processor_class = cls.processor_class_for(path, sniffed or sniffing.sniff(path))
         
         # Create and return processor instance
         return processor_class(str(path), file_info)
 
+    @classmethod
+    def processor_class_for(
+        cls,
+        file_name: str | Path,
+        sniffed: sniffing.Sniffed
+    ) -> Type[BaseProcessor]:
+        """
+        The processor class for a file, from its sniffed content and name.
+        
+        Raises:
+            UnsupportedFileType: If no processor can read the file's content
+        """
+        return cls._resolve(cls._route(Path(file_name), sniffed))
+
+    @classmethod
+    def _route(cls, path: Path, sniffed: sniffing.Sniffed) -> str | Type[BaseProcessor]:
+        """Choose a processor from the sniffed content and the file extension."""
+        if sniffed.format in SNIFFED_PROCESSORS:
+            return SNIFFED_PROCESSORS[sniffed.format]
+        
+        registered = cls._processors.get(path.suffix.lower().lstrip("."))
+        if registered is not None and registered not in TEXT_PROCESSORS \
+                and registered not in SNIFFED_PROCESSORS.values():
+            # Processors registered for other formats check their own input
+            return registered
+        
+        if sniffed.format != sniffing.TEXT:
+            raise UnsupportedFileType(
+                f"{path.name} is not a supported document ({sniffed.mime or sniffed.format})"
+            )
+        if sniffed.encoding not in ("utf-8", "latin-1"):
+            raise UnsupportedFileType(f"{path.name} is {sniffed.encoding} text, which is not supported")
+        
+        if registered in TEXT_PROCESSORS:
+            return registered
+        # Unknown extensions, and text named as a PDF or Office document
+        return CSV_PROCESSOR if sniffed.dialect is not None else TEXT_PROCESSOR
+
     @classmethod
     def register_processor(
         cls, 
         extension: str, 
-        processor_class: Type[BaseProcessor]
+        processor_class: str | Type[BaseProcessor]
     ) -> None:
-        """Register a new processor for a file type."""
-        if not issubclass(processor_class, BaseProcessor):
+        """
+        Register a new processor for a file type.
+        
+        Accepts either a class or a "module:Class" path, which is only
+        imported when a file of that type is first processed.
+        """
+        if isinstance(processor_class, str):
+            if ":" not in processor_class:
+                raise ValueError(
+                    f"Processor path must look like 'module:Class': {processor_class}"
+                )
+        elif not issubclass(processor_class, BaseProcessor):
             raise ValueError(
                 f"Processor class must inherit from BaseProcessor: {processor_class}"
             )
@@ -1,50 +1,46 @@
 import pdfplumber
-import PyPDF2
-from typing import Dict, Any, List
+from typing import AsyncIterator
 from .base_processor import BaseProcessor
-from ..models.file_model import File
+from ..utils.blocks import Block, page_break, paragraph, positions
 
 class PDFProcessor(BaseProcessor):
     """Processor for PDF files."""
     
-    async def extract_text(self) -> str:
-        text = []
-        with pdfplumber.open(self.file_path) as pdf:
-            for page in pdf.pages:
-                text.append(page.extract_text() or "")
-        return "\n\n".join(text)
+    VERSION = "2"
+    
+    SUPPORTS_PREVIEW = True
 
-    async def extract_metadata(self) -> Dict[str, Any]:
-        metadata = {}
-        with open(self.file_path, "rb") as file:
-            reader = PyPDF2.PdfReader(file)
-            info = reader.metadata
-            if info:
-                metadata.update({
-                    "title": info.get("/Title", ""),
-                    "author": info.get("/Author", ""),
-                    "subject": info.get("/Subject", ""),
-                    "creator": info.get("/Creator", ""),
-                    "producer": info.get("/Producer", ""),
-                    "creation_date": info.get("/CreationDate", ""),
-                    "modification_date": info.get("/ModDate", ""),
-                })
+    async def iter_blocks(self) -> AsyncIterator[Block]:
+        with pdfplumber.open(self.file_path) as pdf:
+            page_count = len(pdf.pages)
+            self.enforce_limit("pages", page_count)
             
-            metadata.update({
-                "page_count": len(reader.pages),
+            info = pdf.metadata or {}
+            self.metadata.update({
+                "title": info.get("Title", ""),
+                "author": info.get("Author", ""),
+                "subject": info.get("Subject", ""),
+                "creator": info.get("Creator", ""),
+                "producer": info.get("Producer", ""),
+                "creation_date": info.get("CreationDate", ""),
+                "modification_date": info.get("ModDate", ""),
+                "page_count": page_count,
                 "file_type": "pdf",
-                "encrypted": reader.is_encrypted,
+                "encrypted": getattr(pdf.doc, "encryption", None) is not None,
             })
             
-        return metadata
-
-    async def get_positions(self) -> List[Dict[str, Any]]:
-        positions = []
-        with pdfplumber.open(self.file_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                words = page.extract_words()
-                for word in words:
-                    positions.append({
+            # Text, positions and page size all come from the same page object
+            pages = pdf.pages[:self.preview_limit("pages")]
+            page_sizes = []
+            for page_num, page in enumerate(pages, start=1):
+                yield page_break(page_num)
+                
+                text = page.extract_text() or ""
+                if text.strip():
+                    yield paragraph(text)
+                
+                yield positions(page_num, [
+                    {
                         "page": page_num,
                         "x": word["x0"],
                         "y": word["top"],
@@ -52,26 +48,15 @@ class PDFProcessor(BaseProcessor):
                         "height": word["bottom"] - word["top"],
                         "content": word["text"],
                         "confidence": 1.0,  # PDF text extraction typically has high confidence
-                    })
-        
-        return positions
-
-    async def process(self) -> tuple[str, str, Dict[str, Any]]:
-        """Process PDF file and extract all information."""
-        try:
-            # Get base processing
-            markdown, json_content, metadata = await super().process()
-            
-            # Add PDF-specific metadata
-            with pdfplumber.open(self.file_path) as pdf:
-                metadata.update({
-                    "page_sizes": [
-                        {"width": page.width, "height": page.height}
-                        for page in pdf.pages
-                    ],
-                })
-            
-            return markdown, json_content, metadata
+                    }
+                    for word in page.extract_words()
+                ])
+                page_sizes.append({"width": page.width, "height": page.height})
+                
+                # Release the page's parsed objects before moving on
+                page.flush_cache()
+                await self.report_progress("extract_blocks", page_num, len(pages))
             
-        except Exception as e:
-            raise ProcessingError(f"Error processing PDF: {str(e)}")
+            self.metadata["page_sizes"] = page_sizes
+            if self.preview_limit("pages"):
+                self.metadata["preview_pages"] = len(pages)
@@ -1,95 +1,87 @@
-from typing import Dict, Any, BinaryIO
+from typing import AsyncIterator, List, Tuple
 from .base_processor import BaseProcessor
-from ..utils.chunker import DocumentChunker
+from ..utils.blocks import Block, paragraph
+
+# Report progress every this many lines
+PROGRESS_INTERVAL = 10000
+
+# Characters escaped so plain text is not read as markdown
+MARKDOWN_SPECIAL = str.maketrans({
+    char: '\\' + char for char in '\\*_`#>-+[]()'
+})
 
 class TextProcessor(BaseProcessor):
-    def __init__(self):
-        super().__init__()
-        self.chunker = DocumentChunker()
+    """Processor for plain text; blank lines separate paragraphs."""
+    
+    VERSION = "2"
+    
+    SUPPORTS_PREVIEW = True
 
-    def process(self, file: BinaryIO) -> Dict[str, Any]:
-        """Process a text file and extract its content with metadata."""
-        # Read text content
-        try:
-            text_content = file.read().decode('utf-8')
-        except UnicodeDecodeError:
-            # Fallback to latin-1 if utf-8 fails
-            file.seek(0)
-            text_content = file.read().decode('latin-1')
+    async def iter_blocks(self) -> AsyncIterator[Block]:
+        limit = self.preview_limit("paragraphs")
+        encodings = set()
+        line_count = 0
+        non_empty_lines = 0
+        non_empty_chars = 0
+        char_count = 0
+        word_count = 0
+        paragraphs = 0
+        has_bom = False
+        current: List[str] = []
         
-        # Clean and normalize line endings
-        text_content = self._normalize_line_endings(text_content)
+        with open(self.file_path, 'rb') as file:
+            for raw in file:
+                line, encoding = self._decode(raw)
+                encodings.add(encoding)
+                if line_count == 0 and line.startswith('\ufeff'):
+                    has_bom = True
+                    line = line[1:]
+                line_count += 1
+                char_count += len(line) + 1
+                
+                if line.strip():
+                    non_empty_lines += 1
+                    non_empty_chars += len(line)
+                    word_count += len(line.split())
+                    current.append(line)
+                elif current:
+                    yield self._paragraph(current)
+                    paragraphs += 1
+                    current = []
+                    if limit and paragraphs >= limit:
+                        self.metadata['preview_paragraphs'] = paragraphs
+                        break
+                
+                if line_count % PROGRESS_INTERVAL == 0:
+                    await self.report_progress("extract_blocks", line_count, None)
         
-        # Generate metadata
-        metadata = self._extract_metadata(text_content)
+        if current:
+            yield self._paragraph(current)
         
-        # Generate chunks
-        chunks = self.chunker.chunk_text(text_content, metadata)
-        
-        # Convert to markdown (for text files, this is minimal processing)
-        markdown_content = self._convert_to_markdown(text_content)
-        
-        return {
-            'content': text_content,
-            'markdown': markdown_content,
-            'metadata': metadata,
-            'chunks': chunks
-        }
-
-    def _normalize_line_endings(self, text: str) -> str:
-        """Normalize line endings to Unix style."""
-        return text.replace('\r\n', '\n').replace('\r', '\n')
+        self.metadata.update({
+            'char_count': max(char_count - 1, 0),
+            'word_count': word_count,
+            'line_count': line_count,
+            'non_empty_line_count': non_empty_lines,
+            'average_line_length': non_empty_chars / (non_empty_lines or 1),
+            'has_bom': has_bom,
+            # Lines that are not valid UTF-8 were read as latin-1
+            'encoding': 'latin-1' if 'latin-1' in encodings else 'utf-8'
+        })
 
-    def _extract_metadata(self, content: str) -> Dict[str, Any]:
-        """Extract metadata from text content."""
-        lines = content.split('\n')
-        non_empty_lines = [line for line in lines if line.strip()]
-        
-        # Calculate various text metrics
-        return {
-            'char_count': len(content),
-            'word_count': len(content.split()),
-            'line_count': len(lines),
-            'non_empty_line_count': len(non_empty_lines),
-            'average_line_length': sum(len(line) for line in non_empty_lines) / (len(non_empty_lines) or 1),
-            'has_bom': content.startswith('\ufeff'),
-            'encoding': 'utf-8'  # We've handled the decoding explicitly
-        }
+    @staticmethod
+    def _decode(raw: bytes) -> Tuple[str, str]:
+        """Decode one line with normalized line endings, falling back to latin-1."""
+        raw = raw.rstrip(b'\r\n')
+        try:
+            return raw.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            return raw.decode('latin-1'), 'latin-1'
 
-    def _convert_to_markdown(self, content: str) -> str:
-        """Convert text content to Markdown format."""
-        # For plain text, we primarily need to:
-        # 1. Ensure paragraphs are separated by blank lines
-        # 2. Escape any markdown special characters
-        
-        # Split into paragraphs (one or more blank lines)
-        paragraphs = content.split('\n\n')
-        
-        # Process each paragraph
-        processed_paragraphs = []
-        for para in paragraphs:
-            if not para.strip():
-                continue
-            
-            # Escape markdown special characters
-            escaped_para = (
-                para.replace('\\', '\\\\')
-                    .replace('*', '\\*')
-                    .replace('_', '\\_')
-                    .replace('`', '\\`')
-                    .replace('#', '\\#')
-                    .replace('>', '\\>')
-                    .replace('-', '\\-')
-                    .replace('+', '\\+')
-                    .replace('[', '\\[')
-                    .replace(']', '\\]')
-                    .replace('(', '\\(')
-                    .replace(')', '\\)')
-            )
-            
-            # Join lines within paragraph
-            processed_para = ' '.join(escaped_para.split('\n'))
-            processed_paragraphs.append(processed_para)
-        
-        # Join paragraphs with double newlines
-        return '\n\n'.join(processed_paragraphs)
+    @staticmethod
+    def _paragraph(lines: List[str]) -> Block:
+        """A paragraph block; the markdown joins its lines and escapes markdown syntax."""
+        return paragraph(
+            '\n'.join(lines),
+            ' '.join(line.translate(MARKDOWN_SPECIAL) for line in lines)
+        )
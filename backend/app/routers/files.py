@@ -1,42 +1,332 @@
-from typing import List
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, UploadFile, Depends, HTTPException
-from sqlmodel import Session, select
+import hmac
+import json
+from fastapi import APIRouter, BackgroundTasks, UploadFile, Depends, HTTPException, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..models.file_model import File, FileResponse
+from ..models.file_model import (
+    File, FileResponse, FileStatus, FileSummary, FileListResponse, BatchResponse,
+    UploadCreate, UploadPart, UploadStatus
+)
 from ..core.file_service import file_service, FileProcessingError, FileNotReadyError
 from ..core.database import get_db
+from ..core.storage import storage, StorageError
+from ..core.events import events, Subscription
+from ..core.conversion_cache import conversion_cache
+from ..core.admission import admission, AdmissionRejected, Lane
+from ..core.resumable import resumable_uploads, UploadError, UploadNotFoundError
+from ..core.config import settings
+from ..utils.compression import decompress_stream, accepts_encoding
+from ..utils import jsoncodec
+from ..utils.http import parse_range, etag_matches, FastJSONResponse, RangeNotSatisfiable
+from ..utils.pagination import encode_cursor, decode_cursor, InvalidCursorError
 
 router = APIRouter(prefix="/files", tags=["files"])
 
+def _tenant(request: Request) -> Optional[str]:
+    """Tenant key for fair scheduling: the tenant header, else the client address."""
+    tenant = request.headers.get(settings.TENANT_HEADER)
+    if tenant:
+        return tenant
+    return request.client.host if request.client else None
+
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    """Map an admission rejection to a 429/503 telling the client when to retry."""
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.detail,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
 @router.post("/upload", response_model=FileResponse)
 async def upload_file(
     file: UploadFile,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    profile_token: Optional[str] = Header(default=None, alias="X-Profile-Token"),
+    db: AsyncSession = Depends(get_db)
 ) -> File:
-    """Upload a file for processing."""
+    """
+    Upload a file for processing.
+    
+    Sending X-Profile-Token with the configured PROFILING_TOKEN profiles
+    the conversion; the profile is linked from the Link response header.
+    """
+    profile = False
+    if profile_token is not None:
+        if not settings.PROFILING_TOKEN or not hmac.compare_digest(
+            profile_token, settings.PROFILING_TOKEN
+        ):
+            raise HTTPException(status_code=403, detail="Invalid profiling token")
+        profile = True
+    
     try:
-        return await file_service.process_file(file, db)
+        file_record = await file_service.process_file(
+            file, db, profile=profile, tenant=_tenant(request)
+        )
+    except AdmissionRejected as e:
+        raise _rejected(e)
     except FileProcessingError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    if file_record.profile_path:
+        response.headers["Link"] = (
+            f'<{settings.API_V1_STR}{router.prefix}/{file_record.id}/download/profile>; rel="profile"'
+        )
+    return file_record
+
+@router.post("/upload-batch", response_model=BatchResponse, status_code=202)
+async def upload_batch(
+    files: List[UploadFile],
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+) -> BatchResponse:
+    """
+    Upload many files, or zip/tar(.gz) archives of files, in one request.
+    
+    Files are converted in the background; poll /batches/{batch_id} for
+    aggregate progress or watch /events for per-file status.
+    """
+    try:
+        admission.ensure_capacity(Lane.BULK)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    
+    try:
+        batch_id, staged = await file_service.create_batch(files, db)
+    except FileProcessingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    background_tasks.add_task(file_service.process_batch, batch_id, staged, _tenant(request))
+    total = sum(len(upload.records) for upload in staged)
+    return BatchResponse(batch_id=batch_id, total=total, pending=total)
 
-@router.get("/list", response_model=List[FileResponse])
+@router.get("/batches/{batch_id}", response_model=BatchResponse)
+async def get_batch_status(batch_id: UUID) -> Dict[str, Any]:
+    """Get aggregate progress of a batch upload."""
+    try:
+        return await file_service.get_batch_status(batch_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+@router.post("/uploads", response_model=UploadStatus, status_code=201)
+async def create_upload(body: UploadCreate) -> Dict[str, Any]:
+    """
+    Start a resumable upload.
+    
+    Send the file as numbered parts of part_size bytes (the last may be
+    smaller) with PUT /uploads/{upload_id}/parts/{n}, then POST
+    /uploads/{upload_id}/complete to convert it.
+    """
+    try:
+        return await resumable_uploads.create(body.filename, body.size, body.content_type)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+async def get_upload(upload_id: UUID) -> Dict[str, Any]:
+    """Get the parts received so far, to resume after a dropped connection."""
+    try:
+        return await resumable_uploads.status(str(upload_id))
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/uploads/{upload_id}/parts/{part_number}", response_model=UploadPart)
+async def upload_part(
+    upload_id: UUID,
+    part_number: int,
+    request: Request,
+    content_length: Optional[int] = Header(default=None)
+) -> Dict[str, Any]:
+    """Upload one part of a resumable upload as the raw request body."""
+    if content_length is not None and content_length > settings.UPLOAD_MAX_PART_SIZE:
+        raise HTTPException(status_code=413, detail="Part too large")
+    
+    # Chunked bodies have no Content-Length, so the size is checked as they arrive
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > settings.UPLOAD_MAX_PART_SIZE:
+            raise HTTPException(status_code=413, detail="Part too large")
+    
+    try:
+        return await resumable_uploads.upload_part(str(upload_id), part_number, bytes(data))
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileResponse, status_code=202)
+async def complete_upload(
+    upload_id: UUID,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+) -> File:
+    """
+    Assemble a resumable upload and convert it in the background.
+    
+    When the conversion queue is full this fails with 429 and the upload
+    stays resumable, so the client can complete it after Retry-After.
+    """
+    try:
+        admission.ensure_capacity(Lane.BULK)
+        file_record = await resumable_uploads.complete(str(upload_id), db)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    background_tasks.add_task(file_service.process_stored_upload, file_record.id, _tenant(request))
+    return file_record
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: UUID) -> dict:
+    """Cancel a resumable upload and discard its parts."""
+    try:
+        await resumable_uploads.abort(str(upload_id))
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {"status": "success", "message": "Upload aborted"}
+
+@router.get("/list", response_model=FileListResponse)
 async def list_files(
-    skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db)
-) -> List[File]:
-    """List processed files with pagination."""
-    statement = select(File).offset(skip).limit(limit)
-    return db.exec(statement).all()
+    cursor: Optional[str] = None,
+    limit: int = Query(default=10, ge=1, le=100),
+    status: Optional[FileStatus] = None,
+    original_type: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+) -> FileListResponse:
+    """
+    List files, newest first, with keyset pagination.
+    
+    Only summary columns are selected, so the metadata column is never read.
+    Pass the returned next_cursor to fetch the following page.
+    """
+    columns = [getattr(File, name) for name in FileSummary.model_fields]
+    statement = select(*columns)
+    
+    if status is not None:
+        statement = statement.where(File.status == status)
+    if original_type is not None:
+        statement = statement.where(File.original_type == original_type)
+    if created_after is not None:
+        statement = statement.where(File.created_at >= created_after)
+    if created_before is not None:
+        statement = statement.where(File.created_at < created_before)
+    
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement = statement.where(
+            tuple_(File.created_at, File.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    
+    # Fetch one extra row to know whether another page exists
+    statement = statement.order_by(File.created_at.desc(), File.id.desc()).limit(limit + 1)
+    rows = (await db.exec(statement)).all()
+    
+    items = [FileSummary.model_validate(dict(row._mapping)) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    
+    return FileListResponse(items=items, next_cursor=next_cursor)
+
+def _sse(event: Dict[str, Any]) -> str:
+    """Format an event as a server-sent event message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+async def _event_stream(
+    request: Request,
+    subscription: Subscription,
+    initial: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """Relay bus events to a client until it disconnects or the file finishes."""
+    try:
+        async for event in subscription.follow(initial, keepalive=settings.EVENTS_KEEPALIVE):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse(event)
+    finally:
+        subscription.close()
+
+@router.get("/events")
+async def stream_all_events(request: Request) -> StreamingResponse:
+    """Stream status and progress events for all files as server-sent events."""
+    subscription = await events.open()
+    return StreamingResponse(
+        _event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{file_id}/events")
+async def stream_file_events(file_id: UUID, request: Request) -> StreamingResponse:
+    """
+    Stream status transitions and progress for one file as server-sent events.
+    
+    The current status is sent first; the stream ends once the file has
+    completed or failed.
+    """
+    # Subscribe before reading the status, so a transition published in
+    # between is queued rather than lost
+    subscription = await events.open(str(file_id))
+    try:
+        file_record = await file_service.get_file_status(file_id)
+    except FileNotFoundError:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="File not found")
+    except BaseException:
+        subscription.close()
+        raise
+    
+    initial = {
+        "type": "status",
+        "file_id": str(file_id),
+        "status": file_record.status,
+        "error_message": file_record.error_message,
+    }
+    return StreamingResponse(
+        _event_stream(request, subscription, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/{file_id}", response_model=FileResponse)
 async def get_file(
     file_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> File:
     """Get file information by ID."""
-    file = db.get(File, file_id)
+    file = await db.get(File, file_id)
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
     return file
@@ -45,14 +335,127 @@ async def get_file(
 async def get_file_content(
     file_id: UUID,
     content_type: str = "markdown"
-) -> dict:
-    """Get processed file content."""
+) -> Response:
+    """
+    Get processed file content.
+    
+    While a large file is still converting, its preview is returned and
+    content_stage is "preview"; it is "full" once the conversion is done.
+    """
     try:
-        content, metadata = await file_service.get_file_content(file_id, content_type)
-        return {
-            "content": content,
-            "metadata": metadata
-        }
+        content, metadata, content_stage = await file_service.get_file_content(file_id, content_type)
+        # Stored JSON is spliced into the response as is, not decoded and re-encoded
+        body = b"".join([
+            b'{"content":',
+            content if isinstance(content, bytes) else jsoncodec.dumps(content),
+            b',"metadata":',
+            jsoncodec.dumps(metadata),
+            b',"content_stage":',
+            jsoncodec.dumps(content_stage),
+            b'}',
+        ])
+        return Response(content=body, media_type="application/json")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except FileNotReadyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FileProcessingError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{file_id}/metadata")
+async def get_file_metadata(file_id: UUID) -> FastJSONResponse:
+    """Get the full metadata of a file, including positions and other details."""
+    try:
+        # Encoded directly, skipping the per-item walk of jsonable_encoder
+        return FastJSONResponse(await file_service.get_file_metadata(file_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except FileNotReadyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FileProcessingError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{file_id}/download/{artifact}")
+async def download_artifact(
+    file_id: UUID,
+    artifact: Literal["original", "markdown", "json", "metadata", "profile"],
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None)
+) -> Response:
+    """
+    Stream a stored artifact straight from storage.
+    
+    Supports If-None-Match and single byte ranges. Compressed artifacts are
+    passed through with Content-Encoding when the client accepts the stored
+    encoding; otherwise they are decompressed on the fly and served whole.
+    """
+    try:
+        object_name, stat, media_type = await file_service.get_artifact(file_id, artifact)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except FileNotReadyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FileProcessingError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    encoding = stat["encoding"]
+    passthrough = not encoding or accepts_encoding(accept_encoding, encoding)
+    # The decoded representation differs from the stored one, so tag it apart
+    etag = f'"{stat["etag"]}"' if passthrough else f'"{stat["etag"]}-identity"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    if not passthrough:
+        return StreamingResponse(
+            decompress_stream(storage.stream_file(object_name), encoding),
+            media_type=media_type,
+            headers=headers
+        )
+    
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    headers["Accept-Ranges"] = "bytes"
+    
+    size = stat["size"]
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{size}"}
+        )
+    
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            storage.stream_file(object_name),
+            media_type=media_type,
+            headers=headers
+        )
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.stream_file(object_name, offset=start, length=end - start + 1),
+        status_code=206,
+        media_type=media_type,
+        headers=headers
+    )
+
+@router.post("/{file_id}/rerender", response_model=FileResponse)
+async def rerender_file(
+    file_id: UUID,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+) -> File:
+    """Regenerate markdown, JSON and chunks from the cached intermediate document."""
+    try:
+        return await file_service.rerender_file(file_id, db, chunk_size, chunk_overlap)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     except FileNotReadyError as e:
@@ -63,26 +466,43 @@ async def get_file_content(
 @router.delete("/{file_id}")
 async def delete_file(
     file_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> dict:
     """Delete a file and its processed content."""
-    file = db.get(File, file_id)
+    file = await db.get(File, file_id)
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
     
     # Delete from storage if paths exist
     if file.markdown_path:
         try:
-            from ..core.storage import storage
-            storage.delete_file(file.markdown_path)
+            await storage.delete_file_async(file.markdown_path)
             if file.json_path:
-                storage.delete_file(file.json_path)
+                await storage.delete_file_async(file.json_path)
+            if file.metadata_path:
+                await storage.delete_file_async(file.metadata_path)
+            if file.intermediate_path:
+                await storage.delete_file_async(file.intermediate_path)
+            if file.original_path:
+                await storage.delete_file_async(file.original_path)
+            if file.profile_path:
+                await storage.delete_file_async(file.profile_path)
         except Exception as e:
             # Log error but continue with database deletion
             print(f"Error deleting storage files: {e}")
     
+    for path in (file.preview_markdown_path, file.preview_json_path):
+        if path:
+            try:
+                await storage.delete_file_async(path)
+            except Exception as e:
+                print(f"Error deleting preview: {e}")
+    
+    # Duplicates share the conversion key; keep serving theirs
+    await conversion_cache.release(db, file)
+    
     # Delete from database
-    db.delete(file)
-    db.commit()
+    await db.delete(file)
+    await db.commit()
     
     return {"status": "success", "message": "File deleted"}
@@ -0,0 +1,80 @@
+from typing import BinaryIO, Iterator, List, NamedTuple, Tuple
+from pathlib import Path, PurePosixPath
+import tarfile
+import zipfile
+
+# Suffixes of uploads that are expanded into their members
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+class ArchiveMember(NamedTuple):
+    name: str
+    size: int
+
+def is_archive(filename: str) -> bool:
+    """Whether a filename looks like a supported zip or tar archive."""
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _skip(name: str) -> bool:
+    """Skip hidden files and OS metadata such as __MACOSX/ and .DS_Store."""
+    parts = PurePosixPath(name).parts
+    return any(part.startswith(".") or part == "__MACOSX" for part in parts)
+
+def list_members(path: str | Path, max_members: int) -> List[ArchiveMember]:
+    """
+    List the regular files in an archive, in archive order.
+
+    Args:
+        path: Path to a zip or tar archive
+        max_members: Maximum number of members accepted
+
+    Returns:
+        Members that iter_members will yield, in the same order
+    """
+    members = []
+    for name, size, _ in _walk(path, open_files=False):
+        if len(members) == max_members:
+            raise ArchiveError(f"Archive has more than {max_members} files")
+        members.append(ArchiveMember(name, size))
+    return members
+
+def iter_members(path: str | Path) -> Iterator[Tuple[ArchiveMember, BinaryIO]]:
+    """
+    Stream the regular files of an archive one at a time.
+
+    Members are read sequentially, so compressed tarballs are decompressed
+    once rather than once per member. Each file object is only valid until
+    the next member is requested.
+
+    Yields:
+        Tuples of (member, readable file object)
+    """
+    for name, size, fileobj in _walk(path, open_files=True):
+        yield ArchiveMember(name, size), fileobj
+
+def _walk(path: str | Path, open_files: bool) -> Iterator[Tuple[str, int, BinaryIO | None]]:
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or _skip(info.filename):
+                        continue
+                    if not open_files:
+                        yield info.filename, info.file_size, None
+                        continue
+                    with archive.open(info) as fileobj:
+                        yield info.filename, info.file_size, fileobj
+            return
+
+        # Stream mode reads members in order without seeking
+        with tarfile.open(path, mode="r|*") as archive:
+            for info in archive:
+                if not info.isfile() or _skip(info.name):
+                    continue
+                fileobj = archive.extractfile(info) if open_files else None
+                yield info.name, info.size, fileobj
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        raise ArchiveError(f"Unreadable archive: {str(e)}")
+
+class ArchiveError(Exception):
+    """Raised when an uploaded archive cannot be read or is too large."""
+    pass
@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional
+
+# Block types, in the order a renderer may meet them
+HEADING = "heading"
+PARAGRAPH = "paragraph"
+TABLE_ROW = "table_row"
+CODE_BLOCK = "code_block"
+PAGE_BREAK = "page_break"
+POSITIONS = "positions"
+
+# A block is a plain dict, so documents pack to msgpack and cross the
+# pipe from an extraction child without any custom encoding
+Block = Dict[str, Any]
+
+def heading(text: str, level: int = 1) -> Block:
+    """A heading of the given level, 1 being the top level."""
+    return {"type": HEADING, "text": text, "level": max(1, min(level, 6))}
+
+def paragraph(text: str, markdown: Optional[str] = None) -> Block:
+    """
+    A paragraph of running text.
+
+    Args:
+        text: Plain text, used for JSON content and chunks
+        markdown: Formatted or escaped text for the markdown output, if it
+            differs from the plain text
+    """
+    block = {"type": PARAGRAPH, "text": text}
+    if markdown is not None:
+        block["markdown"] = markdown
+    return block
+
+def table_row(cells: List[str], header: bool = False, table: Optional[str] = None) -> Block:
+    """
+    One row of a table. A table starts at a header row; a data row that
+    follows no header row, or names a different table, starts a new table
+    with itself as the header.
+
+    Args:
+        cells: Cell values as display strings
+        header: Whether the row holds column names
+        table: Name of the table, e.g. a sheet title
+    """
+    block = {"type": TABLE_ROW, "cells": cells, "header": header}
+    if table is not None:
+        block["table"] = table
+    return block
+
+def code_block(
+    text: str,
+    language: str,
+    start_line: int = 1,
+    name: Optional[str] = None,
+    kind: str = "code_block"
+) -> Block:
+    """
+    A span of source code. Consecutive blocks in the same language render
+    as one fenced block, so a file can be split into definitions without
+    changing its markdown.
+
+    Args:
+        text: The exact source text of the span
+        language: Language name for the code fence
+        start_line: Line of the file the span starts on
+        name: Name of the function or class the span defines, if any
+        kind: 'definition' or 'code_block'
+    """
+    block = {"type": CODE_BLOCK, "text": text, "language": language,
+             "start_line": start_line, "kind": kind}
+    if name is not None:
+        block["name"] = name
+    return block
+
+def page_break(page: int) -> Block:
+    """Start of a page; blocks until the next page break are on this page."""
+    return {"type": PAGE_BREAK, "page": page}
+
+def positions(page: int, items: List[Dict[str, Any]]) -> Block:
+    """Positions of the text elements on a page, as position dicts."""
+    return {"type": POSITIONS, "page": page, "items": items}
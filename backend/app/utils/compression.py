@@ -0,0 +1,121 @@
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+import gzip
+import shutil
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+SUPPORTED_ENCODINGS = ("gzip", "zstd")
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress bytes with the given encoding.
+
+    Args:
+        data: The bytes to compress
+        encoding: 'gzip' or 'zstd'
+        level: Optional compression level, uses the codec default if None
+
+    Returns:
+        The compressed bytes
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level if level is not None else 6)
+    if encoding == "zstd":
+        _require_zstd()
+        return zstandard.ZstdCompressor(level=level if level is not None else 3).compress(data)
+    raise CompressionError(f"Unsupported compression: {encoding}")
+
+def compress_stream(
+    source: BinaryIO,
+    target: BinaryIO,
+    size: int,
+    encoding: str,
+    level: Optional[int] = None
+) -> None:
+    """
+    Compress a file into another without reading it into memory.
+
+    Args:
+        source: File to read from its current position
+        target: File to write the compressed bytes to
+        size: Number of bytes in source, recorded in zstd frame headers
+        encoding: 'gzip' or 'zstd'
+        level: Optional compression level, uses the codec default if None
+    """
+    if encoding == "gzip":
+        with gzip.GzipFile(fileobj=target, mode="wb",
+                           compresslevel=level if level is not None else 6) as gz:
+            shutil.copyfileobj(source, gz)
+        return
+    if encoding == "zstd":
+        _require_zstd()
+        # The size goes into the frame header, so decompress() can size its output
+        zstandard.ZstdCompressor(level=level if level is not None else 3).copy_stream(
+            source, target, size=size
+        )
+        return
+    raise CompressionError(f"Unsupported compression: {encoding}")
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    """Decompress bytes written by compress, passing through if encoding is None."""
+    if not encoding:
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        _require_zstd()
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise CompressionError(f"Unsupported compression: {encoding}")
+
+def decompress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Incrementally decompress an iterable of compressed chunks."""
+    if not encoding:
+        yield from chunks
+        return
+
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(wbits=31)
+    elif encoding == "zstd":
+        _require_zstd()
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise CompressionError(f"Unsupported compression: {encoding}")
+
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+
+    if encoding == "gzip":
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """Check whether an Accept-Encoding header allows the given encoding."""
+    if not accept_encoding:
+        return False
+
+    # The encoding's own entry takes precedence over a wildcard
+    allowed: Dict[str, bool] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if name in (encoding, "*"):
+            # Honour explicit refusals such as "gzip;q=0"
+            params = params.replace(" ", "")
+            allowed.setdefault(name, params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"))
+
+    return allowed.get(encoding, allowed.get("*", False))
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise CompressionError("zstd compression requires the 'zstandard' package")
+
+class CompressionError(Exception):
+    """Raised when content cannot be compressed or decompressed."""
+    pass
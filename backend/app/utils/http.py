@@ -0,0 +1,73 @@
+from typing import Any, Optional, Tuple
+from fastapi.responses import JSONResponse
+from . import jsoncodec
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header.
+
+    Args:
+        range_header: Value of the Range header, e.g. 'bytes=0-1023'
+        size: Total size of the representation in bytes
+
+    Returns:
+        Inclusive (start, end) byte offsets, or None to serve the full body
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        # Multipart ranges are not supported; serve the full body instead
+        return None
+
+    start_str, sep, end_str = spec.partition("-")
+    if not sep:
+        return None
+    if size == 0:
+        # An empty representation has no byte that any range could select
+        raise RangeNotSatisfiable(size)
+
+    try:
+        if not start_str:
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise RangeNotSatisfiable(size)
+            return max(size - length, 0), size - 1
+
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(size)
+
+    return start, min(end, size - 1)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag using weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return opaque(etag) in (opaque(tag) for tag in if_none_match.split(","))
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded compactly by the configured JSON backend."""
+
+    def render(self, content: Any) -> bytes:
+        return jsoncodec.dumps(content)
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header does not overlap the representation."""
+
+    def __init__(self, size: int):
+        super().__init__(f"Range not satisfiable for size {size}")
+        self.size = size
@@ -0,0 +1,69 @@
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+import msgpack
+
+from .blocks import Block, paragraph, positions
+
+# Bump when the layout of the packed document changes incompatibly
+FORMAT_VERSION = 2
+
+def new_document(
+    blocks: List[Block],
+    metadata: Dict[str, Any],
+    processor: str
+) -> Dict[str, Any]:
+    """
+    Build the intermediate representation of an extracted document.
+
+    Args:
+        blocks: The document's blocks in reading order, see utils/blocks.py
+        metadata: Extracted metadata
+        processor: Name of the processor class that extracted the document
+
+    Returns:
+        The intermediate document as a plain dict
+    """
+    return {
+        "version": FORMAT_VERSION,
+        "processor": processor,
+        "blocks": blocks,
+        "metadata": metadata,
+    }
+
+def pack_document(document: Dict[str, Any]) -> bytes:
+    """Serialize an intermediate document to compact msgpack bytes."""
+    try:
+        return msgpack.packb(document, default=str, use_bin_type=True)
+    except (TypeError, ValueError) as e:
+        raise IntermediateFormatError(f"Failed to pack document: {str(e)}")
+
+def unpack_document(data: bytes) -> Dict[str, Any]:
+    """Deserialize msgpack bytes produced by pack_document."""
+    try:
+        document = msgpack.unpackb(data, raw=False)
+    except (msgpack.exceptions.ExtraData, ValueError) as e:
+        raise IntermediateFormatError(f"Failed to unpack document: {str(e)}")
+
+    version: Optional[int] = document.get("version") if isinstance(document, dict) else None
+    if version == 1:
+        return _upgrade_v1(document)
+    if version != FORMAT_VERSION:
+        raise IntermediateFormatError(
+            f"Unsupported intermediate format version: {version}"
+        )
+
+    return document
+
+def _upgrade_v1(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a version 1 document (text plus positions in metadata) into blocks."""
+    metadata = dict(document["metadata"])
+    blocks = [paragraph(text) for text in document["text"].split("\n\n") if text.strip()]
+    by_page: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for position in metadata.pop("positions", None) or []:
+        by_page[position.get("page", 1)].append(position)
+    blocks.extend(positions(page, items) for page, items in sorted(by_page.items()))
+    return new_document(blocks, metadata, document["processor"])
+
+class IntermediateFormatError(Exception):
+    """Raised when an intermediate document cannot be packed or unpacked."""
+    pass
@@ -0,0 +1,120 @@
+from datetime import date, time
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Type
+import dataclasses
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib codec is the fallback
+    orjson = None
+
+# Surrogate code points, which UTF-8 cannot encode, e.g. from text decoded
+# with surrogateescape; they are written as U+FFFD
+LONE_SURROGATE = re.compile("[\ud800-\udfff]")
+
+def _default(value: Any) -> Any:
+    """Encode what JSON has no type for as orjson does, anything else as str."""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+class JsonBackend:
+    """Encodes values to compact UTF-8 JSON and decodes JSON bytes."""
+
+    name = "stdlib"
+
+    def dumps(self, value: Any) -> bytes:
+        text = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default)
+        try:
+            return text.encode("utf-8")
+        except UnicodeEncodeError:
+            return LONE_SURROGATE.sub("\ufffd", text).encode("utf-8")
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+class OrjsonBackend(JsonBackend):
+    """orjson, several times faster than the stdlib on large documents."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise JsonBackendError("The orjson JSON backend requires the 'orjson' package")
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Values orjson rejects, e.g. integers beyond 64 bits or lone surrogates
+            return super().dumps(value)
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        return orjson.loads(data)
+
+BACKENDS: Dict[str, Type[JsonBackend]] = {
+    "stdlib": JsonBackend,
+    "orjson": OrjsonBackend,
+}
+
+_backend: Optional[JsonBackend] = None
+
+def use_backend(name: str = "auto") -> JsonBackend:
+    """
+    Select the JSON backend used by dumps() and loads().
+
+    Args:
+        name: 'orjson', 'stdlib', or 'auto' for orjson when it is installed
+
+    Returns:
+        The selected backend
+    """
+    global _backend
+    if name == "auto":
+        name = "orjson" if orjson is not None else "stdlib"
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise JsonBackendError(f"Unknown JSON backend: {name}")
+    _backend = backend_class()
+    return _backend
+
+def get_backend() -> JsonBackend:
+    """The selected backend, choosing automatically on first use."""
+    return _backend or use_backend()
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as compact UTF-8 JSON."""
+    return get_backend().dumps(value)
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    """Decode JSON from bytes or text."""
+    return get_backend().loads(data)
+
+class JsonArrayWriter:
+    """
+    Streams a large JSON array into a file one item at a time, without
+    the brackets, so the array is never encoded as a whole.
+    """
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.count = 0
+
+    def write(self, item: Any) -> None:
+        if self.count:
+            self.out.write(b",")
+        self.out.write(dumps(item))
+        self.count += 1
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.write(item)
+
+class JsonBackendError(Exception):
+    """Raised when a JSON backend cannot be selected."""
+    pass
@@ -0,0 +1,26 @@
+from typing import Dict, Any
+
+# Longest string value kept in the row summary
+MAX_SUMMARY_STRING_LENGTH = 256
+
+def summarize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce extracted metadata to the small summary stored on the file row.
+
+    Only scalar values are kept (titles, authors, counts, flags). Lists and
+    nested objects such as positions, page sizes, CSV headers or workbook
+    properties are left to the metadata detail artifact.
+
+    Args:
+        metadata: Full metadata as returned by a processor
+
+    Returns:
+        The summary metadata
+    """
+    summary = {}
+    for key, value in metadata.items():
+        if value is None or isinstance(value, (bool, int, float)):
+            summary[key] = value
+        elif isinstance(value, str) and len(value) <= MAX_SUMMARY_STRING_LENGTH:
+            summary[key] = value
+    return summary
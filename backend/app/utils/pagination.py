@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+import base64
+
+def encode_cursor(created_at: datetime, file_id: UUID) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{file_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, file_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(file_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+class InvalidCursorError(Exception):
+    """Raised when a pagination cursor cannot be decoded."""
+    pass
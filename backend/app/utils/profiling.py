@@ -0,0 +1,44 @@
+from typing import Optional
+import cProfile
+import marshal
+import pstats
+
+class _LoadedStats:
+    """Adapter letting pstats.Stats load an already-collected stats dict."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+def start_profiler(enabled: bool) -> Optional[cProfile.Profile]:
+    """Start a deterministic profiler if enabled, else return None."""
+    if not enabled:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def dump_profile(profiler: Optional[cProfile.Profile]) -> Optional[bytes]:
+    """
+    Stop a profiler and serialize its stats.
+
+    The bytes are in the format written by pstats.Stats.dump_stats, so a
+    saved profile opens with pstats, snakeviz or any other pstats viewer.
+    """
+    if profiler is None:
+        return None
+    profiler.disable()
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+def merge_profiles(*profiles: Optional[bytes]) -> Optional[bytes]:
+    """Combine serialized profiles, e.g. from a child process and the parent."""
+    loaded = [_LoadedStats(marshal.loads(p)) for p in profiles if p]
+    if not loaded:
+        return None
+    stats = pstats.Stats(loaded[0])
+    for other in loaded[1:]:
+        stats.add(other)
+    return marshal.dumps(stats.stats)
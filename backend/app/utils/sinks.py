@@ -0,0 +1,367 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .blocks import (
+    Block, HEADING, PARAGRAPH, TABLE_ROW, CODE_BLOCK, PAGE_BREAK, POSITIONS
+)
+from .chunker import DocumentChunker
+
+# Prose is chunked once this many times the chunk size is buffered; the
+# last chunk is carried over so chunks do not break at the buffer edge
+PROSE_BUFFER_CHUNKS = 8
+
+class BlockSink(ABC):
+    """A consumer of a block stream, see render_blocks."""
+
+    @abstractmethod
+    def feed(self, block: Block) -> None:
+        """Consume the next block."""
+        pass
+
+    @abstractmethod
+    def close(self) -> Any:
+        """Finish the stream and return the sink's result."""
+        pass
+
+def render_blocks(blocks: Iterable[Block], sinks: List[BlockSink]) -> List[Any]:
+    """
+    Feed every block to every sink in a single pass over the stream.
+    
+    Returns:
+        The result of each sink, in the order given
+    """
+    for block in blocks:
+        for sink in sinks:
+            sink.feed(block)
+    return [sink.close() for sink in sinks]
+
+def escape_cell(value: Any) -> str:
+    """Make a value safe to put in a markdown table cell."""
+    return str(value).replace("|", "\\|").replace("\r", "").replace("\n", "<br>")
+
+def column_name(index: int) -> str:
+    """Spreadsheet-style name for a 1-based column index, e.g. 'Column AB' for 28."""
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return f"Column {letters}"
+
+def widen_header(header: List[str], width: int) -> List[str]:
+    """The header, with named columns added up to the given width."""
+    return list(header) + [column_name(index) for index in range(len(header) + 1, width + 1)]
+
+def table_line(cells: List[str], width: int) -> str:
+    """One markdown table line, padded to the table's width."""
+    cells = list(cells) + [""] * (width - len(cells))
+    return "| " + " | ".join(escape_cell(cell) for cell in cells) + " |\n"
+
+class MarkdownSink(BlockSink):
+    """
+    Renders blocks as markdown with the metadata as YAML front matter.
+    
+    Output goes to ``write`` as it is produced; without one it is
+    collected and returned by close().
+    """
+
+    def __init__(self, metadata: Dict[str, Any], write: Optional[Callable[[str], Any]] = None):
+        self._parts: List[str] = []
+        self._write = write or self._parts.append
+        self._table_header: Optional[List[str]] = None
+        self._table_name: Optional[str] = None
+        self._code_language: Optional[str] = None
+        self._code_ends_with_newline = True
+        
+        self._write("---\n")
+        for key, value in metadata.items():
+            if key != "positions":  # Skip positions in front matter
+                self._write(f"{key}: {value}\n")
+        self._write("---\n\n")
+
+    def feed(self, block: Block) -> None:
+        kind = block["type"]
+        if kind != TABLE_ROW:
+            self._end_table()
+        if kind != CODE_BLOCK or block["language"] != self._code_language:
+            self._end_code()
+        
+        if kind == HEADING:
+            self._write(f"{'#' * block['level']} {block['text']}\n\n")
+        elif kind == PARAGRAPH:
+            self._write(f"{block.get('markdown', block['text'])}\n\n")
+        elif kind == TABLE_ROW:
+            self._table_row(block)
+        elif kind == CODE_BLOCK:
+            self._code(block)
+
+    def close(self) -> str:
+        self._end_table()
+        self._end_code()
+        return "".join(self._parts)
+
+    def _table_row(self, block: Block) -> None:
+        cells = block["cells"]
+        header = self._table_header
+        if block["header"] or header is None or block.get("table") != self._table_name:
+            self._start_table(cells, block.get("table"))
+            return
+        
+        if len(cells) > len(header):
+            # The header is already written, so the table continues with a wider one
+            self._start_table(widen_header(header, len(cells)), self._table_name)
+        self._write(table_line(cells, len(self._table_header)))
+
+    def _start_table(self, header: List[str], name: Optional[str]) -> None:
+        self._end_table()
+        self._table_header = list(header)
+        self._table_name = name
+        self._write(table_line(header, len(header)))
+        self._write("| " + " | ".join(["---"] * len(header)) + " |\n")
+
+    def _end_table(self) -> None:
+        if self._table_header is not None:
+            self._write("\n")
+            self._table_header = None
+            self._table_name = None
+
+    def _code(self, block: Block) -> None:
+        if self._code_language is None:
+            self._code_language = block["language"]
+            self._write(f"```{self._code_language}\n")
+        elif not self._code_ends_with_newline:
+            self._write("\n")
+        text = block["text"]
+        self._write(text)
+        self._code_ends_with_newline = text.endswith("\n")
+
+    def _end_code(self) -> None:
+        if self._code_language is not None:
+            self._write("```\n\n" if self._code_ends_with_newline else "\n```\n\n")
+            self._code_language = None
+            self._code_ends_with_newline = True
+
+class TextSink(BlockSink):
+    """
+    Renders the plain text content: paragraphs, tab-separated rows and code.
+    
+    Output goes to ``write`` as it is produced; without one it is
+    collected and returned by close().
+    """
+
+    def __init__(self, write: Optional[Callable[[str], Any]] = None):
+        self._parts: List[str] = []
+        self._write = write or self._parts.append
+        self._previous: Optional[str] = None
+
+    def feed(self, block: Block) -> None:
+        kind = block["type"]
+        if kind in (HEADING, PARAGRAPH):
+            text = block["text"]
+        elif kind == TABLE_ROW:
+            text = "\t".join(block["cells"])
+        elif kind == CODE_BLOCK:
+            text = block["text"]
+        else:
+            return
+        
+        if self._previous is not None:
+            # Rows and code spans continue their table or file
+            if kind == self._previous == TABLE_ROW:
+                self._write("\n")
+            elif not (kind == self._previous == CODE_BLOCK):
+                self._write("\n\n")
+        self._write(text)
+        self._previous = kind
+
+    def close(self) -> str:
+        return "".join(self._parts)
+
+class ChunkSink(BlockSink):
+    """
+    Splits the stream into chunks for retrieval.
+    
+    Prose is chunked by sentences, and chunks do not cross pages or
+    headings. Tables are chunked by rows, each chunk repeating the header
+    row. Code is chunked by the spans its processor emitted, e.g. one per
+    definition.
+    
+    Chunks go to ``emit`` as they are produced; without one they are
+    collected and returned by close().
+    """
+
+    def __init__(
+        self,
+        chunker: DocumentChunker,
+        emit: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ):
+        self.chunker = chunker
+        self._chunks: List[Dict[str, Any]] = []
+        self._emit = emit or self._chunks.append
+        self._page: Optional[int] = None
+        self._section: Optional[str] = None
+        self._prose: List[str] = []
+        self._prose_size = 0
+        # Table being chunked: its header, buffered rows and row numbers
+        self._table: Optional[Dict[str, Any]] = None
+
+    def feed(self, block: Block) -> None:
+        kind = block["type"]
+        if kind == HEADING:
+            self._flush_table()
+            self._flush_prose(final=True)
+            self._section = block["text"]
+            self._add_prose(block["text"])
+        elif kind == PARAGRAPH:
+            self._flush_table()
+            self._add_prose(block["text"])
+        elif kind == TABLE_ROW:
+            self._flush_prose(final=True)
+            self._table_row(block)
+        elif kind == CODE_BLOCK:
+            self._flush_table()
+            self._flush_prose(final=True)
+            self._code(block)
+        elif kind == PAGE_BREAK:
+            self._flush_table()
+            self._flush_prose(final=True)
+            self._page = block["page"]
+
+    def close(self) -> List[Dict[str, Any]]:
+        self._flush_table()
+        self._flush_prose(final=True)
+        return self._chunks
+
+    def _context(self) -> Dict[str, Any]:
+        context = {}
+        if self._page is not None:
+            context["page"] = self._page
+        if self._section is not None:
+            context["section"] = self._section
+        return context
+
+    def _add_prose(self, text: str) -> None:
+        self._prose.append(text)
+        self._prose_size += len(text)
+        if self._prose_size > PROSE_BUFFER_CHUNKS * self.chunker.max_chunk_size:
+            self._flush_prose(final=False)
+
+    def _flush_prose(self, final: bool) -> None:
+        if not self._prose:
+            return
+        chunks = self.chunker.chunk_text("\n\n".join(self._prose), self._context())
+        if not final and len(chunks) > 1:
+            carried = chunks.pop()["content"]
+            self._prose = [carried]
+            self._prose_size = len(carried)
+        else:
+            self._prose = []
+            self._prose_size = 0
+        for chunk in chunks:
+            self._emit(chunk)
+
+    def _table_row(self, block: Block) -> None:
+        table = self._table
+        if block["header"] or table is None or block.get("table") != table["name"]:
+            self._flush_table()
+            self._table = {
+                "name": block.get("table"),
+                "header": block["cells"],
+                "rows": [],
+                "size": 0,
+                "next_row": 1,
+            }
+            return
+        
+        if len(block["cells"]) > len(table["header"]):
+            # Rows wider than the header start a chunk under a widened header
+            self._flush_rows()
+            table["header"] = widen_header(table["header"], len(block["cells"]))
+        table["rows"].append(block["cells"])
+        table["size"] += sum(len(cell) for cell in block["cells"])
+        if table["size"] > self.chunker.max_chunk_size:
+            self._flush_rows()
+
+    def _flush_rows(self) -> None:
+        table = self._table
+        rows = table["rows"]
+        if not rows:
+            return
+        header = table["header"]
+        width = len(header)
+        content = (
+            table_line(header, width)
+            + "| " + " | ".join(["---"] * width) + " |\n"
+            + "".join(table_line(row, width) for row in rows)
+        ).rstrip("\n")
+        metadata = {
+            "char_count": len(content),
+            "row_range": {
+                "start": table["next_row"],
+                "end": table["next_row"] + len(rows) - 1,
+            },
+            "row_count": len(rows),
+            "column_count": width,
+            "headers": header,
+            **self._context(),
+        }
+        if table["name"] is not None:
+            metadata["table"] = table["name"]
+        self._emit({"content": content, "metadata": metadata})
+        table["next_row"] += len(rows)
+        table["rows"] = []
+        table["size"] = 0
+
+    def _flush_table(self) -> None:
+        if self._table is not None:
+            self._flush_rows()
+            self._table = None
+
+    def _code(self, block: Block) -> None:
+        lines = block["text"].split("\n")
+        start_line = block["start_line"]
+        # Oversized spans are split on line boundaries
+        piece: List[str] = []
+        piece_size = 0
+        piece_start = start_line
+        for number, line in enumerate(lines, start=start_line):
+            if piece and piece_size + len(line) > self.chunker.max_chunk_size:
+                self._add_code_chunk(block, piece, piece_start)
+                piece, piece_size, piece_start = [], 0, number
+            piece.append(line)
+            piece_size += len(line) + 1
+        self._add_code_chunk(block, piece, piece_start)
+
+    def _add_code_chunk(self, block: Block, lines: List[str], start_line: int) -> None:
+        content = "\n".join(lines).strip()
+        if not content:
+            return
+        # Report the lines the stripped content actually spans
+        leading = len(lines) - len("\n".join(lines).lstrip().split("\n"))
+        start_line += leading
+        metadata = {
+            "type": block["kind"],
+            "language": block["language"],
+            "start_line": start_line,
+            "end_line": start_line + content.count("\n"),
+            "char_count": len(content),
+        }
+        if "name" in block:
+            metadata["name"] = block["name"]
+        self._emit({"content": content, "metadata": metadata})
+
+class PositionSink(BlockSink):
+    """
+    Collects the position batches into one list, or passes each batch's
+    items to ``emit`` if given.
+    """
+
+    def __init__(self, emit: Optional[Callable[[List[Dict[str, Any]]], Any]] = None):
+        self._positions: List[Dict[str, Any]] = []
+        self._emit = emit or self._positions.extend
+
+    def feed(self, block: Block) -> None:
+        if block["type"] == POSITIONS:
+            self._emit(block["items"])
+
+    def close(self) -> List[Dict[str, Any]]:
+        return self._positions
@@ -0,0 +1,206 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Type
+import codecs
+import csv
+import struct
+import zipfile
+import zlib
+
+try:
+    import magic
+except ImportError:  # python-magic is optional; signatures and heuristics still apply
+    magic = None
+
+# Only this much of the start of a file is read to detect its format
+SNIFF_SIZE = 8 * 1024
+
+# Formats sniff() reports
+PDF = "pdf"
+DOCX = "docx"
+XLSX = "xlsx"
+ZIP = "zip"
+OLE = "ole"  # Legacy Office compound documents (.doc, .xls)
+TEXT = "text"
+BINARY = "binary"
+
+PDF_SIGNATURE = b"%PDF-"
+ZIP_SIGNATURE = b"PK\x03\x04"
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+# Readers tolerate junk before the PDF header, up to this offset
+PDF_HEADER_WINDOW = 1024
+
+# Text with byte order marks the processors cannot read line by line
+WIDE_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Control characters other than whitespace and escape, as a share of the
+# sample, above which undecodable bytes are taken for binary data
+CONTROL_CHARS = bytes(range(0, 8)) + bytes(range(14, 27)) + bytes(range(28, 32)) + b"\x7f"
+MAX_CONTROL_RATIO = 0.05
+
+# MIME types python-magic reports for text it does not file under text/*
+TEXT_MIMES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/csv",
+    "application/x-empty",
+    "inode/x-empty",
+}
+
+# OOXML part prefixes in ZIP entry names, and content types in [Content_Types].xml
+OOXML_PARTS = ((b"word/", DOCX), (b"xl/", XLSX))
+OOXML_CONTENT_TYPES = ((b"wordprocessingml", DOCX), (b"spreadsheetml", XLSX))
+
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+@dataclass
+class Sniffed:
+    """What the start of a file says about its format."""
+    format: str
+    mime: Optional[str] = None
+    # Text only: 'utf-8', 'latin-1', or a wide encoding the processors do not read
+    encoding: Optional[str] = None
+    # Text only: the CSV dialect, if the sample reads as delimited rows
+    dialect: Optional[Type[csv.Dialect]] = None
+
+def sniff(path: str | Path | BinaryIO, size: int = SNIFF_SIZE) -> Sniffed:
+    """
+    Detect a file's real format from its first bytes, whatever its name.
+
+    Only the first ``size`` bytes are read. ZIP archives whose leading
+    entries do not identify them may also have their central directory
+    read from the end of the file.
+
+    Args:
+        path: File to inspect, or a seekable binary file, e.g. an upload
+            not yet written to disk; it is read from the start and rewound
+        size: Number of leading bytes to read
+
+    Returns:
+        The detected format, with the encoding and CSV dialect for text
+    """
+    if isinstance(path, (str, Path)):
+        with open(path, "rb") as file:
+            head = file.read(size)
+    else:
+        path.seek(0)
+        head = path.read(size)
+        path.seek(0)
+
+    mime = magic.from_buffer(head, mime=True) if magic is not None else None
+
+    if PDF_SIGNATURE in head[:PDF_HEADER_WINDOW]:
+        return Sniffed(PDF, mime)
+    if head.startswith(ZIP_SIGNATURE):
+        return Sniffed(_zip_format(head, path), mime)
+    if head.startswith(OLE_SIGNATURE):
+        return Sniffed(OLE, mime)
+
+    for bom, encoding in WIDE_BOMS:
+        if head.startswith(bom):
+            return Sniffed(TEXT, mime, encoding)
+
+    encoding = _text_encoding(head)
+    if encoding is None:
+        return Sniffed(BINARY, mime)
+    if encoding == "latin-1" and _binary_mime(mime):
+        # Bytes that pass for latin-1 but that libmagic recognises as binary
+        return Sniffed(BINARY, mime)
+    # A couple of rows at least, so a line of prose is not taken for CSV
+    dialect = sniff_dialect(head) if head.count(b"\n") > 2 else None
+    return Sniffed(TEXT, mime, encoding, dialect)
+
+def sniff_dialect(sample: bytes) -> Optional[Type[csv.Dialect]]:
+    """The CSV dialect of a sample of delimited rows, or None if it is not one."""
+    # Drop the partial last line so it does not skew the detection
+    sample = sample[:sample.rfind(b"\n") + 1] or sample
+    try:
+        return csv.Sniffer().sniff(sample.decode("utf-8", errors="ignore"), delimiters=",;\t|")
+    except csv.Error:
+        return None
+
+def _binary_mime(mime: Optional[str]) -> bool:
+    """Whether python-magic identified a specific, non-text format."""
+    if mime is None or mime == "application/octet-stream":
+        return False
+    return not (mime.startswith("text/") or mime in TEXT_MIMES)
+
+def _text_encoding(head: bytes) -> Optional[str]:
+    """'utf-8' or 'latin-1' if the sample reads as text, else None."""
+    if b"\x00" in head:
+        return None
+    try:
+        # The sample may end inside a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    # Any byte is latin-1, so judge by how much of it is control characters
+    controls = sum(head.count(char) for char in CONTROL_CHARS)
+    if head and controls / len(head) > MAX_CONTROL_RATIO:
+        return None
+    return "latin-1"
+
+def _zip_format(head: bytes, path: str | Path | BinaryIO) -> str:
+    """DOCX or XLSX for Office Open XML packages, else ZIP."""
+    offset = 0
+    # Walk the local file headers that fit in the sample
+    while offset + LOCAL_HEADER.size <= len(head):
+        (signature, _, flags, method, _, _, _, compressed_size, _,
+         name_length, extra_length) = LOCAL_HEADER.unpack_from(head, offset)
+        if signature != ZIP_SIGNATURE:
+            break
+        name_start = offset + LOCAL_HEADER.size
+        data_start = name_start + name_length + extra_length
+        name = head[name_start:name_start + name_length]
+        for prefix, detected in OOXML_PARTS:
+            if name.startswith(prefix):
+                return detected
+        if name == b"[Content_Types].xml":
+            # Streamed entries record their size after the data, so take what there is
+            data_end = len(head) if flags & 0x08 else data_start + compressed_size
+            detected = _content_types_format(head[data_start:data_end], method)
+            if detected:
+                return detected
+        if flags & 0x08:
+            # Sizes follow the data in a descriptor; the next header cannot be found
+            break
+        offset = data_start + compressed_size
+
+    return _zip_directory_format(path)
+
+def _content_types_format(data: bytes, method: int) -> Optional[str]:
+    """The OOXML format declared by a (possibly truncated) [Content_Types].xml."""
+    if method == zipfile.ZIP_DEFLATED:
+        try:
+            data = zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+        except zlib.error:
+            return None
+    elif method != zipfile.ZIP_STORED:
+        return None
+    for marker, detected in OOXML_CONTENT_TYPES:
+        if marker in data:
+            return detected
+    return None
+
+def _zip_directory_format(path: str | Path | BinaryIO) -> str:
+    """Classify a ZIP by its central directory, which is read from the end of the file."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names: List[str] = archive.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return ZIP
+    finally:
+        if not isinstance(path, (str, Path)):
+            path.seek(0)
+    for prefix, detected in OOXML_PARTS:
+        if any(name.startswith(prefix.decode()) for name in names):
+            return detected
+    return ZIP
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, Dict, Optional
+import shutil
+
+from .blocks import Block
+from .chunker import DocumentChunker
+from .jsoncodec import JsonArrayWriter, dumps
+from .sinks import BlockSink, ChunkSink, PositionSink, TextSink
+
+def new_spool(max_size: int) -> SpooledTemporaryFile:
+    """A binary temp file kept in memory up to max_size bytes, then on disk."""
+    return SpooledTemporaryFile(max_size=max_size)
+
+class TextWriter:
+    """Writes text into a binary file as UTF-8, counting words on the way."""
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.word_count = 0
+
+    def write(self, text: str) -> None:
+        # Sinks write whole lines and blocks, so no word spans two writes
+        self.out.write(text.encode("utf-8"))
+        self.word_count += len(text.split())
+
+class JsonSink(BlockSink):
+    """
+    Streams the JSON output, {"content", "metadata", "chunks"}, into a file.
+    
+    Content is written as blocks arrive. Chunks and positions come out of
+    the same pass but follow the content in the document, so they are
+    encoded into spools and copied in by close(). The metadata, with the
+    positions, can also be written to a second file for the metadata
+    artifact.
+    """
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        metadata: Dict[str, Any],
+        chunker: DocumentChunker,
+        spool_size: int,
+        metadata_out: Optional[BinaryIO] = None
+    ):
+        self.out = out
+        self.metadata = metadata
+        self.metadata_out = metadata_out
+        self._chunk_spool = new_spool(spool_size)
+        self._position_spool = new_spool(spool_size)
+        self._chunks = JsonArrayWriter(self._chunk_spool)
+        self._positions = JsonArrayWriter(self._position_spool)
+        self._sinks = [
+            TextSink(self._write_content),
+            ChunkSink(chunker, self._chunks.write),
+            PositionSink(self._positions.extend),
+        ]
+        self.out.write(b'{"content":"')
+
+    @property
+    def chunk_count(self) -> int:
+        return self._chunks.count
+
+    def feed(self, block: Block) -> None:
+        for sink in self._sinks:
+            sink.feed(block)
+
+    def close(self) -> None:
+        try:
+            for sink in self._sinks:
+                sink.close()
+            self.out.write(b'","metadata":')
+            self._write_metadata(self.out)
+            self.out.write(b',"chunks":[')
+            self._copy(self._chunk_spool, self.out)
+            self.out.write(b']}')
+            if self.metadata_out is not None:
+                self._write_metadata(self.metadata_out)
+        finally:
+            self._chunk_spool.close()
+            self._position_spool.close()
+
+    def _write_content(self, text: str) -> None:
+        # Escaping is per character, so escaped pieces join into the escaped whole
+        self.out.write(dumps(text)[1:-1])
+
+    def _write_metadata(self, out: BinaryIO) -> None:
+        encoded = dumps(self.metadata)
+        out.write(encoded[:-1] + (b',' if self.metadata else b'') + b'"positions":[')
+        self._copy(self._position_spool, out)
+        out.write(b']}')
+
+    @staticmethod
+    def _copy(spool: BinaryIO, out: BinaryIO) -> None:
+        spool.seek(0)
+        shutil.copyfileobj(spool, out)
+
+@dataclass
+class RenderedDocument:
+    """
+    Rendered outputs as UTF-8 files positioned at their start.
+    
+    The files are spooled temp files; close the document, or use it as a
+    context manager, once they have been stored.
+    """
+    markdown: BinaryIO
+    json: BinaryIO
+    metadata_json: BinaryIO
+    metadata: Dict[str, Any]
+    word_count: int
+    chunk_count: int
+
+    def close(self) -> None:
+        for file in (self.markdown, self.json, self.metadata_json):
+            file.close()
+
+    def __enter__(self) -> "RenderedDocument":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,201 @@
+from pathlib import Path
+from typing import Dict, List
+import csv
+import io
+import random
+
+# Fixed vocabulary so generated text looks like prose and compresses like it
+WORDS = (
+    "the quick brown fox jumps over lazy dog data file report table value "
+    "system process result market growth revenue customer product service "
+    "analysis summary section page document content metadata position"
+).split()
+
+def _sentence(rng: random.Random, length: int = 12) -> str:
+    words = [rng.choice(WORDS) for _ in range(length)]
+    return " ".join(words).capitalize() + "."
+
+def make_text(rng: random.Random, size: int) -> bytes:
+    """Plain text with roughly `size` paragraphs."""
+    paragraphs = [
+        " ".join(_sentence(rng) for _ in range(rng.randint(3, 8)))
+        for _ in range(size)
+    ]
+    return "\n\n".join(paragraphs).encode("utf-8")
+
+def make_code(rng: random.Random, size: int) -> bytes:
+    """Python source with `size` functions spread over a few classes."""
+    lines = ["import os", "import sys", ""]
+    for i in range(size):
+        if i % 10 == 0:
+            lines += [f"class Component{i // 10}:", f'    """{_sentence(rng)}"""', ""]
+        lines += [
+            f"    def method_{i}(self, value):",
+            f"        # {_sentence(rng, 6)}",
+            f"        result = value * {rng.randint(1, 100)}",
+            "        return result",
+            "",
+        ]
+    return "\n".join(lines).encode("utf-8")
+
+def make_csv(rng: random.Random, size: int, columns: int = 10) -> bytes:
+    """CSV with a header row and `size` rows of mixed text and numbers."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([f"column_{c}" for c in range(columns)])
+    for _ in range(size):
+        writer.writerow([
+            rng.randint(0, 10_000) if c % 2 else rng.choice(WORDS)
+            for c in range(columns)
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+def make_xlsx(rng: random.Random, size: int, columns: int = 10) -> bytes:
+    """Workbook with two sheets holding `size` rows between them."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheets = [workbook.active, workbook.create_sheet("Second")]
+    for index, sheet in enumerate(sheets):
+        sheet.append([f"column_{c}" for c in range(columns)])
+        for _ in range(size // len(sheets) + (index < size % len(sheets))):
+            sheet.append([
+                rng.randint(0, 10_000) if c % 2 else rng.choice(WORDS)
+                for c in range(columns)
+            ])
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def make_docx(rng: random.Random, size: int) -> bytes:
+    """Document with `size` paragraphs, a heading every ten and a few tables."""
+    import docx
+
+    document = docx.Document()
+    for i in range(size):
+        if i % 10 == 0:
+            document.add_heading(_sentence(rng, 4), level=1 + (i // 10) % 3)
+        document.add_paragraph(" ".join(_sentence(rng) for _ in range(3)))
+        if i % 25 == 24:
+            table = document.add_table(rows=5, cols=4)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = rng.choice(WORDS)
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def make_pdf(rng: random.Random, size: int, lines_per_page: int = 40) -> bytes:
+    """
+    PDF with `size` pages of text.
+
+    Written by hand so the benchmarks need no PDF authoring library.
+    """
+    font_id = 3
+    page_ids = [4 + 2 * i for i in range(size)]
+    objects: Dict[int, bytes] = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: (
+            f"<< /Type /Pages /Count {size} /Kids ["
+            + " ".join(f"{pid} 0 R" for pid in page_ids)
+            + "] >>"
+        ).encode(),
+        font_id: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+
+    for page_id in page_ids:
+        lines = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        for _ in range(lines_per_page):
+            lines.append(f"({_sentence(rng, 10)}) Tj T*")
+        lines.append("ET")
+        stream = "\n".join(lines).encode("latin-1")
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+            f"/Contents {page_id + 1} 0 R >>"
+        ).encode()
+        objects[page_id + 1] = (
+            f"<< /Length {len(stream)} >>\nstream\n".encode()
+            + stream
+            + b"\nendstream"
+        )
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = output.tell()
+        output.write(f"{object_id} 0 obj\n".encode() + objects[object_id] + b"\nendobj\n")
+
+    xref_offset = output.tell()
+    count = max(objects) + 1
+    output.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode())
+    for object_id in range(1, count):
+        output.write(f"{offsets[object_id]:010d} 00000 n \n".encode())
+    output.write(
+        f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    )
+    return output.getvalue()
+
+# Format -> (file extension, content type, generator)
+GENERATORS: Dict[str, tuple] = {
+    "pdf": ("pdf", "application/pdf", make_pdf),
+    "docx": (
+        "docx",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        make_docx,
+    ),
+    "csv": ("csv", "text/csv", make_csv),
+    "xlsx": (
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        make_xlsx,
+    ),
+    "code": ("py", "text/x-python", make_code),
+    "txt": ("txt", "text/plain", make_text),
+}
+
+# Units of `size` per format at each scale: pages, paragraphs, rows or functions
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"pdf": 5, "docx": 50, "csv": 1_000, "xlsx": 1_000, "code": 50, "txt": 200},
+    "medium": {"pdf": 50, "docx": 500, "csv": 20_000, "xlsx": 10_000, "code": 500, "txt": 5_000},
+    "large": {"pdf": 300, "docx": 3_000, "csv": 200_000, "xlsx": 100_000, "code": 5_000, "txt": 50_000},
+}
+
+def generate_corpus(
+    directory: Path,
+    scale: str = "small",
+    seed: int = 1234,
+    formats: List[str] | None = None
+) -> Dict[str, Path]:
+    """
+    Write one deterministic sample file per format.
+
+    Args:
+        directory: Where to write the corpus
+        scale: 'small', 'medium' or 'large'
+        seed: Random seed; the same seed always yields the same bytes
+        formats: Subset of formats to generate, all by default
+
+    Returns:
+        Mapping of format name to generated file path
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = {}
+    for name in formats or GENERATORS:
+        extension, _, generator = GENERATORS[name]
+        size = SCALES[scale][name]
+        path = directory / f"{name}_{scale}_{size}_{seed}.{extension}"
+        if not path.exists():
+            # Seed per format so subsets generate the same bytes as the full set
+            path.write_bytes(generator(random.Random(f"{seed}:{name}"), size))
+        corpus[name] = path
+    return corpus
+
+def content_type_for(name: str) -> str:
+    return GENERATORS[name][1]
+
+def units_for(name: str, scale: str) -> int:
+    return SCALES[scale][name]
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.corpus import GENERATORS, SCALES, generate_corpus, content_type_for, units_for
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_CORPUS_DIR = BENCHMARK_DIR / ".corpus"
+MODES = ("processor", "pipeline")
+
+# Metrics compared against the baseline, and whether higher is better
+COMPARED_METRICS = {
+    "p50_seconds": False,
+    "p99_seconds": False,
+    "bytes_per_second": True,
+    "peak_rss_mb": False,
+}
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+async def _run_processor(path: Path, name: str) -> None:
+    """Extract and render one file with its processor alone."""
+    from app.models.file_model import File
+    from app.processors.factory import ProcessorFactory
+
+    file_info = File(
+        filename=path.name,
+        original_type=content_type_for(name),
+        file_size=path.stat().st_size
+    )
+    processor = ProcessorFactory.create_processor(path, file_info)
+    (await processor.process()).close()
+
+async def _run_pipeline(path: Path, name: str) -> None:
+    """Run one file through FileService.process_file against the stand-ins."""
+    from io import BytesIO
+    from fastapi import UploadFile
+    from starlette.datastructures import Headers
+    from app.core.file_service import file_service
+    from benchmarks.standins import InMemorySession
+
+    upload = UploadFile(
+        file=BytesIO(path.read_bytes()),
+        filename=path.name,
+        headers=Headers({"content-type": content_type_for(name)})
+    )
+    await file_service.process_file(upload, InMemorySession())
+
+def run_case(mode: str, name: str, path: Path, scale: str, iterations: int, warmup: int) -> Dict:
+    """
+    Time one format in one mode inside the current process.
+
+    Runs in a dedicated subprocess (see --worker) so peak RSS belongs to
+    this case alone.
+    """
+    from benchmarks.standins import configure_environment, install_standins
+
+    configure_environment()
+    if mode == "pipeline":
+        install_standins()
+
+    runner = _run_processor if mode == "processor" else _run_pipeline
+    size_bytes = path.stat().st_size
+
+    async def measure() -> List[float]:
+        for _ in range(warmup):
+            await runner(path, name)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await runner(path, name)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    samples = asyncio.run(measure())
+    p50 = statistics.median(samples)
+    units = units_for(name, scale)
+    return {
+        "mode": mode,
+        "format": name,
+        "iterations": iterations,
+        "size_bytes": size_bytes,
+        "units": units,
+        "p50_seconds": round(p50, 6),
+        "p99_seconds": round(percentile(samples, 99), 6),
+        "bytes_per_second": round(size_bytes / p50, 1),
+        "units_per_second": round(units / p50, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def run_in_subprocess(mode: str, name: str, path: Path, args: argparse.Namespace) -> Dict:
+    """Run a case in a fresh interpreter and collect its JSON result."""
+    completed = subprocess.run(
+        [
+            sys.executable, str(Path(__file__).resolve()),
+            "--worker", mode, name, str(path),
+            "--scale", args.scale,
+            "--iterations", str(args.iterations),
+            "--warmup", str(args.warmup),
+        ],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return {"mode": mode, "format": name, "error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def case_key(result: Dict) -> str:
+    return f"{result['mode']}:{result['format']}"
+
+def compare(
+    results: List[Dict],
+    baseline: Dict[str, Dict],
+    threshold: float
+) -> List[str]:
+    """
+    Compare results against a baseline.
+
+    Args:
+        results: Results of this run
+        baseline: Results of the baseline run keyed by case
+        threshold: Relative change that counts as a regression, e.g. 0.1
+
+    Returns:
+        Descriptions of the regressions found
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(case_key(result))
+        if not previous or "error" in previous:
+            continue
+        if "error" in result:
+            regressions.append(f"{case_key(result)} now fails: {result['error']}")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            result[f"{metric}_change"] = round(change, 4)
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(
+                    f"{case_key(result)} {metric}: {old} -> {new} ({change:+.1%})"
+                )
+    return regressions
+
+def print_table(results: List[Dict]) -> None:
+    header = f"{'case':<20}{'p50 s':>10}{'p99 s':>10}{'MB/s':>10}{'units/s':>12}{'RSS MB':>10}{'vs base':>10}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        if "error" in result:
+            print(f"{case_key(result):<20}  error: {result['error']}")
+            continue
+        change = result.get("p50_seconds_change")
+        print(
+            f"{case_key(result):<20}"
+            f"{result['p50_seconds']:>10.4f}"
+            f"{result['p99_seconds']:>10.4f}"
+            f"{result['bytes_per_second'] / 1e6:>10.2f}"
+            f"{result['units_per_second']:>12.1f}"
+            f"{result['peak_rss_mb']:>10.1f}"
+            f"{'' if change is None else f'{change:+.1%}':>10}"
+        )
+
+def main(args: argparse.Namespace) -> int:
+    corpus = generate_corpus(args.corpus_dir, args.scale, args.seed, args.formats)
+    modes = MODES if args.mode == "all" else (args.mode,)
+
+    results = [
+        run_in_subprocess(mode, name, path, args)
+        for mode in modes
+        for name, path in corpus.items()
+    ]
+
+    baseline_path: Path = args.baseline
+    regressions: List[str] = []
+    baseline: Optional[Dict] = None
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("scale") != args.scale:
+            print(f"Baseline was recorded at scale {baseline.get('scale')!r}, not comparing")
+        else:
+            regressions = compare(results, baseline["results"], args.threshold)
+    elif not args.save_baseline:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+
+    print_table(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps({
+            "scale": args.scale,
+            "seed": args.seed,
+            "python": sys.version.split()[0],
+            "results": {case_key(r): r for r in results},
+        }, indent=2))
+        print(f"Saved baseline to {baseline_path}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark processors and the conversion pipeline on a synthetic corpus"
+    )
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all")
+    parser.add_argument("--formats", nargs="+", choices=list(GENERATORS), default=None)
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative change reported as a regression")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Also write this run's results as JSON")
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "FORMAT", "PATH"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, name, path = args.worker
+        print(json.dumps(run_case(mode, name, Path(path), args.scale, args.iterations, args.warmup)))
+        sys.exit(0)
+
+    sys.exit(main(args))
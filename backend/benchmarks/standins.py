@@ -0,0 +1,146 @@
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Optional, Tuple
+import hashlib
+import os
+
+# Settings the app requires at import time; the stand-ins never connect
+ENVIRONMENT_DEFAULTS = {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_DB": "benchmark",
+    "POSTGRES_USER": "benchmark",
+    "POSTGRES_PASSWORD": "benchmark",
+    "MINIO_ROOT_USER": "benchmark",
+    "MINIO_ROOT_PASSWORD": "benchmark",
+    "REDIS_HOST": "localhost",
+    # Every iteration must convert, not hit a cache
+    "CONVERSION_CACHE_ENABLED": "false",
+    "CONTENT_CACHE_ENABLED": "false",
+    # Time the full conversion, not a preview followed by a background task
+    "PREVIEW_ENABLED": "false",
+}
+
+def configure_environment() -> None:
+    """Set the settings the app needs before anything from it is imported."""
+    for key, value in ENVIRONMENT_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+class _Response:
+    """The parts of urllib3's HTTPResponse that StorageService uses."""
+
+    def __init__(self, body: bytes, headers: Dict[str, str]):
+        self._body = body
+        self.headers = headers
+
+    def read(self) -> bytes:
+        return self._body
+
+    def stream(self, chunk_size: int) -> Iterator[bytes]:
+        for start in range(0, len(self._body), chunk_size):
+            yield self._body[start:start + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+    def release_conn(self) -> None:
+        pass
+
+class LocalObjectStore:
+    """In-memory stand-in for the MinIO client."""
+
+    def __init__(self):
+        # (bucket, name) -> (body, content type, user metadata)
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, Optional[str], Dict[str, str]]] = {}
+        self.buckets = set()
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return bucket in self.buckets
+
+    def make_bucket(self, bucket: str) -> None:
+        self.buckets.add(bucket)
+
+    def put_object(
+        self,
+        bucket: str,
+        name: str,
+        data,
+        length: int,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> None:
+        self.objects[(bucket, name)] = (data.read(length), content_type, dict(metadata or {}))
+
+    def fput_object(
+        self,
+        bucket: str,
+        name: str,
+        file_path: str,
+        content_type: Optional[str] = None
+    ) -> None:
+        with open(file_path, "rb") as f:
+            self.objects[(bucket, name)] = (f.read(), content_type, {})
+
+    def get_object(
+        self,
+        bucket: str,
+        name: str,
+        offset: int = 0,
+        length: int = 0
+    ) -> _Response:
+        body, content_type, metadata = self.objects[(bucket, name)]
+        end = offset + length if length else len(body)
+        return _Response(body[offset:end], {"content-type": content_type or "", **metadata})
+
+    def stat_object(self, bucket: str, name: str) -> SimpleNamespace:
+        body, content_type, metadata = self.objects[(bucket, name)]
+        return SimpleNamespace(
+            size=len(body),
+            etag=hashlib.md5(body).hexdigest(),
+            content_type=content_type,
+            metadata=metadata
+        )
+
+    def copy_object(self, bucket: str, name: str, source) -> None:
+        self.objects[(bucket, name)] = self.objects[(source.bucket_name, source.object_name)]
+
+    def remove_object(self, bucket: str, name: str) -> None:
+        self.objects.pop((bucket, name), None)
+
+class InMemorySession:
+    """Stand-in for the AsyncSession used by FileService.process_file."""
+
+    def __init__(self):
+        self.rows: Dict[Any, Any] = {}
+
+    def add(self, row) -> None:
+        self.rows[row.id] = row
+
+    async def commit(self) -> None:
+        pass
+
+    async def refresh(self, row) -> None:
+        pass
+
+    async def get(self, model, key):
+        return self.rows.get(key)
+
+class NullRedis:
+    """Stand-in for the event bus Redis client; events go nowhere."""
+
+    async def publish(self, channel: str, payload: str) -> int:
+        return 0
+
+def install_standins() -> LocalObjectStore:
+    """
+    Point the app's storage and event singletons at in-process stand-ins.
+
+    Returns:
+        The object store, so callers can inspect what was written
+    """
+    from app.core.storage import storage
+    from app.core.events import events
+
+    store = LocalObjectStore()
+    storage._client = store
+    storage.warmup()
+    events._redis = NullRedis()
+    return store
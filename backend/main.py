@@ -1,21 +1,29 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from pathlib import Path
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, async_engine
+from app.core import metrics
 from app.routers import files
+from app.utils import jsoncodec
+from app.utils.http import FastJSONResponse
 
 # Create uploads directory
 uploads_dir = Path(settings.UPLOAD_FOLDER)
 uploads_dir.mkdir(exist_ok=True)
 
+# Select the JSON backend used for stored artifacts and responses
+jsoncodec.use_backend(settings.JSON_BACKEND)
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="Convert various file types to markdown with embedded metadata"
+    description="Convert various file types to markdown with embedded metadata",
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -33,7 +41,7 @@ app.include_router(files.router, prefix=settings.API_V1_STR)
 # Error handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "status": "error",
@@ -49,18 +57,55 @@ async def startup_event():
     # Initialize database tables
     init_db()
     
-    # Ensure MinIO bucket exists
+    # Connect to MinIO and ensure the bucket exists
     from app.core.storage import storage
-    storage._ensure_bucket_exists()
+    storage.warmup()
+    
+    # Read pool and queue gauges at scrape time
+    pool = async_engine.sync_engine.pool
+    metrics.register_gauge_callbacks(
+        pool_checked_out=pool.checkedout,
+        pool_size=pool.size,
+        storage_queue_depth=storage.queue_depth
+    )
+    
+    # Renew this worker's job leases and recover jobs of dead workers
+    from app.core.file_service import file_service
+    from app.core.leases import job_leases
+    job_leases.start(
+        requeue=file_service.process_stored_upload,
+        upload_folder=file_service.upload_folder
+    )
+    
+    # Optionally import processors ahead of the first upload
+    if settings.PRELOAD_PROCESSORS:
+        from app.processors.factory import ProcessorFactory
+        ProcessorFactory.preload(settings.PRELOAD_PROCESSORS)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background services."""
+    from app.core.leases import job_leases
+    await job_leases.stop()
+    
+    from app.core.storage import storage
+    storage.cache.stop()
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
+    from app.core.storage import storage
     return {
         "status": "healthy",
-        "version": settings.VERSION
+        "version": settings.VERSION,
+        "content_cache": storage.cache.stats()
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,128 @@
+"""Conversion pipeline columns and indexes
+
+Brings the files table created by revision 1 up to the columns and indexes
+the conversion pipeline uses: renamed type and error columns, file sizes,
+stored artifacts, conversion caching, batches, counts, resource usage,
+previews and job leases.
+
+Databases created from db/init.sql already have this schema. Do not
+upgrade them; record them as current instead:
+
+    alembic stamp 2
+
+Revision ID: 2
+Revises: 1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '2'
+down_revision = '1'
+branch_labels = None
+depends_on = None
+
+file_status = postgresql.ENUM('pending', 'processing', 'completed', 'failed', name='file_status', create_type=False)
+content_stage = postgresql.ENUM('preview', 'full', name='content_stage', create_type=False)
+
+# Revision 1 names, and their names in the application schema
+RENAMED_COLUMNS = [
+    ('file_type', 'original_type'),
+    ('error', 'error_message'),
+]
+RENAMED_INDEXES = [
+    ('ix_files_file_type', 'ix_files_original_type'),
+]
+
+# Columns revision 1 does not have; original_path it already has
+COLUMNS = [
+    # Existing rows get a size of 0; the default is dropped afterwards
+    sa.Column('file_size', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('content_hash', sa.String(64), nullable=True),
+    sa.Column('batch_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('conversion_key', sa.Text(), nullable=True),
+    sa.Column('markdown_path', sa.Text(), nullable=True),
+    sa.Column('json_path', sa.Text(), nullable=True),
+    sa.Column('metadata_path', sa.Text(), nullable=True),
+    sa.Column('intermediate_path', sa.Text(), nullable=True),
+    sa.Column('profile_path', sa.Text(), nullable=True),
+    sa.Column('content_stage', content_stage, nullable=True),
+    sa.Column('preview_markdown_path', sa.Text(), nullable=True),
+    sa.Column('preview_json_path', sa.Text(), nullable=True),
+    sa.Column('page_count', sa.Integer(), nullable=True),
+    sa.Column('word_count', sa.Integer(), nullable=True),
+    sa.Column('chunk_count', sa.Integer(), nullable=True),
+    sa.Column('peak_memory_mb', sa.REAL(), nullable=True),
+    sa.Column('cpu_seconds', sa.REAL(), nullable=True),
+    sa.Column('wall_seconds', sa.REAL(), nullable=True),
+    sa.Column('lease_owner', sa.Text(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('retries', sa.Integer(), nullable=False, server_default='0'),
+]
+
+# Index name, columns and partial-index condition, as in db/init.sql;
+# status, filename and created_at are indexed by revision 1
+INDEXES = [
+    ('idx_files_content_hash', ['content_hash'], None),
+    ('idx_files_batch_id', ['batch_id'], None),
+    # Lease heartbeats by owner, and the reaper's scan for lapsed leases
+    ('idx_files_lease_owner', ['lease_owner'], None),
+    ('idx_files_lease_expires_at', ['lease_expires_at'], "status IN ('pending', 'processing')"),
+    # Keyset pagination on (created_at, id), optionally narrowed by status or type
+    ('idx_files_created_at_id', ['created_at', 'id'], None),
+    ('idx_files_status_created_at_id', ['status', 'created_at', 'id'], None),
+    ('idx_files_type_created_at_id', ['original_type', 'created_at', 'id'], None),
+]
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    file_status.create(bind, checkfirst=True)
+    content_stage.create(bind, checkfirst=True)
+
+    for old, new in RENAMED_COLUMNS:
+        op.alter_column('files', old, new_column_name=new)
+    for old, new in RENAMED_INDEXES:
+        op.execute(f'ALTER INDEX {old} RENAME TO {new}')
+
+    # Revision 1 stores the status as free text
+    op.alter_column(
+        'files', 'status',
+        type_=file_status,
+        postgresql_using='lower(status)::file_status',
+        server_default='pending'
+    )
+
+    for column in COLUMNS:
+        op.add_column('files', column)
+    op.alter_column('files', 'file_size', server_default=None)
+
+    for name, columns, where in INDEXES:
+        op.create_index(
+            name, 'files', columns, unique=False,
+            postgresql_where=sa.text(where) if where else None
+        )
+
+def downgrade() -> None:
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='files')
+    for column in reversed(COLUMNS):
+        op.drop_column('files', column.name)
+
+    op.alter_column(
+        'files', 'status',
+        type_=sa.String(),
+        postgresql_using='status::text',
+        server_default=None
+    )
+
+    for old, new in reversed(RENAMED_INDEXES):
+        op.execute(f'ALTER INDEX {new} RENAME TO {old}')
+    for old, new in reversed(RENAMED_COLUMNS):
+        op.alter_column('files', new, new_column_name=old)
+
+    bind = op.get_bind()
+    content_stage.drop(bind, checkfirst=True)
+    file_status.drop(bind, checkfirst=True)
@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import select
+
+from app.core.database import get_async_session
+from app.core.file_service import file_service, FileProcessingError, FileNotReadyError
+from app.models.file_model import File, FileStatus
+
+async def rerender_corpus(chunk_size: int | None, chunk_overlap: int | None) -> None:
+    """Re-render every completed file from its intermediate document."""
+    async with get_async_session() as db:
+        statement = select(File.id).where(
+            File.status == FileStatus.COMPLETED,
+            File.intermediate_path.is_not(None)
+        )
+        file_ids = (await db.exec(statement)).all()
+
+    done = 0
+    for file_id in file_ids:
+        async with get_async_session() as db:
+            try:
+                await file_service.rerender_file(file_id, db, chunk_size, chunk_overlap)
+                done += 1
+            except (FileProcessingError, FileNotReadyError, FileNotFoundError) as err:
+                print(f"Error re-rendering {file_id}: {err}")
+
+    print(f"Re-rendered {done}/{len(file_ids)} files")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Regenerate markdown, JSON and chunks from cached intermediate documents"
+    )
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(rerender_corpus(args.chunk_size, args.chunk_overlap))
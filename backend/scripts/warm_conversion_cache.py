@@ -0,0 +1,18 @@
+import asyncio
+import os
+import sys
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.conversion_cache import conversion_cache
+from app.core.database import get_async_session
+
+async def warm_conversion_cache() -> None:
+    """Load conversion cache entries for every completed file."""
+    async with get_async_session() as db:
+        written = await conversion_cache.warm(db)
+    print(f"Warmed {written} conversion cache entries")
+
+if __name__ == "__main__":
+    asyncio.run(warm_conversion_cache())
@@ -0,0 +1,7 @@
+import os
+
+# Settings the app requires at import time; no test connects to them
+for name in ("POSTGRES_HOST", "POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD",
+             "MINIO_ROOT_USER", "MINIO_ROOT_PASSWORD", "REDIS_HOST",
+             "DATABASE_URI", "ASYNC_DATABASE_URI"):
+    os.environ.setdefault(name, "test")
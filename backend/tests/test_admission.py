@@ -0,0 +1,195 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+
+# The real factory imports the model layer; admission only looks processors up
+_factory = types.ModuleType("app.processors.factory")
+
+class UnsupportedFileType(Exception):
+    pass
+
+class ProcessorFactory:
+    @classmethod
+    def get_processor_class(cls, extension):
+        return type(f"{extension.lstrip('.').capitalize()}Processor", (), {})
+
+    @classmethod
+    def processor_class_for(cls, file_name, sniffed):
+        return cls.get_processor_class(sniffed.format)
+
+_factory.ProcessorFactory = ProcessorFactory
+_factory.UnsupportedFileType = UnsupportedFileType
+_real_factory = sys.modules.get("app.processors.factory")
+sys.modules["app.processors.factory"] = _factory
+try:
+    from app.core.admission import AdmissionController, AdmissionRejected, Lane
+finally:
+    if _real_factory is None:
+        del sys.modules["app.processors.factory"]
+    else:
+        sys.modules["app.processors.factory"] = _real_factory
+
+def _controller(max_concurrent=1, reserved=0, bulk_min=0, weights=None, queue_size=100, timeout=5):
+    controller = AdmissionController()
+    controller.max_concurrent = max_concurrent
+    controller.processor_limits = {}
+    controller.interactive_reserved = reserved
+    controller.bulk_min_slots = bulk_min
+    controller.tenant_weights = weights or {}
+    controller.queue_size = queue_size
+    controller.queue_timeout = timeout
+    controller.interactive_max_bytes = 1000
+    return controller
+
+async def _settle(controller, running, queued):
+    """Let started tasks take their slots or reach the wait queue."""
+    expected = {"running": running, "queued": queued}
+    for _ in range(100):
+        if controller.stats() == expected:
+            return
+        await asyncio.sleep(0)
+    raise AssertionError(f"{controller.stats()}, expected {expected}")
+
+async def _run_in_order(controller, requests):
+    """
+    Queue (lane, tenant) requests behind a held slot, release it, and
+    return them in the order they were given slots.
+    """
+    order = []
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot("PdfProcessor", Lane.INTERACTIVE, "holder"):
+            await release.wait()
+
+    async def convert(lane, tenant):
+        async with controller.slot("PdfProcessor", lane, tenant, bounded=False):
+            order.append((lane, tenant))
+
+    holder = asyncio.create_task(hold())
+    await _settle(controller, 1, 0)
+    tasks = []
+    for lane, tenant in requests:
+        tasks.append(asyncio.create_task(convert(lane, tenant)))
+        await _settle(controller, 1, len(tasks))
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+def test_lane_for_upload():
+    controller = _controller()
+
+    assert controller.lane_for_upload(None) is Lane.INTERACTIVE
+    assert controller.lane_for_upload(1000) is Lane.INTERACTIVE
+    assert controller.lane_for_upload(1001) is Lane.BULK
+
+def test_processor_name_prefers_sniffed_content():
+    sniffed = types.SimpleNamespace(format="xlsx")
+
+    assert AdmissionController.processor_name("report.pdf") == "PdfProcessor"
+    assert AdmissionController.processor_name("report.pdf", sniffed) == "XlsxProcessor"
+
+def test_interactive_work_goes_before_bulk():
+    controller = _controller()
+    requests = [(Lane.BULK, "a"), (Lane.BULK, "b"), (Lane.INTERACTIVE, "c")]
+
+    order = asyncio.run(_run_in_order(controller, requests))
+
+    assert [lane for lane, _ in order] == [Lane.INTERACTIVE, Lane.BULK, Lane.BULK]
+
+def test_bulk_goes_first_below_its_guaranteed_slots():
+    controller = _controller(bulk_min=1)
+    requests = [(Lane.INTERACTIVE, "a"), (Lane.BULK, "b")]
+
+    order = asyncio.run(_run_in_order(controller, requests))
+
+    assert [lane for lane, _ in order] == [Lane.BULK, Lane.INTERACTIVE]
+
+def test_bulk_never_takes_reserved_slots():
+    async def scenario():
+        controller = _controller(max_concurrent=2, reserved=1)
+        release = asyncio.Event()
+
+        async def bulk():
+            async with controller.slot("PdfProcessor", Lane.BULK, bounded=False):
+                await release.wait()
+
+        tasks = [asyncio.create_task(bulk()), asyncio.create_task(bulk())]
+        # One bulk conversion runs; the other waits although a slot is free
+        await _settle(controller, 1, 1)
+
+        async with controller.slot("PdfProcessor", Lane.INTERACTIVE):
+            assert controller.stats() == {"running": 2, "queued": 1}
+        release.set()
+        await asyncio.gather(*tasks)
+        assert controller.stats() == {"running": 0, "queued": 0}
+
+    asyncio.run(scenario())
+
+def test_tenants_share_slots_by_weight():
+    controller = _controller(weights={"heavy": 2.0})
+    # Interleaved, so queue order alone would alternate
+    requests = [(Lane.BULK, tenant) for tenant in ["light", "heavy"] * 4]
+
+    order = asyncio.run(_run_in_order(controller, requests))
+
+    tenants = [tenant for _, tenant in order]
+    assert tenants[:4].count("heavy") == 3
+    assert tenants[-2:] == ["light", "light"]
+
+def test_one_tenants_backlog_does_not_starve_another():
+    controller = _controller()
+    requests = [(Lane.BULK, "backfill")] * 6 + [(Lane.BULK, "other")]
+
+    order = asyncio.run(_run_in_order(controller, requests))
+
+    assert [tenant for _, tenant in order].index("other") <= 1
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = _controller(queue_size=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot("PdfProcessor"):
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold()), asyncio.create_task(hold())]
+        await _settle(controller, 1, 1)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.slot("PdfProcessor"):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return excinfo.value
+
+    rejected = asyncio.run(scenario())
+
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+
+def test_wait_timeout_is_rejected_with_503():
+    async def scenario():
+        controller = _controller(timeout=0.01)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot("PdfProcessor"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await _settle(controller, 1, 0)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.slot("PdfProcessor"):
+                pass
+        assert controller.stats() == {"running": 1, "queued": 0}
+        release.set()
+        await holder
+        return excinfo.value
+
+    assert asyncio.run(scenario()).status_code == 503
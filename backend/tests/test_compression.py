@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from app.utils import compression
+from app.utils.compression import (
+    CompressionError, accepts_encoding, compress, compress_stream, decompress, decompress_stream
+)
+
+DATA = b"# Heading\n\n" + b"Some repetitive markdown content. " * 4000
+
+ENCODINGS = ["gzip", pytest.param("zstd", marks=pytest.mark.skipif(
+    compression.zstandard is None, reason="zstandard is not installed"
+))]
+
+def _chunks(data, size=1000):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_round_trip(encoding):
+    compressed = compress(DATA, encoding)
+
+    assert len(compressed) < len(DATA)
+    assert decompress(compressed, encoding) == DATA
+    assert b"".join(decompress_stream(_chunks(compressed), encoding)) == DATA
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_compress_stream_matches_decompress(encoding):
+    target = io.BytesIO()
+    compress_stream(io.BytesIO(DATA), target, len(DATA), encoding)
+
+    assert decompress(target.getvalue(), encoding) == DATA
+    assert b"".join(decompress_stream(_chunks(target.getvalue(), 7), encoding)) == DATA
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_empty_input(encoding):
+    target = io.BytesIO()
+    compress_stream(io.BytesIO(b""), target, 0, encoding)
+
+    assert decompress(compress(b"", encoding), encoding) == b""
+    assert b"".join(decompress_stream([target.getvalue()], encoding)) == b""
+
+def test_no_encoding_passes_through():
+    assert decompress(DATA, None) == DATA
+    assert list(decompress_stream([b"a", b"b"], None)) == [b"a", b"b"]
+
+def test_unsupported_encoding():
+    with pytest.raises(CompressionError):
+        compress(DATA, "br")
+    with pytest.raises(CompressionError):
+        decompress(DATA, "br")
+    with pytest.raises(CompressionError):
+        list(decompress_stream([DATA], "br"))
+
+def test_zstd_without_the_package(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+
+    with pytest.raises(CompressionError):
+        compress(DATA, "zstd")
+    with pytest.raises(CompressionError):
+        compress_stream(io.BytesIO(DATA), io.BytesIO(), len(DATA), "zstd")
+
+@pytest.mark.parametrize("header, encoding, expected", [
+    (None, "gzip", False),
+    ("gzip", "gzip", True),
+    ("deflate, gzip;q=0.8", "gzip", True),
+    ("GZIP", "gzip", True),
+    ("gzip;q=0", "gzip", False),
+    ("gzip; q=0.0", "gzip", False),
+    ("*", "zstd", True),
+    ("*;q=0, gzip", "gzip", True),
+    ("gzip;q=0, *", "gzip", False),
+    ("*;q=0", "gzip", False),
+    ("br, deflate", "gzip", False),
+])
+def test_accepts_encoding(header, encoding, expected):
+    assert accepts_encoding(header, encoding) is expected
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("pydantic_settings")
+
+from app.core.events import EventBus
+
+FILE_ID = "7c1f0a52-5d0e-4a8e-9d3b-2f6c1e9a4b10"
+
+def _status(status, error_message=None):
+    return {"type": "status", "file_id": FILE_ID, "status": status, "error_message": error_message}
+
+async def _watch(published, initial_status="processing"):
+    """Open a subscription, publish `published`, then read the initial status and follow."""
+    bus = EventBus()
+    # No Redis: the listener is taken as subscribed and events are dispatched locally
+    bus._ensure_listener = bus._ready.set
+    subscription = await bus.open(FILE_ID)
+    for event in published:
+        bus._dispatch(event)
+    # Only now is the status read, as the route does
+    initial = _status(initial_status)
+    events = [event async for event in subscription.follow(initial, keepalive=1)]
+    return events, bus
+
+def test_terminal_event_between_subscribe_and_status_read():
+    events, bus = asyncio.run(_watch([_status("completed")]))
+
+    assert [event["status"] for event in events] == ["processing", "completed"]
+    assert not bus._subscribers
+
+def test_events_repeating_the_initial_status_are_dropped():
+    published = [_status("processing"), {"type": "progress", "file_id": FILE_ID}, _status("failed", "boom")]
+    events, _ = asyncio.run(_watch(published))
+
+    assert [event.get("status") for event in events] == ["processing", None, "failed"]
+    assert events[-1]["error_message"] == "boom"
+
+def test_terminal_initial_status_ends_the_stream():
+    events, bus = asyncio.run(_watch([_status("completed")], initial_status="completed"))
+
+    assert [event["status"] for event in events] == ["completed"]
+    assert not bus._subscribers
@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.utils.http import RangeNotSatisfiable, etag_matches, parse_range
+
+@pytest.mark.parametrize("header, size, expected", [
+    ("bytes=0-99", 1000, (0, 99)),
+    ("bytes=100-", 1000, (100, 999)),
+    ("bytes=-100", 1000, (900, 999)),
+    # Ranges reaching past the end are cut to it
+    ("bytes=900-5000", 1000, (900, 999)),
+    ("bytes=-5000", 1000, (0, 999)),
+    ("bytes=0-0", 1, (0, 0)),
+])
+def test_satisfiable_ranges(header, size, expected):
+    assert parse_range(header, size) == expected
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "items=0-10",
+    "bytes=0-10,20-30",
+    "bytes=10",
+    "bytes=a-b",
+])
+def test_ranges_served_as_the_full_body(header):
+    assert parse_range(header, 1000) is None
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-2000", 1000),
+    ("bytes=20-10", 1000),
+    ("bytes=-0", 1000),
+    # An empty body has no byte to select, whatever the range
+    ("bytes=0-", 0),
+    ("bytes=0-0", 0),
+    ("bytes=-10", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiable) as excinfo:
+        parse_range(header, size)
+
+    assert excinfo.value.size == size
+
+@pytest.mark.parametrize("if_none_match, etag, expected", [
+    (None, '"abc"', False),
+    ('"abc"', '"abc"', True),
+    ('W/"abc"', '"abc"', True),
+    ('"xyz", W/"abc"', '"abc"', True),
+    ("*", '"abc"', True),
+    ('"xyz"', '"abc"', False),
+])
+def test_etag_matches(if_none_match, etag, expected):
+    assert etag_matches(if_none_match, etag) is expected
@@ -0,0 +1,84 @@
+import pytest
+
+msgpack = pytest.importorskip("msgpack")
+
+from app.utils.blocks import heading, paragraph, positions, table_row
+from app.utils.intermediate import (
+    FORMAT_VERSION, IntermediateFormatError, new_document, pack_document, unpack_document
+)
+
+def test_round_trip():
+    blocks = [
+        heading("Title", 1),
+        paragraph("Body text", "Body *text*"),
+        table_row(["a", "b"], header=True, table="Sheet1"),
+        positions(1, [{"text": "Body", "x": 10.5, "y": 20.0}]),
+    ]
+    document = new_document(blocks, {"title": "Title", "page_count": 1}, "PDFProcessor")
+
+    assert document["version"] == FORMAT_VERSION
+    assert unpack_document(pack_document(document)) == document
+
+class _Revision:
+    def __str__(self):
+        return "r42"
+
+def test_values_msgpack_cannot_encode_are_stringified():
+    document = new_document([], {"revision": _Revision()}, "DocxProcessor")
+
+    assert unpack_document(pack_document(document))["metadata"]["revision"] == "r42"
+
+def test_version_1_documents_are_upgraded():
+    packed = msgpack.packb({
+        "version": 1,
+        "processor": "PDFProcessor",
+        "text": "First paragraph\n\n  \n\nSecond paragraph",
+        "metadata": {
+            "title": "Report",
+            "positions": [
+                {"page": 2, "text": "Second"},
+                {"page": 1, "text": "First"},
+                # Positions without a page belong to the first
+                {"text": "Unpaged"},
+            ],
+        },
+    }, use_bin_type=True)
+
+    document = unpack_document(packed)
+
+    assert document["version"] == FORMAT_VERSION
+    assert document["processor"] == "PDFProcessor"
+    assert document["metadata"] == {"title": "Report"}
+    assert document["blocks"] == [
+        paragraph("First paragraph"),
+        paragraph("Second paragraph"),
+        positions(1, [{"page": 1, "text": "First"}, {"text": "Unpaged"}]),
+        positions(2, [{"page": 2, "text": "Second"}]),
+    ]
+
+def test_version_1_without_positions():
+    packed = msgpack.packb({
+        "version": 1, "processor": "TextProcessor", "text": "Only text", "metadata": {"positions": None}
+    }, use_bin_type=True)
+
+    assert unpack_document(packed)["blocks"] == [paragraph("Only text")]
+
+@pytest.mark.parametrize("payload", [
+    {"version": FORMAT_VERSION + 1, "processor": "X", "blocks": [], "metadata": {}},
+    {"version": 0, "processor": "X", "blocks": [], "metadata": {}},
+    {"processor": "X", "blocks": [], "metadata": {}},
+    ["not", "a", "document"],
+])
+def test_unknown_format_versions_are_rejected(payload):
+    with pytest.raises(IntermediateFormatError, match="version"):
+        unpack_document(msgpack.packb(payload, use_bin_type=True))
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\xc1",
+    msgpack.packb({"version": FORMAT_VERSION})[:-1],
+    msgpack.packb({"version": FORMAT_VERSION}) + b"trailing",
+])
+def test_corrupt_data_is_rejected(data):
+    with pytest.raises(IntermediateFormatError):
+        unpack_document(data)
@@ -0,0 +1,71 @@
+import io
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+import pytest
+
+from app.utils import jsoncodec
+from app.utils.jsoncodec import JsonArrayWriter, JsonBackendError
+
+BACKENDS = ["stdlib", pytest.param("orjson", marks=pytest.mark.skipif(
+    jsoncodec.orjson is None, reason="orjson is not installed"
+))]
+
+@dataclass
+class Timing:
+    stage: str
+    seconds: float
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    previous = jsoncodec.get_backend().name
+    yield jsoncodec.use_backend(request.param)
+    jsoncodec.use_backend(previous)
+
+def test_backends_encode_alike(backend):
+    value = {
+        "text": "naïve ☃ 😀",
+        "nested": [1, 2.5, None, True],
+        "when": datetime(2024, 1, 2, 3, 4, 5),
+        "stamped": datetime(2024, 1, 2, 3, 4, 5, 6789, tzinfo=timezone.utc),
+        "day": date(2024, 1, 2),
+        "timing": Timing("extract", 1.5),
+        "id": UUID("12345678-1234-5678-1234-567812345678"),
+        3: "non-string key",
+    }
+    encoded = backend.dumps(value)
+
+    assert encoded == jsoncodec.JsonBackend().dumps(value)
+    assert json.loads(encoded)["when"] == "2024-01-02T03:04:05"
+
+def test_values_orjson_rejects_fall_back(backend):
+    assert backend.dumps({"big": 2 ** 70}) == b'{"big":1180591620717411303424}'
+
+def test_lone_surrogates_are_replaced(backend):
+    encoded = backend.dumps({"text": "a\udcffb", "\ud800": "key"})
+
+    assert encoded.decode("utf-8") == '{"text":"a�b","�":"key"}'
+    assert backend.loads(encoded) == {"text": "a�b", "�": "key"}
+
+@pytest.mark.parametrize("data", [b'"\xff"', b'{"a":"\xe9"}'])
+def test_non_utf8_input_is_a_value_error(backend, data):
+    with pytest.raises(ValueError):
+        backend.loads(data)
+
+def test_loads_accepts_memoryview(backend):
+    assert backend.loads(memoryview(b'{"a":[1]}')) == {"a": [1]}
+
+def test_unknown_backend():
+    with pytest.raises(JsonBackendError):
+        jsoncodec.use_backend("simdjson")
+
+def test_array_writer(backend):
+    out = io.BytesIO()
+    writer = JsonArrayWriter(out)
+    writer.write({"a": 1})
+    writer.extend(["b", None])
+
+    assert writer.count == 3
+    assert json.loads(b"[" + out.getvalue() + b"]") == [{"a": 1}, "b", None]
@@ -0,0 +1,37 @@
+import base64
+from datetime import datetime, timezone
+from uuid import UUID
+
+import pytest
+
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+FILE_ID = UUID("0b6f2f4e-8f0c-4a5e-9b57-3c2d1e0f9a88")
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 5, 6, 7, 8, 9),
+    datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc),
+])
+def test_round_trip(created_at):
+    cursor = encode_cursor(created_at, FILE_ID)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, FILE_ID)
+
+def _cursor(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    "abcde",
+    "ü",
+    _cursor(b"\xff\xfe\xfd"),
+    _cursor(b"2024-05-06T07:08:09"),
+    _cursor(b"2024-05-06T07:08:09|" + str(FILE_ID).encode() + b"|extra"),
+    _cursor(b"yesterday|" + str(FILE_ID).encode()),
+    _cursor(b"2024-05-06T07:08:09|not-a-uuid"),
+])
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
@@ -0,0 +1,36 @@
+from app.utils.blocks import table_row
+from app.utils.chunker import DocumentChunker
+from app.utils.sinks import ChunkSink, MarkdownSink, TextSink, column_name, render_blocks
+
+def _ragged_table():
+    return [
+        table_row(["name", "age"], header=True, table="People"),
+        table_row(["bob", "3"], table="People"),
+        table_row(["zed", "5", "extra", "col"], table="People"),
+        table_row(["amy", "7"], table="People"),
+    ]
+
+def test_column_name():
+    assert column_name(1) == "Column A"
+    assert column_name(26) == "Column Z"
+    assert column_name(28) == "Column AB"
+
+def test_rows_wider_than_the_header_survive_markdown():
+    markdown, text = render_blocks(_ragged_table(), [MarkdownSink({}), TextSink()])
+
+    assert "| zed | 5 | extra | col |" in markdown
+    assert "| name | age | Column C | Column D |" in markdown
+    # Rows after the wide one keep the widened table
+    assert "| amy | 7 |  |  |" in markdown
+    # Markdown and plain text agree on the cells
+    assert "zed\t5\textra\tcol" in text
+
+def test_rows_wider_than_the_header_survive_chunking():
+    [chunks] = render_blocks(_ragged_table(), [ChunkSink(DocumentChunker(1000, 0))])
+
+    content = "\n".join(chunk["content"] for chunk in chunks)
+    assert "| zed | 5 | extra | col |" in content
+    assert "| bob | 3 |" in content
+    assert chunks[-1]["metadata"]["headers"] == ["name", "age", "Column C", "Column D"]
+    rows = [chunk["metadata"]["row_range"] for chunk in chunks]
+    assert rows[0]["start"] == 1 and rows[-1]["end"] == 3
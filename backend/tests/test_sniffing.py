@@ -0,0 +1,110 @@
+import io
+import zipfile
+
+import pytest
+
+from app.utils import sniffing
+from app.utils.sniffing import sniff, sniff_dialect
+
+def _zip(entries, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def _write(tmp_path, data, name="upload.bin"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+CONTENT_TYPES = (
+    '<?xml version="1.0"?><Types><Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'
+)
+
+@pytest.mark.parametrize("data, expected", [
+    (b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n", sniffing.PDF),
+    # Readers accept junk ahead of the header
+    (b"\x00" * 100 + b"%PDF-1.4\n", sniffing.PDF),
+    (sniffing.OLE_SIGNATURE + b"\x00" * 504, sniffing.OLE),
+    (_zip([("word/document.xml", "<w:document/>")]), sniffing.DOCX),
+    (_zip([("xl/workbook.xml", "<workbook/>")]), sniffing.XLSX),
+    (_zip([("[Content_Types].xml", CONTENT_TYPES), ("docProps/app.xml", "<Properties/>")]), sniffing.DOCX),
+    (_zip([("[Content_Types].xml", CONTENT_TYPES)], zipfile.ZIP_STORED), sniffing.DOCX),
+    (_zip([("notes.txt", "hello"), ("data.csv", "a,b")]), sniffing.ZIP),
+])
+def test_containers_by_signature(tmp_path, data, expected):
+    assert sniff(_write(tmp_path, data)).format == expected
+
+def test_renamed_file_is_sniffed_by_content(tmp_path):
+    path = _write(tmp_path, _zip([("xl/workbook.xml", "<workbook/>")]), "report.pdf")
+
+    assert sniff(path).format == sniffing.XLSX
+
+def test_ooxml_parts_beyond_the_sample_are_found_in_the_central_directory(tmp_path):
+    filler = [(f"media/image{i}.bin", bytes(512)) for i in range(8)]
+    data = _zip(filler + [("xl/workbook.xml", "<workbook/>")], zipfile.ZIP_STORED)
+
+    assert sniff(_write(tmp_path, data), size=1024).format == sniffing.XLSX
+
+def test_file_objects_are_read_from_the_start_and_rewound():
+    upload = io.BytesIO(_zip([("word/document.xml", "<w:document/>")]))
+    upload.seek(10)
+
+    assert sniff(upload).format == sniffing.DOCX
+    assert upload.tell() == 0
+
+def test_file_objects_are_rewound_after_a_central_directory_read():
+    filler = [(f"media/image{i}.bin", bytes(512)) for i in range(8)]
+    upload = io.BytesIO(_zip(filler + [("word/document.xml", "<w:document/>")], zipfile.ZIP_STORED))
+
+    assert sniff(upload, size=1024).format == sniffing.DOCX
+    assert upload.tell() == 0
+
+def test_truncated_zip_is_a_plain_zip(tmp_path):
+    data = _zip([("notes.txt", "hello " * 2000)], zipfile.ZIP_STORED)[:4096]
+
+    assert sniff(_write(tmp_path, data)).format == sniffing.ZIP
+
+@pytest.mark.parametrize("data, encoding", [
+    ("plain words\n".encode("utf-8"), "utf-8"),
+    ("café crème\n".encode("latin-1"), "latin-1"),
+    ("wide text".encode("utf-16"), "utf-16"),
+    ("wide text".encode("utf-32"), "utf-32"),
+    (b"", "utf-8"),
+])
+def test_text_encodings(tmp_path, data, encoding):
+    sniffed = sniff(_write(tmp_path, data))
+
+    assert sniffed.format == sniffing.TEXT
+    assert sniffed.encoding == encoding
+
+def test_multibyte_character_cut_by_the_sample_is_still_utf8(tmp_path):
+    data = ("x" * 9 + "€").encode("utf-8")
+
+    assert sniff(_write(tmp_path, data), size=10).encoding == "utf-8"
+
+@pytest.mark.parametrize("data", [
+    b"\x7fELF\x02\x01\x01\x00" + bytes(200),
+    bytes(range(256)) * 4,
+])
+def test_binary(tmp_path, data):
+    assert sniff(_write(tmp_path, data)).format == sniffing.BINARY
+
+def test_delimited_text_gets_a_dialect(tmp_path):
+    data = b"name;age;city\nbob;3;paris\namy;7;oslo\nzed;5;rome\n"
+    sniffed = sniff(_write(tmp_path, data, "people.txt"))
+
+    assert sniffed.format == sniffing.TEXT
+    assert sniffed.dialect is not None and sniffed.dialect.delimiter == ";"
+
+def test_prose_has_no_dialect(tmp_path):
+    data = b"A single line of prose, with a comma, is not a table.\n"
+
+    assert sniff(_write(tmp_path, data)).dialect is None
+
+def test_sniff_dialect_ignores_the_partial_last_line():
+    sample = b"a\tb\tc\n1\t2\t3\n4\t5\t6\n7\t8"
+
+    assert sniff_dialect(sample).delimiter == "\t"
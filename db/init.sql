@@ -3,6 +3,7 @@ CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- Create enum types
 CREATE TYPE file_status AS ENUM ('pending', 'processing', 'completed', 'failed');
+CREATE TYPE content_stage AS ENUM ('preview', 'full');
 
 -- Create files table
 CREATE TABLE IF NOT EXISTS files (
@@ -11,15 +12,31 @@ CREATE TABLE IF NOT EXISTS files (
     original_type VARCHAR(50) NOT NULL,
     file_size BIGINT NOT NULL,
     status file_status DEFAULT 'pending',
+    content_hash VARCHAR(64),
+    batch_id UUID,
+    conversion_key TEXT,
     error_message TEXT,
     metadata JSONB,
+    original_path TEXT,
     markdown_path TEXT,
     json_path TEXT,
+    metadata_path TEXT,
+    intermediate_path TEXT,
+    profile_path TEXT,
+    content_stage content_stage,
+    preview_markdown_path TEXT,
+    preview_json_path TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     page_count INTEGER,
     word_count INTEGER,
-    chunk_count INTEGER
+    chunk_count INTEGER,
+    peak_memory_mb REAL,
+    cpu_seconds REAL,
+    wall_seconds REAL,
+    lease_owner TEXT,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    retries INTEGER NOT NULL DEFAULT 0
 );
 
 -- Create chunks table
@@ -63,6 +80,16 @@ CREATE TRIGGER update_files_updated_at
 -- Create indexes
 CREATE INDEX idx_files_status ON files(status);
 CREATE INDEX idx_files_filename ON files(filename);
+CREATE INDEX idx_files_content_hash ON files(content_hash);
+CREATE INDEX idx_files_batch_id ON files(batch_id);
+-- Lease heartbeats by owner, and the reaper's scan for lapsed leases
+CREATE INDEX idx_files_lease_owner ON files(lease_owner);
+CREATE INDEX idx_files_lease_expires_at ON files(lease_expires_at)
+    WHERE status IN ('pending', 'processing');
+-- Keyset pagination on (created_at, id), optionally narrowed by status or type
+CREATE INDEX idx_files_created_at_id ON files(created_at, id);
+CREATE INDEX idx_files_status_created_at_id ON files(status, created_at, id);
+CREATE INDEX idx_files_type_created_at_id ON files(original_type, created_at, id);
 CREATE INDEX idx_chunks_file_id ON chunks(file_id);
 CREATE INDEX idx_positions_file_id ON positions(file_id);
 CREATE INDEX idx_positions_page ON positions(file_id, page_number);
@@ -1,5 +1,5 @@
 import { getApiUrl } from "./config"
-import type { ConversionFile } from "./types"
+import type { BatchStatus, ContentStage, ConversionFile, FileEvent, FileListResponse, ListFilesParams } from "./types"
 
 interface ApiResponse<T> {
   data?: T;
@@ -33,10 +33,44 @@ class ApiService {
     }
   }
 
-  async listFiles(): Promise<ApiResponse<ConversionFile[]>> {
+  async uploadBatch(files: File[]): Promise<ApiResponse<BatchStatus>> {
     try {
-      const response = await fetch(getApiUrl('/files/list'))
-      return this.handleResponse<ConversionFile[]>(response)
+      const formData = new FormData()
+      files.forEach(file => formData.append('files', file))
+
+      const response = await fetch(getApiUrl('/files/upload-batch'), {
+        method: 'POST',
+        body: formData,
+      })
+
+      return this.handleResponse<BatchStatus>(response)
+    } catch (error) {
+      return {
+        error: error instanceof Error ? error.message : 'Failed to upload files'
+      }
+    }
+  }
+
+  async getBatchStatus(batchId: string): Promise<ApiResponse<BatchStatus>> {
+    try {
+      const response = await fetch(getApiUrl(`/files/batches/${batchId}`))
+      return this.handleResponse<BatchStatus>(response)
+    } catch (error) {
+      return {
+        error: error instanceof Error ? error.message : 'Failed to fetch batch status'
+      }
+    }
+  }
+
+  async listFiles(params: ListFilesParams = {}): Promise<ApiResponse<FileListResponse>> {
+    try {
+      const query = new URLSearchParams()
+      Object.entries(params).forEach(([key, value]) => {
+        if (value !== undefined) query.set(key, String(value))
+      })
+      const suffix = query.toString() ? `?${query.toString()}` : ''
+      const response = await fetch(getApiUrl(`/files/list${suffix}`))
+      return this.handleResponse<FileListResponse>(response)
     } catch (error) {
       return {
         error: error instanceof Error ? error.message : 'Failed to fetch files'
@@ -58,12 +92,14 @@ class ApiService {
   async getFileContent(fileId: string, type: 'markdown' | 'json' = 'markdown'): Promise<ApiResponse<{
     content: string;
     metadata: Record<string, any>;
+    content_stage?: ContentStage | null;
   }>> {
     try {
       const response = await fetch(getApiUrl(`/files/${fileId}/content?type=${type}`))
       return this.handleResponse<{
         content: string;
         metadata: Record<string, any>;
+        content_stage?: ContentStage | null;
       }>(response)
     } catch (error) {
       return {
@@ -72,6 +108,15 @@ class ApiService {
     }
   }
 
+  subscribeToEvents(onEvent: (event: FileEvent) => void, fileId?: string): () => void {
+    const path = fileId ? `/files/${fileId}/events` : '/files/events'
+    const source = new EventSource(getApiUrl(path))
+    const handler = (message: MessageEvent) => onEvent(JSON.parse(message.data))
+    source.addEventListener('status', handler)
+    source.addEventListener('progress', handler)
+    return () => source.close()
+  }
+
   async deleteFile(fileId: string): Promise<ApiResponse<{ message: string }>> {
     try {
       const response = await fetch(getApiUrl(`/files/${fileId}`), {
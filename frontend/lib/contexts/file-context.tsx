@@ -31,24 +31,49 @@ export function FileProvider({ children }: { children: React.ReactNode }) {
   const [loading, setLoading] = React.useState(true)
   const [error, setError] = React.useState<string | null>(null)
   const [selectedFileId, setSelectedFileId] = React.useState<string | null>(null)
+  const filesRef = React.useRef<ConversionFile[]>([])
+
+  React.useEffect(() => {
+    filesRef.current = files
+  }, [files])
 
   const refreshFiles = React.useCallback(async () => {
     setLoading(true)
-    const response = await api.listFiles()
-    if (response.error) {
-      setError(response.error)
-    } else if (response.data) {
-      setFiles(response.data)
-      setError(null)
-    }
+    // The list is paginated; follow the cursor so older files are not dropped
+    const items: ConversionFile[] = []
+    let cursor: string | undefined
+    do {
+      const response = await api.listFiles({ limit: 100, cursor })
+      if (response.error || !response.data) {
+        setError(response.error ?? 'Failed to fetch files')
+        setLoading(false)
+        return
+      }
+      items.push(...response.data.items)
+      cursor = response.data.next_cursor ?? undefined
+    } while (cursor)
+    setFiles(items)
+    setError(null)
     setLoading(false)
   }, [])
 
   React.useEffect(() => {
     refreshFiles()
-    // Set up polling for updates
-    const interval = setInterval(refreshFiles, 5000)
-    return () => clearInterval(interval)
+    // Apply pushed status updates instead of polling the list
+    return api.subscribeToEvents((event) => {
+      if (event.type !== 'status') return
+      const known = filesRef.current.some((file) => file.id === event.file_id)
+      if (!known || event.status === 'completed') {
+        // New files and finished conversions need the full row
+        refreshFiles()
+        return
+      }
+      setFiles((current) => current.map((file) => (
+        file.id === event.file_id
+          ? { ...file, status: event.status, error_message: event.error_message ?? undefined }
+          : file
+      )))
+    })
   }, [refreshFiles])
 
   const value = React.useMemo(() => ({
@@ -1,5 +1,7 @@
 export type FileStatus = 'pending' | 'processing' | 'completed' | 'failed';
 
+export type ContentStage = 'preview' | 'full';
+
 export interface FileMetadata {
   title?: string;
   author?: string;
@@ -37,8 +39,57 @@ export interface ConversionFile {
   page_count?: number;
   word_count?: number;
   chunk_count?: number;
+  peak_memory_mb?: number | null;
+  cpu_seconds?: number | null;
+  wall_seconds?: number | null;
+  profile_path?: string | null;
+  content_stage?: ContentStage | null;
+  preview_markdown_path?: string | null;
+  preview_json_path?: string | null;
+}
+
+export interface FileListResponse {
+  items: ConversionFile[];
+  next_cursor?: string | null;
+}
+
+export interface BatchStatus {
+  batch_id: string;
+  total: number;
+  pending: number;
+  processing: number;
+  completed: number;
+  failed: number;
+}
+
+export interface ListFilesParams {
+  cursor?: string;
+  limit?: number;
+  status?: FileStatus;
+  original_type?: string;
+  created_after?: string;
+  created_before?: string;
 }
 
+export interface FileStatusEvent {
+  type: 'status';
+  file_id: string;
+  status: FileStatus;
+  error_message?: string | null;
+  batch_id?: string | null;
+  content_stage?: ContentStage | null;
+}
+
+export interface FileProgressEvent {
+  type: 'progress';
+  file_id: string;
+  stage: string;
+  done: number;
+  total?: number | null;
+}
+
+export type FileEvent = FileStatusEvent | FileProgressEvent;
+
 export interface ChunkMetadata {
   id: string;
   file_id: string;